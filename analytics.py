@@ -0,0 +1,340 @@
+#! /usr/bin/env/ python3
+
+from array import array
+from contextlib import closing
+from itertools import chain
+
+import db
+import summary
+from business import INT_FIELDS
+
+# NumPy is optional. Without it the same numbers are worked out inside SQLite
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Percentiles shown in the force size report
+PERCENTILES = (10, 25, 50, 75, 90)
+
+# Groups shown per table in the overview
+OVERVIEW_LIMIT = 5
+
+# Stands in for NULL while columns are loaded, lower than any real count
+NULL_VALUE = -(2 ** 63)
+
+#-------------------------------------------------------------------------
+
+# Loads the four integer columns of the battles table into arrays
+# Returns a dictionary of column name -> NumPy array (or array('q') without NumPy)
+# NULLs are left out, so each column holds only the battles where that number is known
+def load_Force_Columns(batch_Size: int = 50000) -> dict:
+
+    query = "SELECT " + ", ".join(f"IFNULL({name}, {NULL_VALUE})" for name in INT_FIELDS) + " FROM battles"
+
+    with db.read_Connection() as reader, closing(reader.cursor()) as c:
+        # Plain tuples convert straight into arrays
+        c.row_factory = None
+
+        # The count and the rows are read in one transaction, so they always agree
+        is_Own_Transaction = not reader.in_transaction
+        if is_Own_Transaction:
+            reader.execute("BEGIN")
+
+        try:
+            c.execute("SELECT COUNT(*) FROM battles")
+            count = c.fetchone()[0]
+
+            c.execute(query)
+
+            if np is not None:
+                # Fills one 2D array batch by batch, then splits it into columns
+                table = np.empty((count, len(INT_FIELDS)), dtype=np.int64)
+                filled = 0
+
+                while True:
+                    rows = c.fetchmany(batch_Size)
+                    if not rows:
+                        break
+                    table[filled:filled + len(rows)] = rows
+                    filled += len(rows)
+
+                return {name: table[:, i][table[:, i] != NULL_VALUE] for i, name in enumerate(INT_FIELDS)}
+
+            columns = {name: array('q') for name in INT_FIELDS}
+
+            while True:
+                rows = c.fetchmany(batch_Size)
+                if not rows:
+                    break
+                # zip(*rows) turns the batch of rows into one tuple per column
+                for name, values in zip(INT_FIELDS, zip(*rows)):
+                    columns[name].extend(value for value in values if value != NULL_VALUE)
+
+            return columns
+        finally:
+            if is_Own_Transaction:
+                reader.rollback()
+
+#-------------------------------------------------------------------------
+
+# Returns dataset-wide casualty totals and ratios
+# Read from the one row of battle_totals, so it takes the same time for any number of battles
+def get_Casualty_Totals() -> dict:
+
+    query = ("SELECT battles, " + ", ".join(INT_FIELDS) + ", " +
+             ", ".join(f"{side}RateSum, {side}Rates" for side in summary.RATE_EXPRESSIONS) +
+             " FROM battle_totals")
+
+    with db.read_Connection() as reader, closing(reader.cursor()) as c:
+        c.execute(query)
+        row = c.fetchone()
+
+    (battles, victor_Forces, vanquished_Forces, victor_Deaths, vanquished_Deaths,
+     victor_Rate_Sum, victor_Rates, vanquished_Rate_Sum, vanquished_Rates) = row
+
+    total_Forces = victor_Forces + vanquished_Forces
+    total_Deaths = victor_Deaths + vanquished_Deaths
+
+    return {
+        'battles': battles,
+        'victorForces': victor_Forces,
+        'vanquishedForces': vanquished_Forces,
+        'totalVictorDeaths': victor_Deaths,
+        'totalVanquishedDeaths': vanquished_Deaths,
+        'totalDeaths': total_Deaths,
+        # Share of everyone who fought that died
+        'casualtyRate': total_Deaths / total_Forces if total_Forces else 0.0,
+        # Average per-battle share of each side that died, over the battles where it had forces
+        'avgVictorCasualtyRate': victor_Rate_Sum / victor_Rates if victor_Rates else 0.0,
+        'avgVanquishedCasualtyRate': vanquished_Rate_Sum / vanquished_Rates if vanquished_Rates else 0.0,
+        # Vanquished deaths for every victor death
+        'exchangeRatio': vanquished_Deaths / victor_Deaths if victor_Deaths else 0.0,
+    }
+
+# Returns the dates of the oldest and newest battles, or (None, None) without any
+# MIN and MAX on an indexed column are read straight off idx_battles_date
+def get_Date_Range() -> tuple[str | None, str | None]:
+
+    with db.read_Connection() as reader, closing(reader.cursor()) as c:
+        c.execute("SELECT MIN(date) FROM battles")
+        first_Date = c.fetchone()[0]
+        c.execute("SELECT MAX(date) FROM battles")
+        last_Date = c.fetchone()[0]
+
+    return first_Date, last_Date
+
+#-------------------------------------------------------------------------
+
+# Returns the given percentiles of each force and death column, over the battles where it isn't NULL
+# Uses linear interpolation between ranks, the same as numpy.percentile's default
+def get_Force_Percentiles(percentiles=PERCENTILES) -> dict:
+
+    if np is not None:
+        columns = load_Force_Columns()
+        return {
+            name: dict(zip(percentiles, np.percentile(values, percentiles).tolist())) if len(values) else {}
+            for name, values in columns.items()
+        }
+
+    results = {}
+
+    with db.read_Connection() as reader, closing(reader.cursor()) as c:
+        for name in INT_FIELDS:
+            # COUNT of a column leaves out its NULLs
+            c.execute(f"SELECT COUNT({name}) FROM battles")
+            count = c.fetchone()[0]
+
+            if not count:
+                results[name] = {}
+                continue
+
+            # Works out which sorted positions are needed for every percentile
+            positions = [p / 100 * (count - 1) for p in percentiles]
+            ranks = sorted(set(chain.from_iterable((int(k), min(int(k) + 1, count - 1)) for k in positions)))
+
+            # SQLite sorts the column once and only hands back the rows at those ranks
+            rank_List = ", ".join("?" * len(ranks))
+            c.execute(f'''
+                SELECT rn, value FROM (
+                    SELECT {name} AS value, ROW_NUMBER() OVER (ORDER BY {name}) - 1 AS rn
+                    FROM battles
+                    WHERE {name} IS NOT NULL
+                )
+                WHERE rn IN ({rank_List})
+            ''', ranks)
+            values = dict(c.fetchall())
+
+            results[name] = {}
+            for p, k in zip(percentiles, positions):
+                low = values[int(k)]
+                high = values[min(int(k) + 1, count - 1)]
+                results[name][p] = low + (high - low) * (k - int(k))
+
+    return results
+
+#-------------------------------------------------------------------------
+
+# Returns deaths grouped by 'winner', 'loser', 'decade' or 'country'
+# Each row is (group, battles, victor deaths, vanquished deaths, total deaths),
+# the most deaths first, or with order 'battles' the most battles first
+def get_Deaths_By(grouping: str, limit: int | None = None, order: str = 'deaths') -> list[tuple]:
+
+    if order not in ('deaths', 'battles'):
+        raise ValueError(f"Can't order groups by '{order}'.")
+
+    values = []
+
+    if grouping == 'country':
+        # Each country is credited with the deaths of every battle it took part in
+        # The join rows come from participants.py, so countriesInvolved is never split here
+        query = f'''
+            SELECT co.name, COUNT(*) AS battles, TOTAL(b.totalVictorDeaths), TOTAL(b.totalVanquishedDeaths),
+                TOTAL(b.totalVictorDeaths) + TOTAL(b.totalVanquishedDeaths) AS deaths
+            FROM battle_countries bc
+            JOIN countries co ON co.id = bc.countryId
+            JOIN battles b ON b.id = bc.battleId
+            WHERE bc.role = 'involved'
+            GROUP BY bc.countryId
+            ORDER BY {order} DESC
+        '''
+    elif grouping in summary.GROUP_EXPRESSIONS:
+        # Already totalled by summary.py, and ordered by one of its indexes
+        # The ORDER BY must be written exactly like the index expression for SQLite to use it
+        order_Sql = "victorDeaths + vanquishedDeaths" if order == 'deaths' else "battles"
+        query = f'''
+            SELECT grp, battles, victorDeaths, vanquishedDeaths, victorDeaths + vanquishedDeaths
+            FROM battle_group_totals
+            WHERE grouping = ?
+            ORDER BY {order_Sql} DESC
+        '''
+        values.append(grouping)
+    else:
+        raise ValueError(f"Can't group deaths by '{grouping}'.")
+
+    if limit is not None:
+        query += " LIMIT ?"
+        values.append(limit)
+
+    with db.read_Connection() as reader, closing(reader.cursor()) as c:
+        c.execute(query, values)
+        return [(group, count, int(victor), int(vanquished), int(total))
+                for group, count, victor, vanquished, total in c.fetchall()]
+
+#-------------------------------------------------------------------------
+
+# Works the summary totals out again from scratch, in one transaction
+# Only needed if they were changed by hand or the triggers were dropped for a while
+def rebuild_Summary():
+    db.connect()
+
+    db.conn.execute("BEGIN IMMEDIATE")
+    try:
+        with closing(db.conn.cursor()) as c:
+            summary.rebuild_Summary(c)
+    except Exception:
+        db.conn.rollback()
+        raise
+    db.conn.commit()
+
+#-------------------------------------------------------------------------
+
+# Prints the casualty and force report for the menu
+def display_Analytics():
+
+    print("\n")
+    print(db.get_Centered_String("CASUALTY AND FORCE ANALYTICS"))
+    print("-" * db.TARGET_WIDTH)
+
+    totals = get_Casualty_Totals()
+
+    if not totals['battles']:
+        print("\nNo battles recorded.")
+        return
+
+    print(f"\nBattles Recorded: {totals['battles']:,}")
+    print(f"Total Forces: {totals['victorForces'] + totals['vanquishedForces']:,} "
+          f"(Victors {totals['victorForces']:,} / Vanquished {totals['vanquishedForces']:,})")
+    print(f"Total Deaths: {totals['totalDeaths']:,} "
+          f"(Victors {totals['totalVictorDeaths']:,} / Vanquished {totals['totalVanquishedDeaths']:,})")
+    print(f"Overall Casualty Rate: {totals['casualtyRate']:.1%}")
+    print(f"Average Casualty Rate Per Battle: Victors {totals['avgVictorCasualtyRate']:.1%} / "
+          f"Vanquished {totals['avgVanquishedCasualtyRate']:.1%}")
+    print(f"Vanquished Deaths Per Victor Death: {totals['exchangeRatio']:.2f}")
+
+    # Percentile table
+    row_Format = "{:<26}" + "{:>14}" * len(PERCENTILES)
+
+    print()
+    print("=" * db.TARGET_WIDTH)
+    print(row_Format.format("PERCENTILE", *(f"{p}th" for p in PERCENTILES)))
+    print("-" * db.TARGET_WIDTH)
+
+    # A column with no known values at all has no percentiles
+    for name, values in get_Force_Percentiles().items():
+        print(row_Format.format(name, *(f"{values[p]:,.0f}" if p in values else "-" for p in PERCENTILES)))
+
+    print("=" * db.TARGET_WIDTH)
+
+    print("\nGroup deaths by:\n")
+    print("1. Country")
+    print("2. Winner")
+    print("3. Loser")
+    print("4. Decade\n")
+
+    grouping = {'1': 'country', '2': 'winner', '3': 'loser', '4': 'decade'}.get(input("Enter number: ").strip())
+
+    if grouping is None:
+        print("\nInvalid option. Returning to menu.")
+        return
+
+    group_Format = "{:<50}{:>14}{:>20}{:>24}{:>20}"
+
+    print()
+    print("=" * db.TARGET_WIDTH)
+    print(group_Format.format(grouping.upper(), "BATTLES", "VICTOR DEATHS", "VANQUISHED DEATHS", "TOTAL DEATHS"))
+    print("-" * db.TARGET_WIDTH)
+
+    for group, count, victor, vanquished, total in get_Deaths_By(grouping):
+        print(group_Format.format(str(group), f"{count:,}", f"{victor:,}", f"{vanquished:,}", f"{total:,}"))
+
+    print("=" * db.TARGET_WIDTH)
+
+#-------------------------------------------------------------------------
+
+# Prints the overview for the menu
+# Every number comes from the summary tables or an index, so it shows straight away at any size
+def display_Overview():
+
+    print("\n")
+    print(db.get_Centered_String("BATTLE OVERVIEW"))
+    print("-" * db.TARGET_WIDTH)
+
+    totals = get_Casualty_Totals()
+
+    if not totals['battles']:
+        print("\nNo battles recorded.")
+        return
+
+    first_Date, last_Date = get_Date_Range()
+
+    print(f"\nBattles Recorded: {totals['battles']:,}")
+    print(f"Earliest Battle: {first_Date}")
+    print(f"Latest Battle: {last_Date}")
+    print(f"Total Forces: {totals['victorForces'] + totals['vanquishedForces']:,}")
+    print(f"Total Deaths: {totals['totalDeaths']:,} ({totals['casualtyRate']:.1%} of forces)")
+
+    group_Format = "{:<50}{:>14}{:>20}"
+
+    for title, grouping, order in (("MOST VICTORIES", 'winner', 'battles'),
+                                   ("MOST DEFEATS", 'loser', 'battles'),
+                                   ("DEADLIEST DECADES", 'decade', 'deaths')):
+        print()
+        print("=" * db.TARGET_WIDTH)
+        print(group_Format.format(title, "BATTLES", "TOTAL DEATHS"))
+        print("-" * db.TARGET_WIDTH)
+
+        for group, count, _, _, total in get_Deaths_By(grouping, OVERVIEW_LIMIT, order):
+            print(group_Format.format(str(group), f"{count:,}", f"{total:,}"))
+
+    print("=" * db.TARGET_WIDTH)
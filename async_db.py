@@ -0,0 +1,295 @@
+#! /usr/bin/env/ python3
+
+import asyncio
+import queue
+import threading
+from collections import deque
+from contextlib import closing
+from dataclasses import replace
+from typing import AsyncIterator
+
+import db
+from business import FIRST_ID, Battle
+
+# Most writes committed together in one transaction
+MAX_GROUP_SIZE = 1000
+
+#-------------------------------------------------------------------------
+
+# Hands a finished request's result (or error) to the waiting coroutine
+# Runs on the event loop, the request may have been cancelled in the meantime
+def set_Future(future: asyncio.Future, result=None, error: Exception | None = None):
+    if future.cancelled():
+        return
+
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+#-------------------------------------------------------------------------
+
+# The functions below run on the store's worker thread
+# Each one gets a cursor of the worker's connection followed by the request's arguments
+
+# Reads the page of battles that comes after the given id, in id order
+def read_Battles_Page(c, after_Id: int, limit: int) -> list[Battle]:
+    c.execute("SELECT " + db.BATTLE_COLUMNS + " FROM battles WHERE id > ? ORDER BY id LIMIT ?", (after_Id, limit))
+    return [db.row_To_Battle(row) for row in c.fetchall()]
+
+# Reads one battle by id, or None
+def read_Battle_By_Id(c, db_id: int) -> Battle | None:
+    c.execute("SELECT " + db.BATTLE_COLUMNS + " FROM battles WHERE id = ?", (db_id,))
+    row = c.fetchone()
+    return None if row is None else db.row_To_Battle(row)
+
+# Reads the first saved battle with the given name, or None
+def read_Battle_By_Name(c, name: str) -> Battle | None:
+    c.execute("SELECT " + db.BATTLE_COLUMNS + " FROM battles WHERE battleNameKey = ? ORDER BY id LIMIT 1",
+              (db.normalize_Name(name),))
+    row = c.fetchone()
+    return None if row is None else db.row_To_Battle(row)
+
+# Inserts one battle and its participants, and returns its new id
+def write_Insert(c, battle_obj: Battle) -> int:
+    c.execute(db.INSERT_SQL, db.get_Insert_Values(battle_obj))
+    battle_obj.db_id = c.lastrowid
+    db.sync_Derived_Rows(c, battle_obj)
+    return battle_obj.db_id
+
+# Rewrites every column and the participants of one battle, returns True if the row exists
+def write_Update(c, battle_obj: Battle) -> bool:
+    c.execute(db.UPDATE_SQL, db.get_Update_Values(battle_obj))
+    if c.rowcount == 0:
+        return False
+    db.sync_Derived_Rows(c, battle_obj)
+    return True
+
+# Deletes one battle, returns True if the row existed
+def write_Delete(c, db_id: int) -> bool:
+    c.execute("DELETE FROM battles WHERE id = ?", (db_id,))
+    return c.rowcount > 0
+
+#-------------------------------------------------------------------------
+
+# Asyncio front end for the battles table.
+# All SQLite work happens on one dedicated worker thread with its own connection, fed
+# by a request queue, so the event loop never blocks on the database.
+#
+# Writes from concurrent callers are grouped: when the worker picks up a write it also
+# takes every other write already waiting (up to max_Group_Size) and commits them all in
+# one transaction. Each write runs inside its own SAVEPOINT, so one failing write only
+# fails its own caller. Callers are answered once the shared commit has finished.
+#
+#     async with Async_Battle_Store() as store:
+#         await asyncio.gather(*(store.insert_Battle(b) for b in new_Battles))
+#         async for battle in store.iter_Battles():
+#             ...
+class Async_Battle_Store:
+
+    def __init__(self, max_Group_Size: int = MAX_GROUP_SIZE):
+        self.max_Group_Size = max_Group_Size
+        self.requests = queue.Queue()
+        self.thread = None
+
+        self.writes = 0
+        self.commits = 0
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_Type, exc_Value, traceback):
+        await self.close()
+
+    # Starts the worker thread
+    async def start(self):
+        if self.thread is not None:
+            return
+
+        self.thread = threading.Thread(target=self.run, name="battle-store", daemon=True)
+        self.thread.start()
+
+    # Lets the worker finish the requests already queued and waits for it to stop
+    async def close(self):
+        if self.thread is None:
+            return
+
+        self.requests.put(None)
+        await asyncio.to_thread(self.thread.join)
+        self.thread = None
+
+    # Queues one request for the worker and waits for its result
+    async def call(self, is_Write: bool, function, *args):
+        await self.start()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.requests.put((is_Write, function, args, future, loop))
+
+        return await future
+
+    # Answers one request from the worker thread
+    def answer(self, request: tuple, result=None, error: Exception | None = None):
+        future, loop = request[3], request[4]
+
+        try:
+            loop.call_soon_threadsafe(set_Future, future, result, error)
+        except RuntimeError:
+            pass # The caller's event loop has already been closed
+
+    #-------------------------------------------------------------------------
+
+    # Worker thread: serves requests until close() is called
+    def run(self):
+        try:
+            connection = db.open_Connection()
+            db.ensure_Schema(connection)
+        except Exception as e:
+            # Every request gets the error until close() is called
+            while (request := self.requests.get()) is not None:
+                self.answer(request, error=e)
+            return
+
+        # Transactions are started and committed by hand so writes can be grouped
+        connection.isolation_level = None
+
+        # Reads that arrived while a group of writes was being collected
+        held_Reads = deque()
+        stopping = False
+
+        try:
+            while not stopping or held_Reads:
+                if held_Reads:
+                    self.run_Read(connection, held_Reads.popleft())
+                    continue
+
+                request = self.requests.get()
+
+                if request is None:
+                    stopping = True
+                    continue
+
+                if not request[0]:
+                    self.run_Read(connection, request)
+                    continue
+
+                # Takes every other write already waiting so they share one commit
+                group = [request]
+
+                while len(group) < self.max_Group_Size:
+                    try:
+                        request = self.requests.get_nowait()
+                    except queue.Empty:
+                        break
+
+                    if request is None:
+                        stopping = True
+                        break
+                    elif request[0]:
+                        group.append(request)
+                    else:
+                        held_Reads.append(request)
+
+                self.run_Writes(connection, group)
+        finally:
+            connection.close()
+
+    # Runs one read request
+    def run_Read(self, connection, request: tuple):
+        _, function, args, _, _ = request
+
+        try:
+            with closing(connection.cursor()) as c:
+                # Plain tuples are cheaper to build than sqlite3.Row objects
+                c.row_factory = None
+                result = function(c, *args)
+        except Exception as e:
+            self.answer(request, error=e)
+        else:
+            self.answer(request, result)
+
+    # Runs a group of write requests in one transaction
+    def run_Writes(self, connection, group: list[tuple]):
+        results = []
+
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+
+            for request in group:
+                _, function, args, _, _ = request
+
+                connection.execute("SAVEPOINT request")
+                try:
+                    with closing(connection.cursor()) as c:
+                        results.append((request, function(c, *args), None))
+                except Exception as e:
+                    # Undoes just this write, the rest of the group still commits
+                    connection.execute("ROLLBACK TO request")
+                    results.append((request, None, e))
+                connection.execute("RELEASE request")
+
+            connection.execute("COMMIT")
+
+        except Exception as e:
+            # Nothing in the group was saved, so every caller gets the error
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            results = [(request, None, e) for request in group]
+
+        self.writes += len(group)
+        self.commits += 1
+
+        for request, result, error in results:
+            self.answer(request, result, error)
+
+    #-------------------------------------------------------------------------
+
+    # Streams every battle in id order, one page per request to the worker
+    async def iter_Battles(self, batch_Size: int = db.BATCH_SIZE) -> AsyncIterator[Battle]:
+        after_Id = FIRST_ID
+
+        while True:
+            page = await self.call(False, read_Battles_Page, after_Id, batch_Size)
+
+            for battle in page:
+                yield battle
+
+            if len(page) < batch_Size:
+                break
+
+            after_Id = page[-1].db_id
+
+    # Returns every battle as a list
+    async def get_All_Battles(self) -> list[Battle]:
+        return [battle async for battle in self.iter_Battles()]
+
+    # Returns the battle with the given id, or None
+    async def get_Battle_By_Id(self, db_id: int) -> Battle | None:
+        return await self.call(False, read_Battle_By_Id, db_id)
+
+    # Returns the first saved battle with the given name, or None
+    async def find_Battle_By_Name(self, name: str) -> Battle | None:
+        return await self.call(False, read_Battle_By_Name, name)
+
+    # Saves a new battle, sets its db_id and returns it
+    async def insert_Battle(self, battle_obj: Battle) -> int:
+        # The worker gets a copy so later changes to the object can't race it
+        battle_obj.db_id = await self.call(True, write_Insert, replace(battle_obj))
+        return battle_obj.db_id
+
+    # Saves every field of an existing battle, returns False if it has no row
+    async def update_Battle(self, battle_obj: Battle) -> bool:
+        if battle_obj.db_id is None:
+            return False
+        return await self.call(True, write_Update, replace(battle_obj))
+
+    # Deletes a battle's row, returns False if it had none
+    async def remove_Battle(self, battle_obj: Battle) -> bool:
+        if battle_obj.db_id is None:
+            return False
+        return await self.call(True, write_Delete, battle_obj.db_id)
+
+    # Average number of writes that shared each commit
+    def get_Writes_Per_Commit(self) -> float:
+        return self.writes / self.commits if self.commits else 0.0
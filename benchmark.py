@@ -0,0 +1,393 @@
+#! /usr/bin/env/ python3
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import closing, redirect_stdout
+from datetime import date, datetime, timedelta
+from typing import Iterator
+
+import db
+from business import Battle
+
+# resource only exists on Unix, elsewhere memory isn't reported
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Row counts the suite knows by name
+SIZES = {'10k': 10_000, '100k': 100_000, '1M': 1_000_000, '10M': 10_000_000}
+
+# Operations the suite can time, in the order they run
+OPERATIONS = ('get_All_Battles', 'iter_Battles', 'find_Battle_By_Name', 'sort_Battles',
+              'sort_Battles_Desc', 'display', 'insert_Battle', 'update_Battle', 'delete')
+
+# Rows generated and committed per transaction when building a dataset
+BUILD_BATCH_SIZE = 100_000
+
+# Pieces used to make up place and people names
+SYLLABLES = ('ag', 'in', 'court', 'ban', 'nock', 'burn', 'has', 'tings', 'poi', 'tiers', 'cre', 'cy',
+             'val', 'mont', 'ford', 'ton', 'ley', 'wick', 'bury', 'field', 'mar', 'sen', 'berg', 'dor')
+
+COUNTRIES = ('England', 'France', 'Scotland', 'Burgundy', 'Castile', 'Aragon', 'Portugal', 'Flanders',
+             'Holy Roman Empire', 'Duchy of Normandy', 'Kingdom of Bohemia', 'Papal States',
+             'Republic of Venice', 'Genoa', 'Denmark', 'Sweden', 'Poland', 'Hungary', 'Wales', 'Ireland')
+
+TITLES = ('King', 'Duke', 'Earl', 'Count', 'Sir', 'Lord', 'Prince', 'Marshal', 'Bishop', 'Captain')
+
+#-------------------------------------------------------------------------
+
+# Distinct place names and people drawn from when generating battles
+# Building them once keeps generation fast enough for tens of millions of rows
+PLACE_POOL_SIZE = 20_000
+PEOPLE_POOL_SIZE = 50_000
+
+# Makes a random capitalised name out of two to four syllables
+def get_Random_Word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+# Makes a comma separated list of people, most lists short and a few long
+def get_Random_People(rng: random.Random, people: list[str], average: float) -> str:
+    count = min(int(rng.expovariate(1 / average)), 25)
+    return ", ".join(rng.choices(people, k=count))
+
+#-------------------------------------------------------------------------
+
+# Generates synthetic battles that look like real records:
+# "Battle of" names, two or three countries, forces in the thousands and
+# free-text people lists whose lengths vary the way the real ones do
+def generate_Battles(rows: int, seed: int = 0) -> Iterator[Battle]:
+    rng = random.Random(seed)
+    start = date(800, 1, 1)
+
+    places = [get_Random_Word(rng) for _ in range(PLACE_POOL_SIZE)]
+    people = [f"{rng.choice(TITLES)} {get_Random_Word(rng)} of {get_Random_Word(rng)}"
+              for _ in range(PEOPLE_POOL_SIZE)]
+
+    for i in range(rows):
+        countries = rng.sample(COUNTRIES, rng.choice((2, 2, 2, 3)))
+        victor_Forces = int(rng.lognormvariate(9, 0.8))
+        vanquished_Forces = int(rng.lognormvariate(9, 0.8))
+
+        yield Battle(
+            # The number keeps names unique, like a real archive mostly is
+            battleName=f"Battle Of {rng.choice(places)} {i}",
+            date=start + timedelta(days=rng.randrange(365 * 1000)),
+            countriesInvolved=", ".join(countries),
+            winner=countries[0],
+            loser=countries[1],
+            victorForces=victor_Forces,
+            vanquishedForces=vanquished_Forces,
+            totalVictorDeaths=int(victor_Forces * rng.uniform(0, 0.3)),
+            totalVanquishedDeaths=int(vanquished_Forces * rng.uniform(0, 0.6)),
+            significantFiguresPresent=get_Random_People(rng, people, 6),
+            notableDeaths=get_Random_People(rng, people, 2)
+        )
+
+#-------------------------------------------------------------------------
+
+# Fills the configured database with generated battles, committing in batches
+def fill_Database(rows: int, seed: int = 0):
+    battles = generate_Battles(rows, seed)
+
+    while True:
+        batch = [battle for _, battle in zip(range(BUILD_BATCH_SIZE), battles)]
+        if not batch:
+            break
+        db.insert_Battles(batch)
+
+#-------------------------------------------------------------------------
+
+# Returns the peak resident memory of this process so far in KB, or None without resource
+# This is a high-water mark for the whole run, so it never goes down between operations
+def get_Max_RSS_KB() -> int | None:
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports KB
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+#-------------------------------------------------------------------------
+
+# Returns the given percentile of a list of latencies that is already sorted
+def get_Percentile(sorted_Values: list[float], percentile: float) -> float:
+    if not sorted_Values:
+        return 0.0
+    index = min(len(sorted_Values) - 1, int(round(percentile / 100 * (len(sorted_Values) - 1))))
+    return sorted_Values[index]
+
+#-------------------------------------------------------------------------
+
+# Turns timings into one result record
+# latencies are the seconds each single operation took, rows is how many rows were handled
+def get_Result(operation: str, size: int, seconds: float, rows: int, latencies: list[float] | None = None) -> dict:
+    result = {
+        'operation': operation,
+        'dataset_rows': size,
+        'rows': rows,
+        'seconds': round(seconds, 6),
+        'rows_per_sec': round(rows / seconds) if seconds else None,
+    }
+
+    if latencies:
+        latencies = sorted(latencies)
+        result.update({
+            'p50_ms': round(get_Percentile(latencies, 50) * 1000, 4),
+            'p90_ms': round(get_Percentile(latencies, 90) * 1000, 4),
+            'p99_ms': round(get_Percentile(latencies, 99) * 1000, 4),
+            'max_ms': round(latencies[-1] * 1000, 4),
+        })
+
+    return result
+
+# Runs fn and adds how much memory the process had used by the end to its result record.
+# max_rss_kb is the high-water mark of the whole run so far, not of this operation alone.
+# max_rss_growth_kb is how far this operation raised it, 0 if it stayed under an earlier peak
+def add_Memory(fn) -> dict:
+    before = get_Max_RSS_KB()
+    result = fn()
+    after = get_Max_RSS_KB()
+
+    result['max_rss_kb'] = after
+    result['max_rss_growth_kb'] = None if after is None else after - before
+    return result
+
+#-------------------------------------------------------------------------
+
+# Times fn once per item and returns the total time and each call's latency
+def time_Each(fn, items) -> tuple[float, list[float]]:
+    latencies = []
+    clock = time.perf_counter
+
+    for item in items:
+        start = clock()
+        fn(item)
+        latencies.append(clock() - start)
+
+    return sum(latencies), latencies
+
+#-------------------------------------------------------------------------
+
+# Times one operation against the configured database and returns its result record
+def run_Operation(operation: str, size: int, samples: int, rng: random.Random) -> dict:
+    clock = time.perf_counter
+
+    if operation == 'get_All_Battles':
+        start = clock()
+        battles = db.get_All_Battles()
+        seconds = clock() - start
+        rows = len(battles)
+        del battles
+        return get_Result(operation, size, seconds, rows)
+
+    if operation == 'iter_Battles':
+        start = clock()
+        rows = sum(1 for _ in db.iter_Battles())
+        return get_Result(operation, size, clock() - start, rows)
+
+    if operation in ('sort_Battles', 'sort_Battles_Desc'):
+        sort = db.sort_Battles if operation == 'sort_Battles' else db.sort_Battles_Desc
+        # The menu functions print every battle, which is part of what they cost
+        with open(os.devnull, 'w') as out, redirect_stdout(out):
+            start = clock()
+            sort()
+            return get_Result(operation, size, clock() - start, size)
+
+    if operation == 'display':
+        with open(os.devnull, 'wb') as out:
+            start = clock()
+            db.display_All_Battles(out=out)
+            return get_Result(operation, size, clock() - start, size)
+
+    # The rest work on a random sample of existing rows
+    ids = [rng.randint(1, size) for _ in range(samples)]
+
+    # look_Up_Battle asks for the name with input(), then does this lookup
+    if operation == 'find_Battle_By_Name':
+        names = [battle.battleName for battle in map(db.get_Battle_By_Id, ids) if battle]
+        # Starts cold so every lookup goes through the SQLite index
+        db.name_Index.clear()
+        seconds, latencies = time_Each(db.find_Battle_By_Name, names)
+        return get_Result(operation, size, seconds, len(names), latencies)
+
+    if operation == 'insert_Battle':
+        new_Battles = list(generate_Battles(samples, seed=rng.random()))
+        seconds, latencies = time_Each(db.insert_Battle, new_Battles)
+        return get_Result(operation, size, seconds, len(new_Battles), latencies)
+
+    battles = [battle for battle in map(db.get_Battle_By_Id, ids) if battle]
+
+    if operation == 'update_Battle':
+        def update(battle):
+            battle.victorForces += 1
+            db.update_Battle(battle)
+
+        seconds, latencies = time_Each(update, battles)
+        return get_Result(operation, size, seconds, len(battles), latencies)
+
+    if operation == 'delete':
+        # The same id can be drawn twice, it only needs deleting once
+        unique = list({battle.db_id: battle for battle in battles}.values())
+        seconds, latencies = time_Each(db.remove_Battle, unique)
+        return get_Result(operation, size, seconds, len(unique), latencies)
+
+    raise ValueError(f"Unknown operation '{operation}'.")
+
+#-------------------------------------------------------------------------
+
+# Builds a dataset of the given size in folder and times every operation against it
+def run_Size(size: int, folder: str, operations, samples: int, seed: int, report=print) -> list[dict]:
+    path = os.path.join(folder, f"bench_{size}.sqlite")
+    db.configure(path)
+
+    results = []
+
+    if db.count_Battles() != size:
+        db.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+        report(f"Generating {size:,} battles...")
+
+        def generate():
+            start = time.perf_counter()
+            fill_Database(size, seed)
+            return get_Result('generate', size, time.perf_counter() - start, size)
+
+        results.append(add_Memory(generate))
+
+    rng = random.Random(seed)
+
+    for operation in operations:
+        report(f"Timing {operation} on {size:,} rows...")
+        results.append(add_Memory(lambda: run_Operation(operation, size, samples, rng)))
+
+    db.close()
+    return results
+
+#-------------------------------------------------------------------------
+
+# The row decoder get_All_Battles used before rows were read by position,
+# kept here so the benchmark can compare against it
+def legacy_Row_To_Battle(row) -> Battle:
+    return Battle(
+        battleName=row['battleName'],
+        date=datetime.strptime(row['date'], '%Y-%m-%d').date(),
+        countriesInvolved=row['countriesInvolved'],
+        winner=row['winner'],
+        loser=row['loser'],
+        victorForces=int(row["victorForces"]),
+        vanquishedForces=int(row['vanquishedForces']),
+        totalVictorDeaths=int(row['totalVictorDeaths']),
+        totalVanquishedDeaths=int(row['totalVanquishedDeaths']),
+        significantFiguresPresent=row['significantFiguresPresent'],
+        notableDeaths=row['notableDeaths'],
+        db_id=row['id']
+    )
+
+#-------------------------------------------------------------------------
+
+# Times reading every row with the legacy decoder and with db.iter_Battles
+# Returns rows/sec for both
+def bench_Row_Decoding(rows: int = 200000) -> dict:
+
+    with tempfile.TemporaryDirectory() as folder:
+        db.configure(os.path.join(folder, "bench.sqlite"))
+        fill_Database(rows)
+
+        # The original loader: sqlite3.Row, fetchall, strptime and name lookups
+        with closing(sqlite3.connect(db.DB_FILE)) as legacy_Conn:
+            legacy_Conn.row_factory = sqlite3.Row
+            start = time.perf_counter()
+            rows_Read = legacy_Conn.execute("SELECT * FROM battles").fetchall()
+            legacy = [legacy_Row_To_Battle(row) for row in rows_Read]
+            legacy_Seconds = time.perf_counter() - start
+
+        db.parse_Iso_Date.cache_clear()
+        db.convert_Iso_Date.cache_clear()
+
+        start = time.perf_counter()
+        current = list(db.iter_Battles())
+        current_Seconds = time.perf_counter() - start
+
+        db.close()
+
+    assert legacy == current
+
+    return {
+        'benchmark': 'row_decoding',
+        'rows': rows,
+        'legacy_rows_per_sec': round(rows / legacy_Seconds),
+        'current_rows_per_sec': round(rows / current_Seconds),
+        'speedup': round(legacy_Seconds / current_Seconds, 2),
+    }
+
+#-------------------------------------------------------------------------
+
+# Converts '10k', '1M' or a plain number into a row count
+def parse_Size(text: str) -> int:
+    if text in SIZES:
+        return SIZES[text]
+    return int(text)
+
+#-------------------------------------------------------------------------
+
+# Runs the suite and writes one JSON document with every result
+# Example: python benchmark.py --sizes 10k,1M --output results.json
+def main(argv: list[str] | None = None):
+
+    parser = argparse.ArgumentParser(description="Benchmark the battle database on generated data.")
+    parser.add_argument('--sizes', default='10k', help="comma separated row counts, e.g. 10k,1M,10M")
+    parser.add_argument('--operations', default=",".join(OPERATIONS), help="comma separated operations to time")
+    parser.add_argument('--samples', type=int, default=1000, help="single-row operations timed per size")
+    parser.add_argument('--seed', type=int, default=0, help="random seed for the generated data")
+    parser.add_argument('--folder', help="keep generated databases here and reuse them on later runs")
+    parser.add_argument('--output', help="write the JSON results to this file instead of stdout")
+    parser.add_argument('--compare-decoder', type=int, metavar='ROWS',
+                        help="only compare the old and new row decoders on ROWS rows")
+
+    args = parser.parse_args(argv)
+
+    # Progress goes to stderr so stdout stays valid JSON
+    def report(message):
+        print(message, file=sys.stderr)
+
+    if args.compare_decoder:
+        output = bench_Row_Decoding(args.compare_decoder)
+    else:
+        operations = [op for op in args.operations.split(",") if op]
+        sizes = [parse_Size(size) for size in args.sizes.split(",")]
+
+        results = []
+        with tempfile.TemporaryDirectory() as temp_Folder:
+            folder = args.folder or temp_Folder
+            os.makedirs(folder, exist_ok=True)
+            for size in sizes:
+                results.extend(run_Size(size, folder, operations, args.samples, args.seed, report))
+
+        output = {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'results': results,
+        }
+
+    text = json.dumps(output, indent=2)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,51 @@
 #! /usr/bin/env/ python3
 
-from dataclasses import dataclass
+import sys
+from array import array
+from dataclasses import dataclass, field
 from datetime import date
 
-@dataclass
+# Field names in the same order as the columns of the battles table
+BATTLE_FIELDS = (
+    'battleName', 'date', 'countriesInvolved', 'winner', 'loser',
+    'victorForces', 'vanquishedForces', 'totalVictorDeaths',
+    'totalVanquishedDeaths', 'significantFiguresPresent', 'notableDeaths'
+)
+
+INT_FIELDS = ('victorForces', 'vanquishedForces', 'totalVictorDeaths', 'totalVanquishedDeaths')
+
+TEXT_FIELDS = ('battleName', 'countriesInvolved', 'winner', 'loser', 'significantFiguresPresent', 'notableDeaths')
+
+# Lower than any id SQLite hands out, so paging through ids with "id > ?" starts here
+FIRST_ID = -(2 ** 63)
+
+# Converts a battle, country or person name into the form used for lookups
+# Extra spaces are removed and case is ignored, so "the  somme" matches "The Somme"
+def normalize_Name(name: str) -> str:
+    return " ".join((name or "").split()).casefold()
+
+# Returns the date a battle's anniversary falls on in the given year
+# A battle fought on 29 February is remembered on the 28th in other years
+def get_Anniversary(battle_Date: date, year: int) -> date:
+    if battle_Date.month == 2 and battle_Date.day == 29 and not is_Leap_Year(year):
+        return date(year, 2, 28)
+    return battle_Date.replace(year=year)
+
+def is_Leap_Year(year: int) -> bool:
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+# Returns the whole calendar years and the days left over from battle_Date to today
+# A year only counts once its anniversary has been reached, the way ages are counted
+def get_Elapsed(battle_Date: date, today: date) -> tuple[int, int]:
+    if today < get_Anniversary(battle_Date, today.year):
+        years = today.year - battle_Date.year - 1
+    else:
+        years = today.year - battle_Date.year
+
+    return years, (today - get_Anniversary(battle_Date, battle_Date.year + years)).days
+
+# slots=True drops the per-object __dict__, which matters when millions of battles are loaded
+@dataclass(slots=True)
 class Battle:
     battleName: str
     date: date
@@ -16,7 +58,126 @@ class Battle:
     totalVanquishedDeaths: int
     significantFiguresPresent: str
     notableDeaths: str
+    # Primary key of the battle's row, None until it is saved
+    db_id: int | None = field(default=None, compare=False)
+    # Snapshot taken by mark_Clean()
+    _clean_Values: tuple | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def total_Deaths(self) -> int:
+        return self.totalVictorDeaths + self.totalVanquishedDeaths
+
+    # Remembers the current values so later changes can be found with get_Dirty_Fields()
+    def mark_Clean(self):
+        self._clean_Values = tuple(getattr(self, name) for name in BATTLE_FIELDS)
+
+    # Returns the names of the fields changed since mark_Clean() was last called
+    # Every field counts as changed if mark_Clean() was never called
+    def get_Dirty_Fields(self) -> list[str]:
+        if self._clean_Values is None:
+            return list(BATTLE_FIELDS)
+
+        return [name for name, old_Value in zip(BATTLE_FIELDS, self._clean_Values)
+                if getattr(self, name) != old_Value]
+
+    # Puts every field back to the value it had when mark_Clean() was last called
+    def revert(self):
+        if self._clean_Values is None:
+            return
+
+        for name, old_Value in zip(BATTLE_FIELDS, self._clean_Values):
+            setattr(self, name, old_Value)
+
+    # Returns the value a field had when mark_Clean() was last called
+    def get_Clean_Value(self, name: str):
+        return self._clean_Values[BATTLE_FIELDS.index(name)]
+
+#-------------------------------------------------------------------------
+
+# Read-only view of one battle inside a Battle_Columns collection
+# Has the same attributes as Battle but stores nothing except where to find them
+class Battle_View:
+    __slots__ = ('_columns', '_index')
+
+    def __init__(self, columns, index: int):
+        self._columns = columns
+        self._index = index
+
+    @property
+    def db_id(self) -> int | None:
+        db_id = self._columns.db_ids[self._index]
+        # -1 stands in for battles that were never saved
+        return None if db_id < 0 else db_id
+
+    @property
+    def date(self) -> date | None:
+        ordinal = self._columns.dates[self._index]
+        # 0 stands in for a missing date (ordinals start at 1)
+        return date.fromordinal(ordinal) if ordinal > 0 else None
 
     @property
     def total_Deaths(self) -> int:
         return self.totalVictorDeaths + self.totalVanquishedDeaths
+
+    # Copies the battle out into a normal, editable Battle object
+    def to_Battle(self) -> Battle:
+        return Battle(*(getattr(self, name) for name in BATTLE_FIELDS), db_id=self.db_id)
+
+    def __repr__(self):
+        return f"Battle_View({self.battleName!r}, {self.date!s})"
+
+# Creates a property that reads one column of the view's collection
+def get_Column_Property(name: str) -> property:
+    return property(lambda view: getattr(view._columns, name)[view._index])
+
+for name in INT_FIELDS + TEXT_FIELDS:
+    setattr(Battle_View, name, get_Column_Property(name))
+
+#-------------------------------------------------------------------------
+
+# Column-oriented store of battles for read-heavy work.
+# Integers and dates (as ordinals) live in compact arrays and repeated strings
+# such as country names are interned so each one is only stored once.
+# Indexing and iterating give Battle_View objects with the same attributes as Battle
+class Battle_Columns:
+
+    def __init__(self, battles=()):
+        self.db_ids = array('q')
+        self.dates = array('l')
+
+        for name in INT_FIELDS:
+            setattr(self, name, array('q'))
+
+        for name in TEXT_FIELDS:
+            setattr(self, name, [])
+
+        for battle in battles:
+            self.append(battle)
+
+    # Adds a copy of the battle's values to the end of every column
+    def append(self, battle):
+        self.db_ids.append(-1 if battle.db_id is None else battle.db_id)
+        self.dates.append(0 if battle.date is None else battle.date.toordinal())
+
+        # Arrays can't hold None, so a missing number is stored as 0 like in snapshot.py
+        for name in INT_FIELDS:
+            getattr(self, name).append(getattr(battle, name) or 0)
+
+        for name in TEXT_FIELDS:
+            getattr(self, name).append(sys.intern(getattr(battle, name) or ''))
+
+    def __len__(self) -> int:
+        return len(self.db_ids)
+
+    def __getitem__(self, index: int) -> Battle_View:
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError("Battle_Columns index out of range")
+
+        return Battle_View(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield Battle_View(self, index)
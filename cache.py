@@ -0,0 +1,107 @@
+#! /usr/bin/env/ python3
+
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Callable, Iterable
+
+from business import Battle
+
+# Most battles kept in memory at once
+CACHE_SIZE = 4096
+
+# Most ids loaded by one call to the load function (kept well under SQLite's variable limit)
+LOAD_CHUNK_SIZE = 500
+
+#-------------------------------------------------------------------------
+
+# Read-through LRU cache of Battle objects keyed by db_id.
+# The cache doesn't talk to the database itself. load is called with a list of ids
+# and returns the Battles among them that still exist. db.py owns the cache and
+# tells it which ids were changed, either by this program or by another one.
+#
+# Callers always get a copy, so editing a battle that isn't saved in the end
+# never leaks into the cached one
+class Battle_Cache:
+
+    def __init__(self, load: Callable[[list[int]], list[Battle]], max_Size: int = CACHE_SIZE):
+        self.load = load
+        self.max_Size = max_Size
+        self.battles = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.refreshed = 0
+
+    def __len__(self) -> int:
+        return len(self.battles)
+
+    def __contains__(self, db_id: int) -> bool:
+        return db_id in self.battles
+
+    # Returns the battle with the given id, loading it on a miss, or None if there is no such row
+    def get(self, db_id: int) -> Battle | None:
+        battle = self.battles.get(db_id)
+
+        if battle is None:
+            self.misses += 1
+            found = self.load([db_id])
+            if not found:
+                return None
+            battle = found[0]
+            self.put(battle)
+        else:
+            self.hits += 1
+            # Most recently used battles go to the end, so the oldest are evicted first
+            self.battles.move_to_end(db_id)
+
+        return replace(battle)
+
+    # Stores a copy of a saved battle, evicting the least recently used ones over max_Size
+    def put(self, battle: Battle):
+        if battle.db_id is None:
+            return
+
+        self.battles[battle.db_id] = replace(battle)
+        self.battles.move_to_end(battle.db_id)
+
+        while len(self.battles) > self.max_Size:
+            self.battles.popitem(last=False)
+
+    # Forgets one battle, for example after it was changed or deleted
+    def discard(self, db_id: int):
+        self.battles.pop(db_id, None)
+
+    # Reloads the cached battles among the given ids, dropping any that were deleted
+    # Ids that aren't cached are ignored. Returns the number of battles reloaded
+    def refresh(self, db_ids: Iterable[int]) -> int:
+        stale_Ids = [db_id for db_id in set(db_ids) if db_id in self.battles]
+
+        for start in range(0, len(stale_Ids), LOAD_CHUNK_SIZE):
+            chunk = stale_Ids[start:start + LOAD_CHUNK_SIZE]
+            found = {battle.db_id: battle for battle in self.load(chunk)}
+
+            for db_id in chunk:
+                if db_id in found:
+                    # Replaced in place so a refresh doesn't count as a use
+                    self.battles[db_id] = found[db_id]
+                else:
+                    del self.battles[db_id]
+
+        self.refreshed += len(stale_Ids)
+        return len(stale_Ids)
+
+    # Empties the cache
+    def clear(self):
+        self.battles.clear()
+
+    # Returns the hit and miss counts and the current size
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.battles),
+            'max_Size': self.max_Size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_Rate': self.hits / lookups if lookups else 0.0,
+            'refreshed': self.refreshed,
+        }
@@ -0,0 +1,433 @@
+#! /usr/bin/env/ python3
+
+import argparse
+import os
+import sys
+
+import db
+
+# Non-interactive entry point for scripts and load tests
+# Each call opens the database, runs one command and exits, without the welcome screen or menu.
+# Modules only some commands need are imported inside those commands to keep startup short.
+#
+#     python cli.py list --order desc --limit 10 --format jsonl
+#     python cli.py get "Agincourt"
+#     python cli.py add --name "Poitiers" --date 1356-09-19 --winner England --loser France
+#     python cli.py import battles.csv --resume --workers 4
+#     python cli.py export battles.jsonl
+#     python cli.py export-shards exports/ --format columnar --compression gzip
+#     python cli.py stats --format json
+#     python cli.py migrate --dry-run
+#     python cli.py rebuild-summary
+#     python cli.py anniversaries --days 7
+#     python cli.py ages --bucket 50 --format json
+#     python cli.py snapshot --check || python cli.py snapshot
+
+# Output formats shared by the commands that print battles
+RECORD_FORMATS = ('table', 'jsonl', 'csv')
+
+#-------------------------------------------------------------------------
+
+# Converts a Battle into a plain dictionary of JSON-friendly values
+def battle_To_Record(battle) -> dict:
+    from business import BATTLE_FIELDS
+
+    record = {'id': battle.db_id}
+    for name in BATTLE_FIELDS:
+        record[name] = getattr(battle, name)
+    record['date'] = battle.date.isoformat() if battle.date is not None else None
+
+    return record
+
+#-------------------------------------------------------------------------
+
+# Writes battles to out as a table, JSON Lines or CSV, and returns how many were written
+def write_Battles(battles, out, record_Format: str, width: int = db.TARGET_WIDTH) -> int:
+
+    if record_Format == 'table':
+        import render
+        return render.Battle_Renderer(width, out).render(battles)
+
+    count = 0
+
+    if record_Format == 'jsonl':
+        import json
+        for count, battle in enumerate(battles, 1):
+            out.write(json.dumps(battle_To_Record(battle), ensure_ascii=False) + "\n")
+
+    elif record_Format == 'csv':
+        import csv
+        from business import BATTLE_FIELDS
+
+        writer = csv.DictWriter(out, fieldnames=('id',) + BATTLE_FIELDS, lineterminator="\n")
+        writer.writeheader()
+        for count, battle in enumerate(battles, 1):
+            writer.writerow(battle_To_Record(battle))
+
+    else:
+        raise ValueError(f"Unknown output format '{record_Format}'.")
+
+    return count
+
+#-------------------------------------------------------------------------
+
+# list: prints battles in id or date order
+def run_List(args) -> int:
+    from itertools import islice
+
+    if args.order == 'id':
+        battles = db.iter_Battles()
+    else:
+        battles = db.iter_Battles_By_Date(descending=args.order == 'desc')
+
+    if args.limit is not None:
+        battles = islice(battles, args.limit)
+
+    write_Battles(battles, sys.stdout, args.format, args.width)
+    return 0
+
+#-------------------------------------------------------------------------
+
+# get: prints one battle found by name or id
+def run_Get(args) -> int:
+
+    if args.id is not None:
+        battle = db.get_Battle_By_Id(args.id)
+    elif args.name:
+        battle = db.find_Battle_By_Name(args.name)
+    else:
+        print("get: give a battle name or --id.", file=sys.stderr)
+        return 2
+
+    if battle is None:
+        print(f"Battle '{args.name if args.id is None else args.id}' not found.", file=sys.stderr)
+
+        if args.id is None:
+            suggestions = db.suggest_Battle_Names(args.name)
+            if suggestions:
+                print("Did you mean: " + ", ".join(name for _, _, name in suggestions) + "?", file=sys.stderr)
+        return 1
+
+    write_Battles([battle], sys.stdout, args.format, args.width)
+    return 0
+
+#-------------------------------------------------------------------------
+
+# add: validates and saves one battle, then prints its new id
+# The fields come from options or from one JSON object given with --json
+def run_Add(args) -> int:
+    import json
+    import validation
+
+    if args.json:
+        try:
+            record = json.loads(args.json)
+        except ValueError as e:
+            print(f"add: --json is not valid JSON ({e}).", file=sys.stderr)
+            return 2
+    else:
+        record = {
+            'battleName': args.name, 'date': args.date, 'countriesInvolved': args.countries,
+            'winner': args.winner, 'loser': args.loser,
+            'victorForces': args.victor_forces, 'vanquishedForces': args.vanquished_forces,
+            'totalVictorDeaths': args.victor_deaths, 'totalVanquishedDeaths': args.vanquished_deaths,
+            'significantFiguresPresent': args.figures, 'notableDeaths': args.notable_deaths,
+        }
+
+    try:
+        battle = validation.record_To_Battle(record)
+    except ValueError as e:
+        print(f"add: {e}", file=sys.stderr)
+        return 1
+
+    db.insert_Battle(battle)
+    print(battle.db_id)
+    return 0
+
+#-------------------------------------------------------------------------
+
+# import: bulk loads a CSV or JSON Lines file, progress goes to stderr
+def run_Import(args) -> int:
+    import importer
+
+    try:
+        importer.import_Battles(args.path, args.format, args.batch_size or importer.IMPORT_BATCH_SIZE,
+                                args.resume, args.skip_invalid,
+                                report=lambda message: print(message, file=sys.stderr),
+                                workers=args.workers or 1)
+    except (OSError, ValueError) as e:
+        print(f"Import failed: {e}", file=sys.stderr)
+        return 1
+
+    return 0
+
+#-------------------------------------------------------------------------
+
+# export: writes every battle to a file, or to stdout when no path is given
+def run_Export(args) -> int:
+
+    if args.path in (None, '-'):
+        write_Battles(db.iter_Battles(), sys.stdout, args.format)
+        return 0
+
+    try:
+        with open(args.path, 'w', newline='', encoding='utf-8') as out:
+            count = write_Battles(db.iter_Battles(), out, args.format)
+    except OSError as e:
+        print(f"Export failed: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Exported {count:,} battles to {args.path}.", file=sys.stderr)
+    return 0
+
+#-------------------------------------------------------------------------
+
+# export-shards: writes every battle into a folder of shard files from a pool of processes
+def run_Export_Shards(args) -> int:
+    import export
+
+    try:
+        export.export_Battles(args.folder, args.format, args.compression, args.workers, args.shards,
+                              report=lambda message: print(message, file=sys.stderr))
+    except (OSError, ValueError) as e:
+        print(f"Export failed: {e}", file=sys.stderr)
+        return 1
+
+    return 0
+
+#-------------------------------------------------------------------------
+
+# stats: prints the battle count, date range and casualty totals
+def run_Stats(args) -> int:
+    import analytics
+
+    stats = analytics.get_Casualty_Totals()
+    stats['firstDate'], stats['lastDate'] = analytics.get_Date_Range()
+
+    if args.format == 'json':
+        import json
+        print(json.dumps(stats, indent=2))
+    else:
+        for name, value in stats.items():
+            if isinstance(value, float):
+                value = f"{value:,.4f}"
+            elif isinstance(value, int):
+                value = f"{value:,}"
+            print(f"{name}: {value}")
+
+    return 0
+
+#-------------------------------------------------------------------------
+
+# migrate: upgrades the database schema, or with --dry-run estimates how long that would take
+def run_Migrate(args) -> int:
+    import sqlite3
+    import migrations
+
+    try:
+        migrations.run_Migrations(args.dry_run, args.batch_size or migrations.MIGRATION_BATCH_SIZE,
+                                  report=lambda message: print(message, file=sys.stderr))
+    except (OSError, sqlite3.Error) as e:
+        print(f"Migration failed: {e}", file=sys.stderr)
+        return 1
+
+    return 0
+
+#-------------------------------------------------------------------------
+
+# rebuild-summary: works the totals behind stats and the overview out again from the battles
+def run_Rebuild_Summary(args) -> int:
+    import analytics
+
+    analytics.rebuild_Summary()
+    print("Summary rebuilt.", file=sys.stderr)
+    return 0
+
+#-------------------------------------------------------------------------
+
+# anniversaries: prints the battles whose anniversary falls in the next few days
+def run_Anniversaries(args) -> int:
+    import elapsed
+
+    for anniversary, years, battle in elapsed.get_Upcoming_Anniversaries(args.days, args.today):
+        if args.format == 'jsonl':
+            import json
+            record = {'anniversary': anniversary.isoformat(), 'years': years}
+            record.update(battle_To_Record(battle))
+            print(json.dumps(record, ensure_ascii=False))
+        else:
+            print(f"{anniversary.isoformat()}  {years:>5} years  {battle.battleName}")
+
+    return 0
+
+# ages: counts battles by how many years ago they were fought
+def run_Ages(args) -> int:
+    import elapsed
+
+    _, years, _ = elapsed.get_All_Elapsed(args.today)
+    buckets = elapsed.get_Age_Buckets(years, args.bucket)
+
+    # Battles without a date have no age, so they are counted on their own
+    undated = elapsed.count_Undated()
+
+    if args.format == 'json':
+        import json
+        entries = [{'years': first, 'battles': count} for first, count in buckets]
+        if undated:
+            entries.append({'years': None, 'battles': undated})
+        print(json.dumps(entries, indent=2))
+    else:
+        for first, count in buckets:
+            print(f"{first}-{first + args.bucket - 1} years: {count:,}")
+        if undated:
+            print(f"No date: {undated:,}")
+
+    return 0
+
+#-------------------------------------------------------------------------
+
+# snapshot: writes a read-only snapshot of every battle for the menu (BATTLE_SNAPSHOT)
+# With --check nothing is written, the exit status says whether the snapshot is still current
+def run_Snapshot(args) -> int:
+    import snapshot
+
+    path = args.path or snapshot.get_Default_Path()
+
+    if args.check:
+        if not os.path.exists(path):
+            print(f"{path}: missing", file=sys.stderr)
+            return 1
+
+        try:
+            with snapshot.Battle_Snapshot(path) as battles:
+                is_Current = snapshot.is_Current(battles)
+        except ValueError as e:
+            print(f"{path}: {e!s}", file=sys.stderr)
+            return 1
+
+        print(f"{path}: {'current' if is_Current else 'out of date'}", file=sys.stderr)
+        return 0 if is_Current else 1
+
+    rows = snapshot.write_Snapshot(path)
+    print(f"Wrote {rows:,} battles to {path}.", file=sys.stderr)
+    return 0
+
+#-------------------------------------------------------------------------
+
+# argparse type for YYYY-MM-DD options, a bad date becomes a usage error instead of a traceback
+def get_Date_Argument(value: str):
+    try:
+        return db.parse_Date(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a date in YYYY-MM-DD format")
+
+# Builds the argument parser with one subparser per command
+def get_Parser() -> argparse.ArgumentParser:
+
+    parser = argparse.ArgumentParser(description="Run one battle database command and exit.")
+    parser.add_argument('--db', help=f"database file (default: {db.DB_FILE})")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    list_Parser = commands.add_parser('list', help="print battles")
+    list_Parser.add_argument('--order', choices=['id', 'asc', 'desc'], default='id',
+                             help="id order, or by date oldest (asc) or newest (desc) first")
+    list_Parser.add_argument('--limit', type=int, help="print at most this many battles")
+    list_Parser.add_argument('--format', choices=RECORD_FORMATS, default='table')
+    list_Parser.add_argument('--width', type=int, default=db.TARGET_WIDTH, help="table width")
+    list_Parser.set_defaults(run=run_List)
+
+    get_Battle_Parser = commands.add_parser('get', help="print one battle by name or id")
+    get_Battle_Parser.add_argument('name', nargs='?', help="battle name (case and extra spaces are ignored)")
+    get_Battle_Parser.add_argument('--id', type=int, help="battle id instead of a name")
+    get_Battle_Parser.add_argument('--format', choices=RECORD_FORMATS, default='table')
+    get_Battle_Parser.add_argument('--width', type=int, default=db.TARGET_WIDTH, help="table width")
+    get_Battle_Parser.set_defaults(run=run_Get)
+
+    add_Parser = commands.add_parser('add', help="save a new battle and print its id")
+    add_Parser.add_argument('--json', help="the whole battle as one JSON object, instead of the options below")
+    add_Parser.add_argument('--name')
+    add_Parser.add_argument('--date', help="YYYY-MM-DD")
+    add_Parser.add_argument('--countries', default='')
+    add_Parser.add_argument('--winner', default='')
+    add_Parser.add_argument('--loser', default='')
+    add_Parser.add_argument('--victor-forces', default=0)
+    add_Parser.add_argument('--vanquished-forces', default=0)
+    add_Parser.add_argument('--victor-deaths', default=0)
+    add_Parser.add_argument('--vanquished-deaths', default=0)
+    add_Parser.add_argument('--figures', default='', help="significant figures present")
+    add_Parser.add_argument('--notable-deaths', default='')
+    add_Parser.set_defaults(run=run_Add)
+
+    import_Parser = commands.add_parser('import', help="bulk import a CSV or JSON Lines file")
+    import_Parser.add_argument('path')
+    import_Parser.add_argument('--format', choices=['csv', 'jsonl'], help="file format (default: from the extension)")
+    import_Parser.add_argument('--batch-size', type=int, help="rows per transaction (default: 5000)")
+    import_Parser.add_argument('--resume', action='store_true', help="continue a previous import that failed")
+    import_Parser.add_argument('--skip-invalid', action='store_true', help="skip bad records instead of stopping")
+    import_Parser.add_argument('--workers', type=int, help="processes validating records (default: 1)")
+    import_Parser.set_defaults(run=run_Import)
+
+    export_Parser = commands.add_parser('export', help="write every battle to a file or stdout")
+    export_Parser.add_argument('path', nargs='?', help="output file (default: stdout)")
+    export_Parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl')
+    export_Parser.set_defaults(run=run_Export)
+
+    shards_Parser = commands.add_parser('export-shards', help="export into a folder of shards written in parallel")
+    shards_Parser.add_argument('folder', help="folder the shards and manifest.json are written to")
+    shards_Parser.add_argument('--format', choices=['csv', 'jsonl', 'columnar', 'parquet'], default='jsonl',
+                               help="parquet needs pyarrow")
+    shards_Parser.add_argument('--compression', default='none', help="none, gzip, bz2 or xz")
+    shards_Parser.add_argument('--workers', type=int, help="worker processes (default: one per core)")
+    shards_Parser.add_argument('--shards', type=int, help="number of shard files (default: one per worker)")
+    shards_Parser.set_defaults(run=run_Export_Shards)
+
+    stats_Parser = commands.add_parser('stats', help="print counts, date range and casualty totals")
+    stats_Parser.add_argument('--format', choices=['text', 'json'], default='text')
+    stats_Parser.set_defaults(run=run_Stats)
+
+    migrate_Parser = commands.add_parser('migrate', help="upgrade the database to the latest schema version")
+    migrate_Parser.add_argument('--dry-run', action='store_true', help="only estimate how long each pending migration takes")
+    migrate_Parser.add_argument('--batch-size', type=int, help="rows per backfill transaction (default: 5000)")
+    migrate_Parser.set_defaults(run=run_Migrate)
+
+    rebuild_Parser = commands.add_parser('rebuild-summary', help="recompute the summary totals from scratch")
+    rebuild_Parser.set_defaults(run=run_Rebuild_Summary)
+
+    anniversaries_Parser = commands.add_parser('anniversaries', help="print battles with an anniversary coming up")
+    anniversaries_Parser.add_argument('--days', type=int, default=30, help="days ahead to look, today included (default: 30)")
+    anniversaries_Parser.add_argument('--today', type=get_Date_Argument, help="count from this YYYY-MM-DD instead of today")
+    anniversaries_Parser.add_argument('--format', choices=['text', 'jsonl'], default='text')
+    anniversaries_Parser.set_defaults(run=run_Anniversaries)
+
+    ages_Parser = commands.add_parser('ages', help="count battles by years since they were fought")
+    ages_Parser.add_argument('--bucket', type=int, default=100, help="years per bucket (default: 100)")
+    ages_Parser.add_argument('--today', type=get_Date_Argument, help="count from this YYYY-MM-DD instead of today")
+    ages_Parser.add_argument('--format', choices=['text', 'json'], default='text')
+    ages_Parser.set_defaults(run=run_Ages)
+
+    snapshot_Parser = commands.add_parser('snapshot', help="write a memory-mapped snapshot for fast read-only startup")
+    snapshot_Parser.add_argument('path', nargs='?', help="snapshot file (default: next to the database)")
+    snapshot_Parser.add_argument('--check', action='store_true', help="only report whether the snapshot is current")
+    snapshot_Parser.set_defaults(run=run_Snapshot)
+
+    return parser
+
+#-------------------------------------------------------------------------
+
+def main(argv: list[str] | None = None) -> int:
+    args = get_Parser().parse_args(argv)
+
+    if args.db:
+        db.configure(args.db)
+
+    try:
+        return args.run(args)
+    except BrokenPipeError:
+        # The reader went away, for example `cli.py list | head`
+        sys.stderr.close()
+        return 1
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
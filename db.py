@@ -1,46 +1,244 @@
 #! /usr/bin/env/ python3
 
+import os
 import sqlite3
-from contextlib import closing
-
-from business import Battle
+import sys
+from contextlib import closing, contextmanager
+from functools import lru_cache
+from itertools import chain
+from typing import Iterable, Iterator
+
+# render is only needed by the display paths, so it is imported inside the functions
+# that use it and one-shot cli commands start faster
+import cache
+import instrument
+import migrations
+import participants
+import trigrams
+from business import FIRST_ID, Battle, Battle_Columns, get_Elapsed, normalize_Name
+from validation import TITLE_FIELDS, Negative_Value_Error, parse_Date, parse_Valid_Int, to_Title
 from datetime import date,datetime
 
 # Global constant for formating
 TARGET_WIDTH = 226
 
+# Database file and connection settings, changed with configure()
+DB_FILE = "Final.sqlite"
+
+# Seconds a connection waits for a lock before giving up with "database is locked"
+BUSY_TIMEOUT = 30
+
+# PRAGMAs applied to every connection
+# WAL lets readers keep working while the writer commits, and synchronous=NORMAL
+# only syncs at checkpoints instead of on every commit (still safe in WAL mode)
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,       # Negative means KiB, so this is about 64 MB
+    'mmap_size': 268435456,     # 256 MB
+    'temp_store': 'MEMORY',
+}
+
+# Most read-only connections kept open for reuse
+READ_POOL_SIZE = 4
+
+# Close names offered when a looked up battle isn't found
+SUGGESTION_COUNT = 5
+
+# The single connection used for writing
 conn = None
 
+# Idle read-only connections waiting to be reused
+read_Pool: list[sqlite3.Connection] = []
+
+# In-memory index of normalized battle name -> db_id
+# Filled in as names are looked up and kept in sync by insert, update and delete
+name_Index: dict[str, int] = {}
+
+# PRAGMA data_version and total_changes of the writer when changes were last checked for
+change_Version: tuple | None = None
+
+# Highest battle_changes.seq already applied to battle_Cache
+change_Seq: int | None = None
+
+#-------------------------------------------------------------------------
+
+# Changes which database file is used and how connections are tuned
+# Any open connections are closed so the next call reconnects with the new settings
+def configure(path: str | None = None, read_Pool_Size: int | None = None, **pragmas):
+    global DB_FILE, READ_POOL_SIZE
+
+    close()
+
+    if path is not None:
+        DB_FILE = path
+
+    if read_Pool_Size is not None:
+        READ_POOL_SIZE = read_Pool_Size
+
+    PRAGMAS.update(pragmas)
+
+#-------------------------------------------------------------------------
+
+# Builds a SQLite file: URI for a database path
+# Done by hand rather than with pathlib or urllib.parse, which cost more to import than the rest of db.py
+def get_File_Uri(path: str) -> str:
+    full_Path = os.path.realpath(path).replace(os.sep, "/")
+
+    # Windows paths start with a drive letter, SQLite wants file:///C:/...
+    if not full_Path.startswith("/"):
+        full_Path = "/" + full_Path
+
+    # Only these characters mean something in a SQLite URI path, % has to go first
+    for character, escaped in (("%", "%25"), ("?", "%3F"), ("#", "%23")):
+        full_Path = full_Path.replace(character, escaped)
+
+    return "file://" + full_Path
+
+#-------------------------------------------------------------------------
+
+# Opens a new connection to DB_FILE, or to db_File if given, with the configured PRAGMAs applied
+# Read-only connections are opened with mode=ro so they can never take the write lock
+def open_Connection(read_Only: bool = False, db_File: str | None = None) -> sqlite3.Connection:
+
+    db_File = db_File or DB_FILE
+
+    if read_Only:
+        uri = get_File_Uri(db_File) + "?mode=ro"
+        new_Conn = sqlite3.connect(uri, uri=True, timeout=BUSY_TIMEOUT, detect_types=sqlite3.PARSE_COLNAMES,
+                                   factory=instrument.Traced_Connection)
+    else:
+        new_Conn = sqlite3.connect(db_File, timeout=BUSY_TIMEOUT, detect_types=sqlite3.PARSE_COLNAMES,
+                                   factory=instrument.Traced_Connection)
+
+    if instrument.trace_Enabled:
+        instrument.attach(new_Conn)
+
+    # Allows access to columns by name
+    new_Conn.row_factory = sqlite3.Row
+
+    for pragma, value in PRAGMAS.items():
+        # The journal mode is stored in the file itself, so only the writer sets it
+        if pragma == 'journal_mode' and read_Only:
+            continue
+        new_Conn.execute(f"PRAGMA {pragma} = {value}")
+
+    return new_Conn
+
 #-------------------------------------------------------------------------
 
 # Establishes a connection to the sqlite database file if one doesn't already exist
 def connect():
     global conn
     if not conn:
-        DB_FILE = "Final.sqlite"
-        conn = sqlite3.connect(DB_FILE)
-        # Allows access to columns by name
-        conn.row_factory = sqlite3.Row
+        conn = open_Connection()
+        ensure_Schema(report=report_Migration)
 
 #-------------------------------------------------------------------------
 
-# Inserts new battle into the battles table
-# battle_obj is the battle object containing the data to be saved
-def insert_Battle(battle_obj):
-    
+# Lends out a read-only connection from the pool for query paths
+# Readers don't block the writer (or each other) in WAL mode
+@contextmanager
+def read_Connection() -> Iterator[sqlite3.Connection]:
     connect()
+
+    # An in-memory database can't be shared, so everything uses the one connection
+    if DB_FILE == ":memory:":
+        yield conn
+        return
+
+    reader = read_Pool.pop() if read_Pool else open_Connection(read_Only=True)
+
+    try:
+        yield reader
+    finally:
+        # Ends any read transaction so the next borrower sees the latest commits
+        if reader.in_transaction:
+            reader.rollback()
+
+        if len(read_Pool) < READ_POOL_SIZE:
+            read_Pool.append(reader)
+        else:
+            reader.close()
+
+#-------------------------------------------------------------------------
+
+# Closes the writer and every pooled reader
+def close():
+    global conn, change_Version, change_Seq
+
+    while read_Pool:
+        read_Pool.pop().close()
+
+    if conn:
+        conn.close()
+        conn = None
+
+    name_Index.clear()
+    battle_Cache.clear()
+    change_Version = None
+    change_Seq = None
+
+#-------------------------------------------------------------------------
+
+# Brings the database up to the latest schema version (see migrations.py)
+# Works on the writer unless another connection is given
+def ensure_Schema(connection: sqlite3.Connection | None = None, report=None):
     global conn
-    
-    sql = '''
+
+    connection = connection or conn
+
+    if connection.execute("PRAGMA user_version").fetchone()[0] >= migrations.LATEST_VERSION:
+        return
+
+    migrations.migrate(connection, report=report)
+
+#-------------------------------------------------------------------------
+
+# Progress of migrations run on connect goes to stderr, so piped output stays clean
+def report_Migration(message: str):
+    print(message, file=sys.stderr)
+
+#-------------------------------------------------------------------------
+
+# Rewrites the participant and trigram rows worked out from a saved battle
+# With changed_Fields, only the tables fed by those fields are rewritten
+def sync_Derived_Rows(c, battle_obj, changed_Fields: Iterable[str] | None = None):
+    if changed_Fields is None or any(name in changed_Fields for name in participants.SOURCE_FIELDS):
+        participants.sync_Battle(c, battle_obj)
+
+    if changed_Fields is None or 'battleName' in changed_Fields:
+        trigrams.sync_Name(c, battle_obj)
+
+#-------------------------------------------------------------------------
+
+# Removes a battle's old name from the in-memory index before its row changes
+def forget_Battle_Name(db_id: int):
+    global conn
+
+    with closing(conn.cursor()) as c:
+        c.execute("SELECT battleNameKey FROM battles WHERE id = ?", (db_id,))
+        row = c.fetchone()
+
+    if row is not None:
+        name_Index.pop(row['battleNameKey'], None)
+
+#-------------------------------------------------------------------------
+
+# Query used to insert a single battle row
+INSERT_SQL = '''
     INSERT INTO battles (
         battleName, date, countriesInvolved, winner, loser, victorForces,
         vanquishedForces, totalVictorDeaths, totalVanquishedDeaths,
-        significantFiguresPresent, notableDeaths
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        significantFiguresPresent, notableDeaths, battleNameKey
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     '''
 
-    # Tuple of values from the Battle object to match the SQL query
-    values = (
+#-------------------------------------------------------------------------
+
+# Builds the tuple of values from a Battle object to match INSERT_SQL
+def get_Insert_Values(battle_obj) -> tuple:
+    return (
         battle_obj.battleName,
         battle_obj.date.isoformat(), # Converts date object to YYYY-MM-DD
         battle_obj.countriesInvolved,
@@ -51,18 +249,92 @@ def insert_Battle(battle_obj):
         battle_obj.totalVictorDeaths,
         battle_obj.totalVanquishedDeaths,
         battle_obj.significantFiguresPresent,
-        battle_obj.notableDeaths
+        battle_obj.notableDeaths,
+        normalize_Name(battle_obj.battleName)
     )
+
+#-------------------------------------------------------------------------
+
+# Inserts new battle into the battles table
+# battle_obj is the battle object containing the data to be saved
+def insert_Battle(battle_obj):
+    
+    connect()
+    global conn
+
     # Use closing for cursor to ensure release of database resources
     with closing(conn.cursor()) as c:
-        c.execute(sql, values)
+        c.execute(INSERT_SQL, get_Insert_Values(battle_obj))
         # Retrieves auto-generated primary key and assigns it back to the program
         battle_obj.db_id = c.lastrowid
+        sync_Derived_Rows(c, battle_obj)
         # Commits the transaction
         conn.commit()
+
+    # The lowest id of a name wins. One that isn't cached may still belong to an older row,
+    # so it is left for find_Battle_Id to look up rather than cached as this one
+    key = normalize_Name(battle_obj.battleName)
+    cached_Id = name_Index.get(key)
+
+    if cached_Id is not None and battle_obj.db_id < cached_Id:
+        name_Index[key] = battle_obj.db_id
+    else:
+        name_Index.pop(key, None)
+
+#-------------------------------------------------------------------------
+
+# Inserts many battles with a single executemany call
+# Nothing is committed unless commit is True, so callers can group several batches
+# (and their own bookkeeping) into one transaction.
+# The new rows don't get db_ids assigned because executemany can't report them.
+def insert_Battles(battle_objs: Iterable[Battle], commit: bool = True) -> int:
+    return insert_Rows((get_Insert_Values(b) for b in battle_objs), commit)
+
+# Same as insert_Battles, for rows already built by get_Insert_Values
+# Lets import workers build the rows, so the writer only has to save them
+def insert_Rows(rows: Iterable[tuple], commit: bool = True) -> int:
+    connect()
+    global conn
+
+    with closing(conn.cursor()) as c:
+        # New rows always get ids above the current highest one
+        c.execute("SELECT MAX(id) FROM battles")
+        last_Id = c.fetchone()[0]
+
+        c.executemany(INSERT_SQL, rows)
+        count = c.rowcount
+
+        last_Id = FIRST_ID if last_Id is None else last_Id
+        participants.sync_Battles_After(c, last_Id, is_New=True)
+        trigrams.sync_Names_After(c, last_Id)
+
+    if commit:
+        conn.commit()
+
+    # name_Index only caches names that were found, and new rows always have the
+    # highest ids, so none of its entries can be made wrong by these inserts
+    return count
         
 #-------------------------------------------------------------------------
 
+# Query to update all columns using the id column in the WHERE clause
+UPDATE_SQL = '''
+    UPDATE battles SET
+        battleName = ?, date = ?, countriesInvolved = ?, winner = ?,
+        loser = ?, victorForces = ?, vanquishedForces = ?,
+        totalVictorDeaths = ?, totalVanquishedDeaths = ?,
+        significantFiguresPresent = ?, notableDeaths = ?,
+        battleNameKey = ?
+    WHERE id = ?
+    '''
+
+# Builds the tuple of values from a Battle object to match UPDATE_SQL
+def get_Update_Values(battle_obj) -> tuple:
+    # Same columns as an insert, followed by the id used to identify the exact row to update
+    return get_Insert_Values(battle_obj) + (battle_obj.db_id,)
+
+#-------------------------------------------------------------------------
+
 # Updates an existing Battle's data in the 'battles' table based on its 'db_id'
 def update_Battle(battle_obj):
     connect()
@@ -74,166 +346,570 @@ def update_Battle(battle_obj):
     if not hasattr(battle_obj, 'db_id') or battle_obj.db_id is None:
         return
 
-    # Query to update all columns using the id column in the WHERE clause
-    sql = '''
-            UPDATE battles SET
-                battleName = ?, date = ?, countriesInvolved = ?, winner = ?,
-                loser = ?, victorForces = ?, vanquishedForces = ?,
-                totalVictorDeaths = ?, totalVanquishedDeaths = ?,
-                significantFiguresPresent = ?, notableDeaths = ?
-            WHERE id = ?
-            '''
-
-    values = (
-        battle_obj.battleName,
-        battle_obj.date.isoformat(),
-        battle_obj.countriesInvolved,
-        battle_obj.winner,
-        battle_obj.loser,
-        battle_obj.victorForces,
-        battle_obj.vanquishedForces,
-        battle_obj.totalVictorDeaths,
-        battle_obj.totalVanquishedDeaths,
-        battle_obj.significantFiguresPresent,
-        battle_obj.notableDeaths,
-        battle_obj.db_id # Used to identify the exact row to update
-    )
+    forget_Battle_Name(battle_obj.db_id)
+
+    with closing(conn.cursor()) as c:
+        c.execute(UPDATE_SQL, get_Update_Values(battle_obj))
+        sync_Derived_Rows(c, battle_obj)
+        conn.commit()
+
+    battle_Cache.discard(battle_obj.db_id)
+
+    # The new name may now belong to a lower id than the one cached, so it is looked up again
+    name_Index.pop(normalize_Name(battle_obj.battleName), None)
+
+#-------------------------------------------------------------------------
+
+# Writes only the fields changed since the battle was last marked clean
+# Nothing is committed, so several battles can be flushed in one transaction.
+# Returns True if an UPDATE was issued
+def flush_Battle(battle_obj) -> bool:
+    connect()
+    global conn
+
+    if not hasattr(battle_obj, 'db_id') or battle_obj.db_id is None:
+        return False
+
+    dirty_Fields = battle_obj.get_Dirty_Fields()
+
+    if not dirty_Fields:
+        return False
+
+    columns = []
+    values = []
+
+    for name in dirty_Fields:
+        value = getattr(battle_obj, name)
+
+        # Converts date object to YYYY-MM-DD
+        if name == 'date':
+            value = value.isoformat()
+
+        columns.append(f"{name} = ?")
+        values.append(value)
+
+    if 'battleName' in dirty_Fields:
+        columns.append("battleNameKey = ?")
+        values.append(normalize_Name(battle_obj.battleName))
+
+    sql = "UPDATE battles SET " + ", ".join(columns) + " WHERE id = ?"
+    values.append(battle_obj.db_id)
 
     with closing(conn.cursor()) as c:
         c.execute(sql, values)
+
+        sync_Derived_Rows(c, battle_obj, dirty_Fields)
+
+    battle_Cache.discard(battle_obj.db_id)
+
+    # Both the old and the new name may now point at a different id
+    if 'battleName' in dirty_Fields:
+        if getattr(battle_obj, '_clean_Values', None) is not None:
+            name_Index.pop(normalize_Name(battle_obj.get_Clean_Value('battleName')), None)
+        else:
+            forget_Battle_Name(battle_obj.db_id)
+        name_Index.pop(normalize_Name(battle_obj.battleName), None)
+
+    return True
+
+#-------------------------------------------------------------------------
+
+# Groups changes to one or more battles into a single transaction.
+# Tracked battles remember their values, and commit() writes one UPDATE per battle
+# containing only the changed columns. rollback() puts every tracked battle back.
+#
+#     with Edit_Session() as session:
+#         for battle in battles:
+#             session.track(battle)
+#             battle.winner = "England"
+class Edit_Session:
+
+    def __init__(self):
+        self.battles = []
+
+    # Starts watching a battle for changes and returns it
+    def track(self, battle_obj):
+        if not any(b is battle_obj for b in self.battles):
+            battle_obj.mark_Clean()
+            self.battles.append(battle_obj)
+        return battle_obj
+
+    # Writes every tracked change in one transaction and returns the number of UPDATEs issued
+    def commit(self) -> int:
+        connect()
+        global conn
+
+        updates = 0
+
+        try:
+            for battle_obj in self.battles:
+                if flush_Battle(battle_obj):
+                    updates += 1
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        # The saved values are the new starting point for the battles still being tracked
+        for battle_obj in self.battles:
+            battle_obj.mark_Clean()
+
+        return updates
+
+    # Throws away every change made since the battles were tracked or last committed
+    def rollback(self):
+        for battle_obj in self.battles:
+            battle_obj.revert()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_Type, exc_Value, traceback):
+        if exc_Type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+#-------------------------------------------------------------------------
+
+# Deletes a battle's row from the 'battles' table based on its 'db_id'
+def remove_Battle(battle_obj):
+    connect()
+    global conn
+
+    if not hasattr(battle_obj, 'db_id') or battle_obj.db_id is None:
+        return
+
+    forget_Battle_Name(battle_obj.db_id)
+
+    with closing(conn.cursor()) as c:
+        # Executes the DELETE command using battle's db_id
+        c.execute("DELETE FROM battles WHERE id = ?", (battle_obj.db_id,))
         conn.commit()
 
+    battle_Cache.discard(battle_obj.db_id)
+
+#-------------------------------------------------------------------------
+
+# Number of rows pulled from the cursor at a time when streaming battles
+BATCH_SIZE = 500
+
+# Columns selected whenever battles are read back out of the database
+# They are in the same order as Battle's fields, after the id.
+# The [isodate] tag makes sqlite3 run the date through convert_Iso_Date
+BATTLE_COLUMNS = '''
+    id, battleName, date AS "date [isodate]", countriesInvolved, winner, loser,
+    victorForces, vanquishedForces, totalVictorDeaths,
+    totalVanquishedDeaths, significantFiguresPresent, notableDeaths
+'''
+
+#-------------------------------------------------------------------------
+
+# Converts a YYYY-MM-DD string into a date object
+# date.fromisoformat is much faster than strptime, and a battle archive holds far fewer
+# distinct dates than rows, so each one is only parsed once
+@lru_cache(maxsize=65536)
+def parse_Iso_Date(date_str: str) -> date:
+    return date.fromisoformat(date_str)
+
+# SQLite converter for columns tagged [isodate], it receives the raw bytes
+# Cached on the bytes themselves so a repeated date never reaches Python code
+@lru_cache(maxsize=65536)
+def convert_Iso_Date(value: bytes) -> date:
+    return date.fromisoformat(value.decode())
+
+sqlite3.register_converter("isodate", convert_Iso_Date)
+
+#-------------------------------------------------------------------------
+
+# Converts a single database row into a Battle object
+# The row holds BATTLE_COLUMNS in order and can be a plain tuple or a sqlite3.Row.
+# Reading by position skips the name lookups, and the INTEGER columns already
+# come back as Python ints so they don't need converting
+def row_To_Battle(row) -> Battle:
+    battle_Date = row[2]
+
+    # Rows from connections without the converter still hold the date string
+    if isinstance(battle_Date, str):
+        battle_Date = parse_Iso_Date(battle_Date)
+
+    return Battle(
+        row[1], battle_Date, row[3], row[4], row[5],
+        row[6], row[7], row[8], row[9], row[10], row[11],
+        db_id=row[0]
+    )
+
+#-------------------------------------------------------------------------
+
+# Streams records from the 'battles' table one Battle object at a time.
+# Rows are fetched in batches of batch_Size and only converted into Battle
+# objects as the caller asks for them, so memory stays flat however big the table is
+def iter_Battles(batch_Size: int = BATCH_SIZE) -> Iterator[Battle]:
+
+    query = "SELECT " + BATTLE_COLUMNS + " FROM battles"
+
+    with read_Connection() as reader, closing(reader.cursor()) as c:
+        # Plain tuples are cheaper to build than sqlite3.Row objects
+        c.row_factory = None
+        c.execute(query)
+
+        while True:
+            rows = c.fetchmany(batch_Size) # Fetches the next batch of rows
+            if not rows:
+                break
+
+            if instrument.enabled:
+                with instrument.phase("decode rows", len(rows)):
+                    battles = [row_To_Battle(row) for row in rows]
+                yield from battles
+                continue
+
+            for row in rows:
+                yield row_To_Battle(row)
+
 #-------------------------------------------------------------------------
 
 # Retrieves all records from the 'battles' table and converts into list of Battle objects.
 # Returns a list of Battle objects
+# Only use this when the whole table really is needed at once, otherwise use iter_Battles()
 def get_All_Battles() -> list[Battle]:
-    connect()
-    global conn
+    return list(iter_Battles())
 
-    # Query to select necessary columns
-    query = '''
-    SELECT id, battleName, date, countriesInvolved, winner, loser,
-        victorForces, vanquishedForces, totalVictorDeaths,
-        totalVanquishedDeaths, significantFiguresPresent, notableDeaths
-    FROM battles
-    '''
+#-------------------------------------------------------------------------
+
+# Loads every battle into a compact column-oriented Battle_Columns collection
+# Uses far less memory than a list of Battle objects for read-only work
+def load_Battle_Columns(batch_Size: int = BATCH_SIZE) -> Battle_Columns:
+    columns = Battle_Columns()
+
+    for battle in iter_Battles(batch_Size):
+        columns.append(battle)
+
+    return columns
+
+#-------------------------------------------------------------------------
+
+# Returns the number of rows in the 'battles' table without loading them
+def count_Battles() -> int:
+
+    with read_Connection() as reader, closing(reader.cursor()) as c:
+        c.execute("SELECT COUNT(*) FROM battles")
+        return c.fetchone()[0]
+
+#-------------------------------------------------------------------------
+
+# Retrieves one page of battles in date order using keyset pagination.
+# after and before are (date, db_id) pairs taken from the last battle of the previous page,
+# so each page starts exactly where the last one ended without using OFFSET.
+# Battles without a date sort after every dated one, as if they were the most recent
+def get_Battles_Page(limit: int = BATCH_SIZE, after: tuple | None = None,
+                     before: tuple | None = None, descending: bool = False) -> list[Battle]:
+
+    # idx_battles_date can't order the two kinds of battle together, so each is read
+    # with its own query. None in place of a list of conditions means none can match
+    dated = ["date IS NOT NULL"]
+    undated = ["date IS NULL"]
+    dated_Values = []
+    undated_Values = []
+
+    # Row value comparisons let SQLite jump to the right spot in idx_battles_date
+    if after is not None:
+        after_Date, after_Id = get_Page_Key(after)
+
+        if after_Date is None:
+            dated = None
+            undated.append("id > ?")
+            undated_Values.append(after_Id)
+        else:
+            dated.append("(date, id) > (?, ?)")
+            dated_Values.extend((after_Date, after_Id))
+
+    if before is not None:
+        before_Date, before_Id = get_Page_Key(before)
+
+        if before_Date is None:
+            undated.append("id < ?")
+            undated_Values.append(before_Id)
+        else:
+            if dated is not None:
+                dated.append("(date, id) < (?, ?)")
+                dated_Values.extend((before_Date, before_Id))
+            undated = None
+
+    direction = "DESC" if descending else "ASC"
+    queries = [(dated, dated_Values, f"date {direction}, id {direction}"),
+               (undated, undated_Values, f"id {direction}")]
+
+    if descending:
+        queries.reverse()
 
     battles = []
 
-    with closing(conn.cursor()) as c:
-        c.execute(query)
-        rows = c.fetchall() # Fetches all matching rows from database
-
-        for row in rows:
-
-            # Converts the date string into Python date object
-            battle_date = datetime.strptime(row['date'], '%Y-%m-%d').date()
-
-            # Creates new Battle object using data from the database row
-            new_Battle = Battle(
-                battleName=row['battleName'],
-                date=battle_date,
-                countriesInvolved=row['countriesInvolved'],
-                winner=row['winner'],
-                loser=row['loser'],
-                # Convert into Python integers for death counts
-                victorForces=int(row["victorForces"]),
-                vanquishedForces=int(row['vanquishedForces']),
-                totalVictorDeaths=int(row['totalVictorDeaths']),
-                totalVanquishedDeaths=int(row['totalVanquishedDeaths']),
-                significantFiguresPresent=row['significantFiguresPresent'],
-                notableDeaths=row['notableDeaths']
-            )
-
-            new_Battle.db_id = row['id']
-                    
-            battles.append(new_Battle)
-                    
+    with read_Connection() as reader, closing(reader.cursor()) as c:
+        for conditions, values, order in queries:
+            if conditions is None or len(battles) == limit:
+                continue
+
+            c.execute("SELECT " + BATTLE_COLUMNS + " FROM battles WHERE " + " AND ".join(conditions) +
+                      f" ORDER BY {order} LIMIT ?", values + [limit - len(battles)])
+            battles.extend(row_To_Battle(row) for row in c.fetchall())
+
     return battles
 
 #-------------------------------------------------------------------------
 
-# Prints formatted list of battle records
-def display_All_Battles(battles: list[Battle]):
+# Converts a (date, db_id) pair into the values stored in the database
+def get_Page_Key(key: tuple) -> tuple:
+    battle_Date, db_id = key
 
-    print()
-    print(get_Centered_String("BATTLE RECORDS\n"))
-    
+    if isinstance(battle_Date, date):
+        battle_Date = battle_Date.isoformat()
 
-    if not battles:
-        print("\nNo battles recorded.")
-        return
+    return (battle_Date, db_id)
 
-    # Defines the formatting for the main header and rows
-    core_Header_Format = (
-        "{:<11} "
-        "{:<36} "
-        "{:<36} "
-        "{:<42} "
-        "{:<22} "
-        "{:>25} "
-        "{:>37} "
+#-------------------------------------------------------------------------
 
-    )
+# Streams every battle in date order one page at a time
+def iter_Battles_By_Date(descending: bool = False, page_Size: int = BATCH_SIZE) -> Iterator[Battle]:
+    key = None
 
-    HEADER_WIDTH = 226
-    print("=" * HEADER_WIDTH)
-    print(core_Header_Format.format(
-        "ID",
-        "BATTLE NAME",
-        "DATE OF BATTLE",
-        "COUNTRIES INVOLVED",
-        "VIC. FORCES",
-        "VANQ. FORCES",
-        "TOTAL DEATHS",
-    
-    ))
+    while True:
+        if descending:
+            page = get_Battles_Page(page_Size, before=key, descending=True)
+        else:
+            page = get_Battles_Page(page_Size, after=key)
 
-    # Loops through the list of battles for display
-    for i, battle in enumerate(battles, 1):
+        yield from page
 
-        # Creates the formatted row output for the current battle
-        core_Row_Output = core_Header_Format.format(
-            i,
-            battle.battleName,
-            battle.date.isoformat(),
-            battle.countriesInvolved,
-            f"{battle.victorForces:,}",
-            f"{battle.vanquishedForces:,}",
-            f"{battle.total_Deaths:,}"
-        )
-        print("-" * HEADER_WIDTH)
-        
-        print(core_Row_Output)
+        if len(page) < page_Size:
+            break
 
-        print("-" * HEADER_WIDTH)
+        # The last battle of this page is where the next page picks up
+        key = (page[-1].date, page[-1].db_id)
 
-        # Prints information below the main table row
-        # I did this because it looks more organized and improves readability
-        if battle.winner and battle.loser:
-            print(f"\nWINNER/LOSER: {battle.winner} vs {battle.loser}")
+#-------------------------------------------------------------------------
 
-        if battle.totalVictorDeaths:
-            print(f"\nTotal Deaths of {battle.winner}: {battle.totalVictorDeaths}")
+# Retrieves the battles with the given ids in one query
+# Ids with no row are left out, and the order of the result isn't defined
+def get_Battles_By_Ids(db_ids: list[int]) -> list[Battle]:
 
-        if battle.totalVanquishedDeaths:
-            print(f"\nTotal Deaths of {battle.loser}: {battle.totalVanquishedDeaths}")
+    if not db_ids:
+        return []
 
-        if battle.significantFiguresPresent:
-            print(f"\nFIGURES PRESENT: \n{battle.significantFiguresPresent}")
+    query = "SELECT " + BATTLE_COLUMNS + " FROM battles WHERE id IN (" + ", ".join("?" * len(db_ids)) + ")"
 
-        if battle.significantFiguresPresent:
-            print(f"\nNOTABLE DEATHS: \n{battle.notableDeaths}")
-            print()
+    with read_Connection() as reader, closing(reader.cursor()) as c:
+        c.execute(query, db_ids)
+        return [row_To_Battle(row) for row in c.fetchall()]
+
+# Battles looked up by id, kept fresh by check_For_Changes()
+battle_Cache = cache.Battle_Cache(get_Battles_By_Ids)
+
+#-------------------------------------------------------------------------
+
+# Brings battle_Cache and name_Index up to date with changes made since the last check.
+# PRAGMA data_version only changes when another connection commits, and total_changes
+# only when this program writes, so when neither moved nothing is read at all.
+# Otherwise only the battles in battle_changes with a newer seq are reloaded.
+# Returns the number of cached battles that were refreshed
+def check_For_Changes() -> int:
+    global conn, change_Version, change_Seq
+
+    connect()
 
+    with closing(conn.cursor()) as c:
+        c.execute("PRAGMA data_version")
+        version = (c.fetchone()[0], conn.total_changes)
+
+        if version == change_Version:
+            return 0
+
+        # The first check only finds out where the log currently ends
+        if change_Seq is None:
+            c.execute("SELECT IFNULL(MAX(seq), 0) FROM battle_changes")
+            changed_Ids = []
+            new_Seq = c.fetchone()[0]
+        else:
+            c.execute("SELECT battleId, seq FROM battle_changes WHERE seq > ? ORDER BY seq", (change_Seq,))
+            rows = c.fetchall()
+            changed_Ids = [row[0] for row in rows]
+            new_Seq = rows[-1][1] if rows else change_Seq
+
+    # Another program committed, so any cached name may now point at the wrong battle
+    if change_Version is not None and version[0] != change_Version[0]:
+        name_Index.clear()
+
+    change_Version = version
+    change_Seq = new_Seq
 
-    print("=" * HEADER_WIDTH)
+    return battle_Cache.refresh(changed_Ids)
+
+#-------------------------------------------------------------------------
+
+# Retrieves a single battle by its 'db_id', or None if there is no such row
+# Served from battle_Cache, which is checked for outside changes first
+def get_Battle_By_Id(db_id: int) -> Battle | None:
+    check_For_Changes()
+    return battle_Cache.get(db_id)
+
+#-------------------------------------------------------------------------
+
+# Finds the db_id of the battle with the given name using the name index
+# When several battles share a name the one saved first (lowest id) is always returned
+def find_Battle_Id(name: str) -> int | None:
+
+    # Clears the cached names if another program has committed since the last check
+    check_For_Changes()
+
+    key = normalize_Name(name)
+
+    if key in name_Index:
+        return name_Index[key]
+
+    # Not cached yet, so the SQLite index on battleNameKey is used instead of a full scan
+    with read_Connection() as reader, closing(reader.cursor()) as c:
+        c.execute("SELECT id FROM battles WHERE battleNameKey = ? ORDER BY id LIMIT 1", (key,))
+        row = c.fetchone()
+
+    if row is None:
+        return None
+
+    name_Index[key] = row['id']
+    return row['id']
+
+#-------------------------------------------------------------------------
+
+# Retrieves the battle with the given name, or None if it isn't saved
+def find_Battle_By_Name(name: str) -> Battle | None:
+    db_id = find_Battle_Id(name)
+
+    if db_id is None:
+        return None
+
+    return get_Battle_By_Id(db_id)
+
+#-------------------------------------------------------------------------
+
+# Returns up to limit (similarity, db_id, battleName) of the saved names closest to name
+# Answered from the trigram index (see trigrams.py), so misspelled names still find their battle
+def suggest_Battle_Names(name: str, limit: int = SUGGESTION_COUNT) -> list[tuple[float, int, str]]:
+    with read_Connection() as reader, closing(reader.cursor()) as c:
+        c.row_factory = None
+        return trigrams.find_Similar_Names(c, name, limit)
+
+#-------------------------------------------------------------------------
+
+# Turns what the user typed into an FTS5 query
+# "quoted text" is searched as a phrase, words ending in * match any word starting
+# with them, and every other word is matched as-is. All the parts must match
+def build_Search_Query(text: str) -> str:
+    parts = []
+
+    # Splitting on quotes leaves the phrases at the odd positions
+    for position, chunk in enumerate(text.split('"')):
+        if position % 2 == 1:
+            if chunk.strip():
+                parts.append('"' + chunk.strip() + '"')
+            continue
+
+        for word in chunk.split():
+            is_Prefix = word.endswith('*')
+            word = word.rstrip('*')
+
+            # Keeps FTS5 operators and punctuation from being read as query syntax
+            word = word.replace('"', '')
+            if not word:
+                continue
+
+            parts.append('"' + word + '"' + ('*' if is_Prefix else ''))
+
+    return " ".join(parts)
+
+#-------------------------------------------------------------------------
+
+# Searches names, countries, winners, losers, figures present and notable deaths
+# Returns (battle, score) pairs with the best match first, lower scores are better matches
+def search_Battles(text: str, limit: int = 20) -> list[tuple[Battle, float]]:
+
+    query = build_Search_Query(text)
+
+    if not query:
+        return []
+
+    columns = ", ".join("b." + column.strip() for column in BATTLE_COLUMNS.split(","))
+
+    sql = f'''
+        SELECT {columns}, battles_fts.rank AS score
+        FROM battles_fts
+        JOIN battles b ON b.id = battles_fts.rowid
+        WHERE battles_fts MATCH ?
+        ORDER BY battles_fts.rank
+        LIMIT ?
+    '''
+
+    with read_Connection() as reader, closing(reader.cursor()) as c:
+        c.execute(sql, (query, limit))
+        return [(row_To_Battle(row), row['score']) for row in c.fetchall()]
+
+#-------------------------------------------------------------------------
+
+# Prompts user for search text and prints the best matching battles
+def search_For_Battles():
+
+    print("\n")
+    print(get_Centered_String("SEARCH BATTLES"))
+    print("-" * TARGET_WIDTH)
+
+    print("\nSearches names, countries, winners, losers, figures present and notable deaths.")
+    print("Use \"quotes\" for an exact phrase and * at the end of a word to match its start, e.g. Napol*\n")
+
+    text = input("Search for: ")
+
+    results = search_Battles(text)
+
+    if not results:
+        print(f"\nNo battles match '{text}'.")
+        return
+
+    result_Format = "{:<6} {:<50} {:<25} {:<60}"
+
+    print()
+    print("=" * TARGET_WIDTH)
+    print(result_Format.format("RANK", "BATTLE NAME", "DATE", "COUNTRIES INVOLVED"))
+    print("-" * TARGET_WIDTH)
+
+    for i, (battle, score) in enumerate(results, 1):
+        print(result_Format.format(i, get_Display_Value(battle.battleName), get_Display_Value(battle.date),
+                                   get_Display_Value(battle.countriesInvolved)))
+
+    print("=" * TARGET_WIDTH)
+
+#-------------------------------------------------------------------------
+
+# Returns the given battles, or a fresh stream from the database if none were given
+def get_Battle_Source(battles: Iterable[Battle] | None) -> Iterable[Battle]:
+    if battles is None:
+        return iter_Battles()
+    return battles
+
+#-------------------------------------------------------------------------
+
+# Prints formatted list of battle records
+# Streams straight from the database unless a list of battles is passed in.
+# Output is built a page at a time by render.Battle_Renderer; out, width,
+# page_Size and pause are passed on to it
+def display_All_Battles(battles: Iterable[Battle] | None = None, out=None, width: int = TARGET_WIDTH,
+                        page_Size: int | None = None, pause=None):
+    import render
+
+    renderer = render.Battle_Renderer(width, out, render.PAGE_SIZE if page_Size is None else page_Size, pause)
+    renderer.render(get_Battle_Source(battles))
 
 #-------------------------------------------------------------------------
     
 # Prompts the user for details to create a new battle object and save it to the database
-def add_Battle(battles: list[Battle]):
+# If a list of battles is passed in, the new battle is appended to it as well
+def add_Battle(battles: list[Battle] | None = None):
 
     print("\n")
     print(get_Centered_String("ADD NEW BATTLE"))
@@ -242,7 +918,7 @@ def add_Battle(battles: list[Battle]):
 
     # Takes the user input and converts it to Title Case
     # Ensures all input will match name if spelled correctly
-    battleName = input("Battle Name: ").title()
+    battleName = to_Title(input("Battle Name: "))
 
     print()
 
@@ -250,8 +926,8 @@ def add_Battle(battles: list[Battle]):
     
     countriesInvolved = input("\nCountries Involved: ")
     # Converts winner and loser input to Title Case
-    winner = input("\nWinner: ").title()
-    loser = input("\nLoser: ").title()
+    winner = to_Title(input("\nWinner: "))
+    loser = to_Title(input("\nLoser: "))
 
     # get_Valid_Int function is used to validate and get integer inputs
     victorForces = get_Valid_Int("\nVictor Forces: ")
@@ -277,18 +953,20 @@ def add_Battle(battles: list[Battle]):
     )
 
 
-    battles.append(new_Battle)
+    if battles is not None:
+        battles.append(new_Battle)
 
     # Saves the object to the database
     insert_Battle(new_Battle)
 
     print("\nBattle successfully added to the list!")
-    print(f"\nTotal battles saved: {len(battles)}")
+    print(f"\nTotal battles saved: {count_Battles()}")
 
 #-------------------------------------------------------------------------
 
 # Allows user to look up battle and delete it from database
-def delete_Battle(battles: list[Battle]):
+# If a list of battles is passed in, the battle is removed from it as well
+def delete_Battle(battles: list[Battle] | None = None):
     
     print()
     print(get_Centered_String("DELETE BATTLE"))
@@ -306,30 +984,28 @@ def delete_Battle(battles: list[Battle]):
 
         # Checks if object has a database id hasattr = has attribute
         if hasattr(battle_To_Delete, 'db_id') and battle_To_Delete.db_id is not None:
-            connect()
-            global conn
-
-            with closing(conn.cursor()) as c:
-                # Executes the DELETE command using battle's db_id
-                c.execute("DELETE FROM battles WHERE id = ?", (battle_To_Delete.db_id,))
-                conn.commit()
+            remove_Battle(battle_To_Delete)
             
             try:
                 # Removes object
-                battles.remove(battle_To_Delete)
+                if battles is not None:
+                    battles.remove(battle_To_Delete)
                 print(f"\nSuccessfully deleted the Battle of {battle_To_Delete.battleName}.")
 
             except ValueError:
                 print("\nError: Could not find battle in the battle list.")
 
         else:
-            # If no db_id is present
-            try:
-                battles.remove(battle_To_Delete)
-                print(f"\nSuccessfully deleted the Battle of {battle_To_Delete.battleName}.")
+            # If no db_id is present it can only be in the battle list
+            if battles is None:
+                print("\nError: This battle is not in the database.")
+            else:
+                try:
+                    battles.remove(battle_To_Delete)
+                    print(f"\nSuccessfully deleted the Battle of {battle_To_Delete.battleName}.")
 
-            except ValueError:
-                print("\nError: Could not find battle in the battle list.")
+                except ValueError:
+                    print("\nError: Could not find battle in the battle list.")
                 
     elif confirmation == '2':
         print("\nDeletion Cancelled.")
@@ -341,7 +1017,9 @@ def delete_Battle(battles: list[Battle]):
 #-------------------------------------------------------------------------
 
 # Prompts user for battle name and then searches for a matching battle name
-def look_Up_Battle(battles: list[Battle]):
+# Uses the name index unless a list of battles is passed in. A snapshot (see snapshot.py)
+# is a copy of the table, so the index finds its battles too, by id
+def look_Up_Battle(battles: Iterable[Battle] | None = None):
     
 
     VISUAL_SHIFT = " " * 99
@@ -356,21 +1034,61 @@ def look_Up_Battle(battles: list[Battle]):
     user_Input = input().title()
     name = user_Input
 
-    # Generator expression to look through each row and find first battle name match
-    found_Battle = next((b for b in battles if b.battleName.title() == name.title()), None)
+    is_Indexed = battles is None or hasattr(battles, 'find_Id')
+
+    if battles is None:
+        found_Battle = find_Battle_By_Name(name)
+    elif is_Indexed:
+        db_id = find_Battle_Id(name)
+        found_Battle = None if db_id is None else battles.find_Id(db_id)
+    else:
+        # Generator expression to look through each battle and find first battle name match
+        key = normalize_Name(name)
+        found_Battle = next((b for b in battles if normalize_Name(b.battleName) == key), None)
 
     if found_Battle is None:
         error_Message = f"Error: Battle '{name}' not found." 
         print("\n" + VISUAL_SHIFT + error_Message)
-        return None
+
+        # Offers the closest saved names in case it was misspelled
+        if is_Indexed:
+            found_Battle = choose_Suggestion(name, VISUAL_SHIFT, battles)
 
     return found_Battle
 
 #-------------------------------------------------------------------------
 
+# Lists the saved names closest to name and lets the user pick one
+# Returns the chosen battle, or None if there are no close names or none was picked.
+# The battle is read from the snapshot when one is passed in
+def choose_Suggestion(name: str, shift: str = "", snapshot=None) -> Battle | None:
+
+    suggestions = suggest_Battle_Names(name)
+    if not suggestions:
+        return None
+
+    print("\n" + shift + "Did you mean:")
+    for number, (_, _, battle_Name) in enumerate(suggestions, 1):
+        print(shift + f"  {number} - {battle_Name}")
+
+    print("\n" + shift + "Enter number (or press ENTER to cancel): ", end="")
+    choice = input().strip()
+
+    if not choice.isdigit() or not 1 <= int(choice) <= len(suggestions):
+        return None
+
+    db_id = suggestions[int(choice) - 1][1]
+
+    if snapshot is not None:
+        return snapshot.find_Id(db_id)
+
+    return get_Battle_By_Id(db_id)
+
+#-------------------------------------------------------------------------
+
 # Allows user to edit attributes of chosen battle
 # This will repeat until user chooses to exit (0)
-def edit_Battle(battles: list[Battle]):
+def edit_Battle(battles: Iterable[Battle] | None = None):
 
     print("\n")
     print(get_Centered_String("EDIT BATTLE"))
@@ -381,6 +1099,10 @@ def edit_Battle(battles: list[Battle]):
     if battle_To_Edit is None:
         return
 
+    # Changes are kept on the object and saved together in one UPDATE when editing ends
+    session = Edit_Session()
+    session.track(battle_To_Edit)
+
     # This loop allows the user to make multiple changes without having to repeatedly select
     # the 'Edit Battle' menu option and search for the battle
     while True:
@@ -390,17 +1112,17 @@ def edit_Battle(battles: list[Battle]):
         print("CURRENT BATTLE DATA\n")
 
         # Displays current battle data of battle being edited
-        print("Battle Name: " + battle_To_Edit.battleName)
-        print("Date: " + battle_To_Edit.date.isoformat())
-        print("Countries Involved: " + battle_To_Edit.countriesInvolved)
-        print("Winner: " + battle_To_Edit.winner)
-        print("Loser: " + battle_To_Edit.loser)
-        print("Victor Forces: " + str(battle_To_Edit.victorForces))
-        print("Vanquished Forces: " + str(battle_To_Edit.vanquishedForces))
-        print("Total Victor Deaths: " + str(battle_To_Edit.totalVictorDeaths))
-        print("Total Vanquished Deaths: " + str(battle_To_Edit.totalVanquishedDeaths))
-        print("\nSignificant Figures Present: " + battle_To_Edit.significantFiguresPresent)
-        print("\nNotable Deaths: " + battle_To_Edit.notableDeaths)
+        print("Battle Name: " + get_Display_Value(battle_To_Edit.battleName))
+        print("Date: " + get_Display_Value(battle_To_Edit.date))
+        print("Countries Involved: " + get_Display_Value(battle_To_Edit.countriesInvolved))
+        print("Winner: " + get_Display_Value(battle_To_Edit.winner))
+        print("Loser: " + get_Display_Value(battle_To_Edit.loser))
+        print("Victor Forces: " + get_Display_Value(battle_To_Edit.victorForces))
+        print("Vanquished Forces: " + get_Display_Value(battle_To_Edit.vanquishedForces))
+        print("Total Victor Deaths: " + get_Display_Value(battle_To_Edit.totalVictorDeaths))
+        print("Total Vanquished Deaths: " + get_Display_Value(battle_To_Edit.totalVanquishedDeaths))
+        print("\nSignificant Figures Present: " + get_Display_Value(battle_To_Edit.significantFiguresPresent))
+        print("\nNotable Deaths: " + get_Display_Value(battle_To_Edit.notableDeaths))
 
         print("-" * 226)
 
@@ -415,13 +1137,16 @@ def edit_Battle(battles: list[Battle]):
         print(" 8. Total Victor Deaths")
         print(" 9. Total Vanquished Deaths")
         print("10. Significant Figures Present")
-        print("11. Notable Deaths\n")
+        print("11. Notable Deaths")
+        print("12. Discard Changes")
         print()
 
         try:
             choice = int(input("Enter number to edit or 0 to finish editing: "))
             print()
         except ValueError:
+            # Changes made so far are still saved
+            session.commit()
             print("Invalid input. Returning to main menu.")
             display_Menu()
             break
@@ -435,10 +1160,19 @@ def edit_Battle(battles: list[Battle]):
         }
 
         if choice == 0:
+            # Saves every change made during this edit in one transaction
+            session.commit()
             print("Edit finished. Returning to menu.")
             display_Menu()
             break # Exits loop
 
+        if choice == 12:
+            # Puts every attribute back to how it was before editing started
+            session.rollback()
+            print("Changes discarded. Returning to menu.")
+            display_Menu()
+            break
+
         attribute_Name = attr_Map.get(choice)
 
         if attribute_Name is None:
@@ -457,22 +1191,33 @@ def edit_Battle(battles: list[Battle]):
             new_Value = input(prompt)
 
             # Converts these field names to Title Case
-            if attribute_Name in ['battleName', 'winner', 'loser']:
-                new_Value = new_Value.title()
+            if attribute_Name in TITLE_FIELDS:
+                new_Value = to_Title(new_Value)
 
         # Updates the attribute on the battle object
+        # It is saved to the database when editing is finished
         setattr(battle_To_Edit, attribute_Name, new_Value)
 
-        # Saves the change to the database
-        update_Battle(battle_To_Edit)
-
         print(f"\nSuccessfully updated '{attribute_Name}'.")
         print(f"\nNew value: {new_Value}\n")
 
 #-------------------------------------------------------------------------
 
+# Converts a field for display, dates as YYYY-MM-DD
+# Battles saved by other programs can have NULL fields, those are shown empty
+def get_Display_Value(value) -> str:
+    return "" if value is None else str(value)
+
+#-------------------------------------------------------------------------
+
+# Sort key for battles in date order, battles without a date go after the most recent
+def get_Date_Key(battle) -> tuple:
+    return (battle.date is None, battle.date or date.min)
+
+#-------------------------------------------------------------------------
+
 # Sorts the list of battles by date from oldest to newest and displays them
-def sort_Battles(battles: list[Battle]):
+def sort_Battles(battles: Iterable[Battle] | None = None):
 
     print()
 
@@ -488,14 +1233,25 @@ def sort_Battles(battles: list[Battle]):
     print("\n" + get_Centered_String(title))
     print("\n")
 
-    if not battles:
+    if battles is None:
+        # Reads battles already in order from the date index, one page at a time
+        sorted_Battles = iter_Battles_By_Date(descending=False)
+    elif hasattr(battles, 'iter_By_Date'):
+        # Snapshots (see snapshot.py) store their date order, so there is nothing to sort
+        sorted_Battles = battles.iter_By_Date(descending=False)
+    else:
+        # Sorts a list that was passed in by the date attribute
+        with instrument.phase("sort"):
+            sorted_Battles = iter(sorted(battles, key=get_Date_Key))
+
+    # Peeks at the first battle so an empty table can be reported
+    first_Battle = next(sorted_Battles, None)
+
+    if first_Battle is None:
         print(padding + "No battles recorded to sort.")
         return
 
-    # Sorts the list by the date attribute using lambda function shortcut
-    # Basically tells the sorted() function what to sort by
-    # the sorted() function sorts in ASC order by default
-    sorted_Battles = sorted(battles, key=lambda battle: battle.date)
+    sorted_Battles = chain([first_Battle], sorted_Battles)
 
 
     FIRST_COL_TOTAL_W = len(padding) + DATE_W
@@ -510,7 +1266,7 @@ def sort_Battles(battles: list[Battle]):
     for i, battle in enumerate(sorted_Battles, 1):
         print(header_Format.format(
             battle.battleName,
-            battle.date.isoformat()
+            battle.date.isoformat() if battle.date is not None else ""
         ))
         
     print()
@@ -518,7 +1274,7 @@ def sort_Battles(battles: list[Battle]):
 #-------------------------------------------------------------------------
 
 # Sorts the list of battles by date from newest to oldest and displays them
-def sort_Battles_Desc(battles: list[Battle]):
+def sort_Battles_Desc(battles: Iterable[Battle] | None = None):
 
     print()
 
@@ -534,14 +1290,26 @@ def sort_Battles_Desc(battles: list[Battle]):
     print("\n" + get_Centered_String(title))
     print("\n")
 
-    if not battles:
+    if battles is None:
+        # Reads battles already in order from the date index, one page at a time
+        sorted_Battles = iter_Battles_By_Date(descending=True)
+    elif hasattr(battles, 'iter_By_Date'):
+        # Snapshots (see snapshot.py) store their date order, so there is nothing to sort
+        sorted_Battles = battles.iter_By_Date(descending=True)
+    else:
+        # Sorts a list that was passed in by the date attribute
+        # Reversed rather than sorted with reverse=True, which keeps battles of the same day in list order
+        with instrument.phase("sort"):
+            sorted_Battles = reversed(sorted(battles, key=get_Date_Key))
+
+    # Peeks at the first battle so an empty table can be reported
+    first_Battle = next(sorted_Battles, None)
+
+    if first_Battle is None:
         print(padding + "No battles recorded to sort.")
         return
 
-    # Sorts the list by the date attribute using lambda function shortcut
-    # Basically tells the sorted() function what to sort by and then reverse it
-    # since the sorted() function sorts in ASC by default.
-    sorted_Battles = sorted(battles, key=lambda battle: battle.date, reverse=True)
+    sorted_Battles = chain([first_Battle], sorted_Battles)
 
     # Formatting for the table header and rows
     header_Format = "{:<" + str(NAME_W) + "} {:<" + str(DATE_W) + "}"
@@ -553,7 +1321,7 @@ def sort_Battles_Desc(battles: list[Battle]):
     for i, battle in enumerate(sorted_Battles, 1):
         print(header_Format.format(
             battle.battleName,
-            battle.date.isoformat()
+            battle.date.isoformat() if battle.date is not None else ""
         ))
         
     print()
@@ -561,7 +1329,7 @@ def sort_Battles_Desc(battles: list[Battle]):
 #-------------------------------------------------------------------------
 
 # Prompts user for battle and calculates the time elapsed since
-def calculate_Time_Diff(battles: list[Battle]):
+def calculate_Time_Diff(battles: Iterable[Battle] | None = None):
     print("\n")
 
     print(get_Centered_String("Time since this battle occurred."))
@@ -573,21 +1341,23 @@ def calculate_Time_Diff(battles: list[Battle]):
     if battle_Chosen is None:
         return
 
+    # Battles saved by other programs may have no date to count from
+    if battle_Chosen.date is None:
+        print(f"\nThe Battle of {battle_Chosen.battleName} has no date.")
+        print("-" * 226)
+        return
+
     today = date.today()
 
-    # Calculates the time_Past object
-    time_Past = today - battle_Chosen.date
-    
     print()
 
     print(f"BATTLE NAME: {battle_Chosen.battleName}\n")
     print(f"BATTLE DATE: {battle_Chosen.date.isoformat()}\n")
     print(f"TODAY'S DATE: {today.isoformat()}\n")
 
-    # Calculates years and remaining days
-    # From what I've gathered using 365.25 is a slightly more accurate estimate for older battles.
-    years = time_Past.days // 365.25
-    remaining_Days = time_Past.days % 365   # Modulo operator to get remaining days.
+    # Whole calendar years up to the latest anniversary, then the days since it
+    # elapsed.py works the same out for every battle at once
+    years, remaining_Days = get_Elapsed(battle_Chosen.date, today)
 
     print(f"TIME ELAPSED: {years} years and {remaining_Days} days.")
     print()
@@ -606,10 +1376,7 @@ def get_Date():
     while True:
         date_str = input("Date of Battle YYYY-MM-DD: ")
         try:
-            # Parse the string into a datetime object
-            battle_Date = datetime.strptime(date_str, '%Y-%m-%d').date()
-
-            return battle_Date
+            return parse_Date(date_str)
 
         except ValueError:
             print(padding + "Error: The date was entered in the wrong format. Please use YYYY-MM-DD.")
@@ -624,11 +1391,9 @@ def get_Valid_Int(prompt: str) -> int:
 
     while True:
         try:
-            value = int(input(prompt))
-            if value >= 0:
-                return value
-            else:
-                print(one_Padding + "Value must be zero or greater.")
+            return parse_Valid_Int(input(prompt))
+        except Negative_Value_Error as e:
+            print(one_Padding + str(e))
         except ValueError:
             print(two_Padding + "Invalid input. Please enter a whole number.")
 
@@ -681,6 +1446,12 @@ def display_Menu():
     print(padding + " 8 - Time Since Battle Occurred")
     print(padding + " 9 - Display Menu")
     print(padding + "10 - Exit")
+    print(padding + "11 - Casualty and Force Analytics")
+    print(padding + "12 - Search Battles")
+    print(padding + "13 - Performance Stats")
+    print(padding + "14 - Query Battles")
+    print(padding + "15 - Battle Overview")
+    print(padding + "16 - Upcoming Anniversaries")
     print()
     print()
 
@@ -0,0 +1,232 @@
+#! /usr/bin/env/ python3
+
+from array import array
+from collections import Counter
+from contextlib import closing
+from datetime import date, timedelta
+
+import db
+from business import Battle, get_Anniversary, get_Elapsed, is_Leap_Year
+from migrations import MONTH_DAY_SQL
+
+# NumPy is optional. Without it the same numbers are worked out one battle at a time
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Time since every battle at once, for reports over the whole archive.
+#
+# Battle dates are loaded as day ordinals (date.toordinal(), 1 = 0001-01-01), worked out
+# by SQLite while it reads the rows. With NumPy the years and days since each battle
+# come out of a handful of whole-array operations on datetime64 values. The results
+# are the same as business.get_Elapsed() gives for one battle: whole calendar years up
+# to the latest anniversary, then the days since it.
+#
+# Upcoming anniversaries are found by month and day through idx_battles_month_day
+# (migration 10), so only the battles inside the window are read.
+
+# julianday() of 0001-01-01 is 1721425.5, so this turns it into date.toordinal()
+# It is NULL for a battle without a date, or with one SQLite can't read
+ORDINAL_SQL = "CAST(julianday(date) - 1721424.5 AS INTEGER)"
+
+# Ordinal of 1970-01-01, the day datetime64 counts from
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Default window for upcoming anniversaries, and size of each age bucket, in years
+ANNIVERSARY_DAYS = 30
+BUCKET_YEARS = 100
+
+#-------------------------------------------------------------------------
+
+# Loads the id and date ordinal of every battle with a date, in id order
+# Returns two NumPy arrays (or two array('q') without NumPy)
+def load_Ordinals(batch_Size: int = 50000) -> tuple:
+
+    with db.read_Connection() as reader, closing(reader.cursor()) as c:
+        # Plain tuples convert straight into arrays
+        c.row_factory = None
+
+        # The count and the rows are read in one transaction, so they always agree
+        is_Own_Transaction = not reader.in_transaction
+        if is_Own_Transaction:
+            reader.execute("BEGIN")
+
+        try:
+            c.execute(f"SELECT COUNT(*) FROM battles WHERE {ORDINAL_SQL} IS NOT NULL")
+            count = c.fetchone()[0]
+
+            c.execute(f"SELECT id, {ORDINAL_SQL} FROM battles WHERE {ORDINAL_SQL} IS NOT NULL ORDER BY id")
+
+            if np is not None:
+                table = np.empty((count, 2), dtype=np.int64)
+                filled = 0
+
+                while True:
+                    rows = c.fetchmany(batch_Size)
+                    if not rows:
+                        break
+                    table[filled:filled + len(rows)] = rows
+                    filled += len(rows)
+
+                return table[:, 0], table[:, 1]
+
+            ids, ordinals = array('q'), array('q')
+
+            while True:
+                rows = c.fetchmany(batch_Size)
+                if not rows:
+                    break
+                batch_Ids, batch_Ordinals = zip(*rows)
+                ids.extend(batch_Ids)
+                ordinals.extend(batch_Ordinals)
+
+            return ids, ordinals
+        finally:
+            if is_Own_Transaction:
+                reader.rollback()
+
+# Returns the number of battles without a date, which load_Ordinals() leaves out
+def count_Undated() -> int:
+    with db.read_Connection() as reader, closing(reader.cursor()) as c:
+        c.execute(f"SELECT COUNT(*) FROM battles WHERE {ORDINAL_SQL} IS NULL")
+        return c.fetchone()[0]
+
+#-------------------------------------------------------------------------
+
+# Returns the anniversaries of the given months (0 = January) and days (0 = the 1st)
+# in the given years, as datetime64 days. 29 February becomes the 28th in other years
+def get_Anniversary_Array(months, days, years):
+    month_Starts = ((years - 1970) * 12 + months).astype('datetime64[M]')
+    first_Days = month_Starts.astype('datetime64[D]')
+    month_Lengths = ((month_Starts + 1).astype('datetime64[D]') - first_Days).astype(np.int64)
+
+    return first_Days + np.minimum(days, month_Lengths - 1)
+
+# Returns (years, days) arrays of the time from each date ordinal to today
+# Battles after today aren't counted back from, their results mean nothing
+def get_Elapsed_Arrays(ordinals, today: date) -> tuple:
+
+    if np is None:
+        years, days = array('q'), array('q')
+
+        for ordinal in ordinals:
+            battle_Years, battle_Days = get_Elapsed(date.fromordinal(ordinal), today)
+            years.append(battle_Years)
+            days.append(battle_Days)
+
+        return years, days
+
+    dates = (np.asarray(ordinals, dtype=np.int64) - EPOCH_ORDINAL).astype('datetime64[D]')
+    month_Starts = dates.astype('datetime64[M]')
+
+    battle_Years = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+    months = month_Starts.astype(np.int64) % 12
+    days = (dates - month_Starts).astype(np.int64)
+
+    today_Day = np.datetime64(today, 'D')
+
+    # Year of each battle's latest anniversary, this year's or last year's
+    last_Years = today.year - (get_Anniversary_Array(months, days, np.int64(today.year)) > today_Day)
+    last_Anniversaries = get_Anniversary_Array(months, days, last_Years)
+
+    return last_Years - battle_Years, (today_Day - last_Anniversaries).astype(np.int64)
+
+# Returns (ids, years, days) for every battle with a date
+def get_All_Elapsed(today: date | None = None) -> tuple:
+    ids, ordinals = load_Ordinals()
+    years, days = get_Elapsed_Arrays(ordinals, today or date.today())
+    return ids, years, days
+
+#-------------------------------------------------------------------------
+
+# Counts battles by age, in buckets of bucket_Years
+# Returns (first year of the bucket, battles) pairs, youngest first
+def get_Age_Buckets(years, bucket_Years: int = BUCKET_YEARS) -> list[tuple[int, int]]:
+
+    if np is not None:
+        buckets, counts = np.unique(np.asarray(years) // bucket_Years * bucket_Years, return_counts=True)
+        return list(zip(buckets.tolist(), counts.tolist()))
+
+    return sorted(Counter(battle_Years // bucket_Years * bucket_Years for battle_Years in years).items())
+
+#-------------------------------------------------------------------------
+
+# Splits the days from start to end into (year, 'MM-DD', 'MM-DD') ranges that don't cross a new year
+def get_Month_Day_Ranges(start: date, end: date) -> list[tuple[int, str, str]]:
+    ranges = []
+
+    while start <= end:
+        range_End = min(end, date(start.year, 12, 31))
+        last = range_End.strftime('%m-%d')
+
+        # Battles of 29 February are remembered on the 28th when there is no 29th
+        if last == '02-28' and not is_Leap_Year(range_End.year):
+            last = '02-29'
+
+        ranges.append((start.year, start.strftime('%m-%d'), last))
+        start = range_End + timedelta(days=1)
+
+    return ranges
+
+# Returns (anniversary, years, battle) for every battle whose anniversary falls within
+# the next days days, today included, soonest first. Windows longer than a year are cut to one
+def get_Upcoming_Anniversaries(days: int = ANNIVERSARY_DAYS, today: date | None = None) -> list[tuple[date, int, Battle]]:
+
+    today = today or date.today()
+    end = today + timedelta(days=max(0, min(days, 364)))
+
+    upcoming = []
+
+    with db.read_Connection() as reader, closing(reader.cursor()) as c:
+        for year, first, last in get_Month_Day_Ranges(today, end):
+            c.execute(f'''
+                SELECT {db.BATTLE_COLUMNS} FROM battles
+                WHERE {MONTH_DAY_SQL} BETWEEN ? AND ?
+                ORDER BY {MONTH_DAY_SQL}, date
+            ''', (first, last))
+
+            for row in c.fetchall():
+                battle = db.row_To_Battle(row)
+                anniversary = get_Anniversary(battle.date, year)
+
+                # Battles from the future, or from today, have nothing to remember yet
+                if anniversary.year > battle.date.year:
+                    upcoming.append((anniversary, anniversary.year - battle.date.year, battle))
+
+    return upcoming
+
+#-------------------------------------------------------------------------
+
+# Prints the upcoming anniversaries for the menu
+def display_Anniversaries():
+
+    print("\n")
+    print(db.get_Centered_String("UPCOMING ANNIVERSARIES"))
+    print("-" * db.TARGET_WIDTH)
+
+    entry = input(f"\nDays ahead (press ENTER for {ANNIVERSARY_DAYS}): ").strip()
+
+    try:
+        days = db.parse_Valid_Int(entry) if entry else ANNIVERSARY_DAYS
+    except ValueError:
+        print("\nInvalid number. Returning to menu.")
+        return
+
+    upcoming = get_Upcoming_Anniversaries(days)
+
+    if not upcoming:
+        print(f"\nNo anniversaries in the next {days} days.")
+        return
+
+    row_Format = "{:<16}{:>10}    {:<60}{:<40}{:<40}"
+
+    print()
+    print("=" * db.TARGET_WIDTH)
+    print(row_Format.format("ANNIVERSARY", "YEARS", "BATTLE NAME", "WINNER", "LOSER"))
+    print("-" * db.TARGET_WIDTH)
+
+    for anniversary, years, battle in upcoming:
+        print(row_Format.format(anniversary.isoformat(), f"{years:,}", battle.battleName, battle.winner, battle.loser))
+
+    print("=" * db.TARGET_WIDTH)
@@ -0,0 +1,376 @@
+#! /usr/bin/env/ python3
+
+import argparse
+import bz2
+import csv
+import gzip
+import io
+import json
+import lzma
+import os
+import struct
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass, field
+from datetime import date
+from typing import BinaryIO, Iterator
+
+import db
+from business import BATTLE_FIELDS, INT_FIELDS
+
+# pyarrow is optional. Without it the 'parquet' format isn't offered
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Rows pulled from the cursor at a time, and rows per block of a columnar file
+EXPORT_BATCH_SIZE = 50000
+
+# Columns written by every format, in this order
+EXPORT_FIELDS = ('id',) + BATTLE_FIELDS
+
+# Raw column values straight from the table, so dates stay as YYYY-MM-DD text
+EXPORT_SQL = "SELECT id, " + ", ".join(BATTLE_FIELDS) + " FROM battles WHERE id BETWEEN ? AND ? ORDER BY id"
+
+# Formats and the file extension each one gets
+EXPORT_FORMATS = {'csv': 'csv', 'jsonl': 'jsonl', 'columnar': 'btc'}
+if pyarrow is not None:
+    EXPORT_FORMATS['parquet'] = 'parquet'
+
+# Compression applied to the whole file: opener and the extra file extension
+# Parquet compresses inside the file instead, so it gets the name passed on to pyarrow
+# The levels trade a little size for a lot of speed (gzip level 9 and xz preset 6 were 2-4x slower)
+COMPRESSIONS = {
+    'none': (open, ''),
+    'gzip': (lambda path, mode: gzip.open(path, mode, compresslevel=6), '.gz'),
+    'bz2': (bz2.open, '.bz2'),
+    'xz': (lambda path, mode: lzma.open(path, mode, preset=1), '.xz'),
+}
+
+# Columnar file layout (all numbers little-endian):
+#   COLUMNAR_MAGIC, then blocks until the end of the file. Each block is
+#   row count (Q), then for each of EXPORT_FIELDS in order one column:
+#     a null bitmap of (rows + 7) // 8 bytes, bit i (i % 8 of byte i // 8) set if row i is NULL
+#     'q' int64 values, 'd' dates as int64 proleptic Gregorian ordinals, or
+#     's' strings as (rows + 1) int64 byte offsets followed by the UTF-8 text
+#   NULLs are written as 0 or an empty string. A date that isn't YYYY-MM-DD has no
+#   ordinal, so it is written as NULL too (csv and jsonl keep the text as it is)
+COLUMNAR_MAGIC = b"BATTLES2"
+
+# Files written before NULLs were recorded, read_Columnar() still reads them
+COLUMNAR_MAGIC_V1 = b"BATTLES1"
+COLUMN_TYPES = {name: 'q' for name in ('id',) + INT_FIELDS}
+COLUMN_TYPES['date'] = 'd'
+
+#-------------------------------------------------------------------------
+
+# Summary of a finished export run
+@dataclass
+class Export_Report:
+    rows_Exported: int
+    seconds: float
+    paths: list[str] = field(default_factory=list)
+
+    @property
+    def rows_Per_Second(self) -> float:
+        if self.seconds <= 0:
+            return 0.0
+        return self.rows_Exported / self.seconds
+
+#-------------------------------------------------------------------------
+
+# Splits the table into at most shard_Count id ranges holding about the same number of rows
+# Returns a list of (first id, last id) pairs, worked out in one pass over the primary key
+def get_Id_Ranges(shard_Count: int) -> list[tuple[int, int]]:
+
+    with db.read_Connection() as reader, closing(reader.cursor()) as c:
+        c.execute('''
+            SELECT MIN(id), MAX(id) FROM (
+                SELECT id, NTILE(?) OVER (ORDER BY id) AS shard FROM battles
+            )
+            GROUP BY shard
+            ORDER BY shard
+        ''', (shard_Count,))
+        return [tuple(row) for row in c.fetchall()]
+
+#-------------------------------------------------------------------------
+
+# Streams the raw rows with ids from low to high from a connection
+def iter_Rows(connection, low: int, high: int) -> Iterator[tuple]:
+    with closing(connection.cursor()) as c:
+        c.row_factory = None
+        c.execute(EXPORT_SQL, (low, high))
+
+        while True:
+            rows = c.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            yield from rows
+
+#-------------------------------------------------------------------------
+
+# Writes rows as CSV with a header line
+def write_Csv(rows: Iterator[tuple], out: BinaryIO) -> int:
+    text = io.TextIOWrapper(out, encoding='utf-8', newline='')
+    writer = csv.writer(text, lineterminator="\n")
+    writer.writerow(EXPORT_FIELDS)
+
+    count = 0
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+
+    # Leaves the underlying file for the caller to close
+    text.flush()
+    text.detach()
+    return count
+
+# Writes rows as JSON Lines, one object per battle
+def write_Jsonl(rows: Iterator[tuple], out: BinaryIO) -> int:
+    text = io.TextIOWrapper(out, encoding='utf-8')
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+
+    count = 0
+    for count, row in enumerate(rows, 1):
+        text.write(encode(dict(zip(EXPORT_FIELDS, row))) + "\n")
+
+    text.flush()
+    text.detach()
+    return count
+
+#-------------------------------------------------------------------------
+
+# Writes rows in the columnar layout described at COLUMNAR_MAGIC, one block per batch
+def write_Columnar(rows: Iterator[tuple], out: BinaryIO) -> int:
+    out.write(COLUMNAR_MAGIC)
+
+    count = 0
+    batch = []
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) == EXPORT_BATCH_SIZE:
+            write_Columnar_Block(batch, out)
+            count += len(batch)
+            batch = []
+
+    if batch:
+        write_Columnar_Block(batch, out)
+        count += len(batch)
+
+    return count
+
+# Returns the ordinal of a YYYY-MM-DD date, or None if it is NULL or in any other form
+def get_Ordinal(value: str | None) -> int | None:
+    try:
+        return date.fromisoformat(value).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+# Returns the null bitmap of a column, bit i set where values[i] is None
+def get_Null_Bitmap(values) -> bytearray:
+    bitmap = bytearray((len(values) + 7) // 8)
+
+    for i, value in enumerate(values):
+        if value is None:
+            bitmap[i >> 3] |= 1 << (i & 7)
+
+    return bitmap
+
+# Writes one block of rows, column after column
+def write_Columnar_Block(rows: list[tuple], out: BinaryIO):
+    out.write(struct.pack('<Q', len(rows)))
+
+    # zip(*rows) turns the rows into one tuple per column
+    for name, values in zip(EXPORT_FIELDS, zip(*rows)):
+        column_Type = COLUMN_TYPES.get(name, 's')
+
+        if column_Type == 'd':
+            values = [get_Ordinal(value) for value in values]
+
+        out.write(get_Null_Bitmap(values))
+
+        if column_Type in ('q', 'd'):
+            numbers = array('q', (0 if value is None else value for value in values))
+        else:
+            encoded = [(value or "").encode('utf-8') for value in values]
+            numbers = array('q', [0])
+            total = 0
+            for text in encoded:
+                total += len(text)
+                numbers.append(total)
+
+        if sys.byteorder != 'little':
+            numbers.byteswap()
+        out.write(numbers.tobytes())
+
+        if column_Type == 's':
+            out.write(b"".join(encoded))
+
+# Reads a columnar file back, one dictionary of column name -> list of values per block
+# NULLs come back as None
+def read_Columnar(source: BinaryIO) -> Iterator[dict]:
+    magic = source.read(len(COLUMNAR_MAGIC))
+    if magic not in (COLUMNAR_MAGIC, COLUMNAR_MAGIC_V1):
+        raise ValueError("Not a battle columnar file.")
+
+    while True:
+        header = source.read(8)
+        if not header:
+            break
+        (rows,) = struct.unpack('<Q', header)
+        block = {}
+
+        for name in EXPORT_FIELDS:
+            column_Type = COLUMN_TYPES.get(name, 's')
+            bitmap = source.read((rows + 7) // 8) if magic == COLUMNAR_MAGIC else bytes((rows + 7) // 8)
+
+            numbers = array('q')
+            numbers.frombytes(source.read(8 * (rows if column_Type != 's' else rows + 1)))
+            if sys.byteorder != 'little':
+                numbers.byteswap()
+
+            if column_Type == 'q':
+                values = numbers.tolist()
+            elif column_Type == 'd':
+                values = [date.fromordinal(value) if value > 0 else None for value in numbers]
+            else:
+                text = source.read(numbers[-1])
+                values = [text[numbers[i]:numbers[i + 1]].decode('utf-8') for i in range(rows)]
+
+            block[name] = [None if bitmap[i >> 3] >> (i & 7) & 1 else value for i, value in enumerate(values)]
+
+        yield block
+
+#-------------------------------------------------------------------------
+
+# Writes rows to a Parquet file with pyarrow, compressing inside the file
+def write_Parquet(rows: Iterator[tuple], path: str, compression: str) -> int:
+    schema = pyarrow.schema([
+        (name, pyarrow.int64() if COLUMN_TYPES.get(name) == 'q' else pyarrow.string())
+        for name in EXPORT_FIELDS
+    ])
+    count = 0
+
+    with pyarrow.parquet.ParquetWriter(path, schema, compression=None if compression == 'none' else compression) as writer:
+        while True:
+            batch = [row for _, row in zip(range(EXPORT_BATCH_SIZE), rows)]
+            if not batch:
+                break
+            columns = [list(values) for values in zip(*batch)]
+            writer.write_table(pyarrow.Table.from_arrays(columns, schema=schema))
+            count += len(batch)
+
+    return count
+
+#-------------------------------------------------------------------------
+
+# Writers for the formats that are compressed as a whole file
+WRITERS = {'csv': write_Csv, 'jsonl': write_Jsonl, 'columnar': write_Columnar}
+
+# Returns the file name a shard is written to
+def get_Shard_Path(folder: str, number: int, file_Format: str, compression: str) -> str:
+    name = f"battles-{number:04d}.{EXPORT_FORMATS[file_Format]}"
+    if file_Format != 'parquet':
+        name += COMPRESSIONS[compression][1]
+    return os.path.join(folder, name)
+
+#-------------------------------------------------------------------------
+
+# Exports the rows with ids from low to high into one file and returns (path, rows written).
+# Runs in a worker process, so it opens its own read-only connection to db_File
+def export_Shard(db_File: str, low: int, high: int, path: str, file_Format: str, compression: str) -> tuple[str, int]:
+    # db.DB_FILE is left alone, a shard run in this process mustn't repoint the program's own connections
+    with closing(db.open_Connection(read_Only=True, db_File=db_File)) as reader:
+        # One read transaction, so the shard is a consistent snapshot even while others write
+        reader.execute("BEGIN")
+        rows = iter_Rows(reader, low, high)
+
+        if file_Format == 'parquet':
+            return path, write_Parquet(rows, path, compression)
+
+        opener = COMPRESSIONS[compression][0]
+        with opener(path, 'wb') as out:
+            return path, WRITERS[file_Format](rows, out)
+
+#-------------------------------------------------------------------------
+
+# Exports the whole battles table into a folder of shard files written in parallel.
+# The table is split into id ranges with about the same number of rows, and a pool of
+# worker processes writes one shard each, so the work isn't limited to one Python thread.
+# A manifest.json listing the shards and their row counts is written last.
+def export_Battles(folder: str, file_Format: str = 'jsonl', compression: str = 'none',
+                   workers: int | None = None, shard_Count: int | None = None, report=print) -> Export_Report:
+
+    if file_Format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{file_Format}'. Choose from {', '.join(EXPORT_FORMATS)}.")
+
+    if file_Format != 'parquet' and compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}'. Choose from {', '.join(COMPRESSIONS)}.")
+
+    if db.DB_FILE == ":memory:":
+        raise ValueError("An in-memory database can't be shared with export workers.")
+
+    workers = workers or os.cpu_count() or 1
+    shard_Count = shard_Count or workers
+
+    os.makedirs(folder, exist_ok=True)
+    start_Time = time.perf_counter()
+
+    tasks = [
+        (os.path.abspath(db.DB_FILE), low, high, get_Shard_Path(folder, number, file_Format, compression),
+         file_Format, compression)
+        for number, (low, high) in enumerate(get_Id_Ranges(shard_Count), 1)
+    ]
+
+    if workers == 1 or len(tasks) <= 1:
+        results = [export_Shard(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = list(pool.map(export_Shard, *zip(*tasks)))
+
+    export_Report = Export_Report(sum(rows for _, rows in results), time.perf_counter() - start_Time,
+                                  [path for path, _ in results])
+
+    manifest = {
+        'format': file_Format,
+        'compression': compression,
+        'fields': list(EXPORT_FIELDS),
+        'rows': export_Report.rows_Exported,
+        'shards': [{'path': os.path.basename(path), 'rows': rows} for path, rows in results],
+    }
+    with open(os.path.join(folder, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    report(f"Exported {export_Report.rows_Exported:,} rows into {len(results)} shards in "
+           f"{export_Report.seconds:.2f} seconds ({export_Report.rows_Per_Second:,.0f} rows/sec).")
+
+    return export_Report
+
+#-------------------------------------------------------------------------
+
+# Non-interactive entry point for exports
+# Example: python export.py exports/ --format columnar --compression gzip --workers 8
+def main(argv: list[str] | None = None):
+
+    parser = argparse.ArgumentParser(description="Export every battle into a folder of shard files.")
+    parser.add_argument('folder', help="folder the shards and manifest.json are written to")
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='jsonl')
+    parser.add_argument('--compression', default='none',
+                        help=f"{', '.join(COMPRESSIONS)} (Parquet: any codec pyarrow supports)")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per core)")
+    parser.add_argument('--shards', type=int, help="number of shard files (default: one per worker)")
+
+    args = parser.parse_args(argv)
+
+    try:
+        export_Battles(args.folder, args.format, args.compression, args.workers, args.shards)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"Export failed: {e}\n")
+
+if __name__ == "__main__":
+    main()
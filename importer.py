@@ -0,0 +1,245 @@
+#! /usr/bin/env/ python3
+
+import argparse
+import csv
+import json
+import os
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from itertools import islice
+from typing import Iterable, Iterator
+
+import db
+import pipeline
+from validation import record_To_Battle
+
+# Number of rows written per transaction
+IMPORT_BATCH_SIZE = 5000
+
+# Records validated together, by one worker process in a parallel import
+CHUNK_SIZE = 1000
+
+#-------------------------------------------------------------------------
+
+# Summary of a finished import run
+@dataclass
+class Import_Report:
+    rows_Imported: int
+    rows_Skipped: int
+    rows_Resumed: int
+    seconds: float
+
+    @property
+    def rows_Per_Second(self) -> float:
+        if self.seconds <= 0:
+            return 0.0
+        return self.rows_Imported / self.seconds
+
+#-------------------------------------------------------------------------
+
+# Works out whether a file is CSV or JSON Lines from its extension
+def get_File_Format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+
+    raise ValueError(f"Can't tell the format of '{path}'. Use a .csv or .jsonl file or pass a format.")
+
+#-------------------------------------------------------------------------
+
+# Streams raw records (dictionaries) out of a CSV or JSON Lines file one at a time
+# With decode=False, JSON Lines records are left as their line of text for decode_Record
+def read_Records(path: str, file_Format: str | None = None, decode: bool = True) -> Iterator[dict | str]:
+    file_Format = file_Format or get_File_Format(path)
+
+    with open(path, newline='', encoding='utf-8') as f:
+        if file_Format == 'csv':
+            # The header row supplies the field names
+            yield from csv.DictReader(f)
+
+        elif file_Format == 'jsonl':
+            for line in f:
+                # Skips blank lines such as a trailing newline at the end of the file
+                if not line.strip():
+                    continue
+                yield decode_Record(line) if decode else line
+
+        else:
+            raise ValueError(f"Unknown import format '{file_Format}'.")
+
+# Turns a line of JSON into a dictionary, anything else is passed through
+def decode_Record(record: dict | str) -> dict | None:
+    if not isinstance(record, str):
+        return record
+
+    try:
+        return json.loads(record)
+    except ValueError:
+        # Passed on so the bad line is reported like any other invalid record
+        return None
+
+#-------------------------------------------------------------------------
+
+# Groups records into (first record number, records) chunks of chunk_Size,
+# leaving out the first skip records
+def iter_Chunks(records: Iterable, chunk_Size: int = CHUNK_SIZE, skip: int = 0) -> Iterator[tuple[int, list]]:
+    records = iter(records)
+
+    # Records already saved by an earlier run are read past without being checked
+    for _ in islice(records, skip):
+        pass
+
+    first_Number = skip + 1
+    while chunk := list(islice(records, chunk_Size)):
+        yield first_Number, chunk
+        first_Number += len(chunk)
+
+# Validates one chunk of records and builds the rows to insert, for a worker process
+# Returns (number of the chunk's last record, rows, [(record number, problem), ...])
+def check_Chunk(chunk: tuple[int, list]) -> tuple[int, list[tuple], list[tuple[int, str]]]:
+    first_Number, records = chunk
+    rows = []
+    problems = []
+
+    for record_Number, record in enumerate(records, first_Number):
+        try:
+            rows.append(db.get_Insert_Values(record_To_Battle(decode_Record(record))))
+        except ValueError as e:
+            problems.append((record_Number, str(e)))
+
+    return first_Number + len(records) - 1, rows, problems
+
+#-------------------------------------------------------------------------
+
+# Creates the table that remembers how far each import got
+def ensure_Progress_Table():
+    db.connect()
+
+    db.conn.execute('''
+        CREATE TABLE IF NOT EXISTS import_progress (
+            source TEXT PRIMARY KEY,
+            recordsDone INTEGER NOT NULL
+        )
+    ''')
+    db.conn.commit()
+
+#-------------------------------------------------------------------------
+
+# Returns how many records of the given file were already committed by an earlier run
+def get_Records_Done(source: str) -> int:
+    with closing(db.conn.cursor()) as c:
+        c.execute("SELECT recordsDone FROM import_progress WHERE source = ?", (source,))
+        row = c.fetchone()
+
+    return row[0] if row else 0
+
+#-------------------------------------------------------------------------
+
+# Saves a batch of battles and the new progress count in the same transaction,
+# so a crash can never leave rows saved without the progress that covers them
+def commit_Batch(batch: list[tuple], source: str, records_Done: int):
+    db.insert_Rows(batch, commit=False)
+
+    db.conn.execute(
+        "INSERT OR REPLACE INTO import_progress (source, recordsDone) VALUES (?, ?)",
+        (source, records_Done)
+    )
+    db.conn.commit()
+
+#-------------------------------------------------------------------------
+
+# Imports every record of a CSV or JSON Lines file into the battles table.
+# Rows are inserted with executemany, about batch_Size rows per transaction.
+# With resume=True, records committed by an earlier failed run are skipped.
+# With skip_Invalid=True, bad records are reported and skipped instead of stopping the import.
+# With more than one worker, records are validated in that many processes while this
+# process writes, through pipeline.map_Ordered, so only this process touches the database.
+def import_Battles(path: str, file_Format: str | None = None, batch_Size: int = IMPORT_BATCH_SIZE,
+                   resume: bool = False, skip_Invalid: bool = False, report=print,
+                   workers: int = 1) -> Import_Report:
+
+    ensure_Progress_Table()
+
+    source = os.path.abspath(path)
+    rows_Resumed = get_Records_Done(source) if resume else 0
+
+    if rows_Resumed:
+        report(f"Resuming '{path}' after record {rows_Resumed:,}.")
+
+    rows_Imported = 0
+    rows_Skipped = 0
+    batch = []
+    record_Number = rows_Resumed
+    start_Time = time.perf_counter()
+
+    # Workers decode the JSON themselves, it costs more than sending them the line
+    chunks = iter_Chunks(read_Records(path, file_Format, decode=workers <= 1),
+                         min(CHUNK_SIZE, batch_Size), rows_Resumed)
+
+    try:
+        with closing(pipeline.map_Ordered(check_Chunk, chunks, workers)) as results:
+            for record_Number, rows, problems in results:
+
+                for problem_Number, problem in problems:
+                    if not skip_Invalid:
+                        raise ValueError(f"Record {problem_Number}: {problem}")
+                    report(f"Skipping record {problem_Number}: {problem}")
+                    rows_Skipped += 1
+
+                batch.extend(rows)
+
+                if len(batch) >= batch_Size:
+                    commit_Batch(batch, source, record_Number)
+                    rows_Imported += len(batch)
+                    batch = []
+
+                    elapsed = time.perf_counter() - start_Time
+                    report(f"{rows_Imported:,} rows imported ({rows_Imported / elapsed:,.0f} rows/sec)")
+
+        # Saves whatever is left over in the last, partly filled batch
+        commit_Batch(batch, source, record_Number)
+        rows_Imported += len(batch)
+
+    except Exception:
+        # Anything not committed is thrown away so the progress count stays accurate
+        db.conn.rollback()
+        raise
+
+    # The import finished, so there is nothing to resume
+    db.conn.execute("DELETE FROM import_progress WHERE source = ?", (source,))
+    db.conn.commit()
+
+    import_Report = Import_Report(rows_Imported, rows_Skipped, rows_Resumed, time.perf_counter() - start_Time)
+    report(f"Imported {import_Report.rows_Imported:,} rows in {import_Report.seconds:.2f} seconds "
+           f"({import_Report.rows_Per_Second:,.0f} rows/sec), skipped {import_Report.rows_Skipped:,}.")
+
+    return import_Report
+
+#-------------------------------------------------------------------------
+
+# Non-interactive entry point for loading datasets
+# Example: python importer.py battles.csv --resume --workers 4
+def main(argv: list[str] | None = None):
+
+    parser = argparse.ArgumentParser(description="Bulk import battles from a CSV or JSON Lines file.")
+    parser.add_argument('path', help="CSV or JSON Lines file to import")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help="file format (default: from the extension)")
+    parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help="rows per transaction")
+    parser.add_argument('--resume', action='store_true', help="continue a previous import that failed")
+    parser.add_argument('--skip-invalid', action='store_true', help="skip bad records instead of stopping")
+    parser.add_argument('--workers', type=int, default=1, help="processes validating records (default: 1)")
+
+    args = parser.parse_args(argv)
+
+    try:
+        import_Battles(args.path, args.format, args.batch_size, args.resume, args.skip_invalid,
+                       workers=args.workers)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"Import failed: {e}\n")
+
+if __name__ == "__main__":
+    main()
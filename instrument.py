@@ -0,0 +1,278 @@
+#! /usr/bin/env/ python3
+
+import math
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Nothing is recorded unless enable() has been called
+# Every hook checks this first, so the cost while disabled is one attribute lookup
+enabled = False
+
+# Where recorded events are sent
+sinks = []
+
+# Whether new connections get the sqlite3 trace and progress callbacks
+trace_Enabled = False
+
+# Connections that have the sqlite3 trace and progress callbacks attached
+traced_Connections = []
+
+# How many SQLite virtual machine steps happen between progress callbacks
+PROGRESS_STEPS = 1000
+
+# Longest statement text kept in an event
+STATEMENT_LENGTH = 120
+
+#-------------------------------------------------------------------------
+
+# Keeps a histogram of durations for every statement and phase, in memory
+# Buckets are powers of two in microseconds, so percentiles are upper bounds
+class Histogram_Sink:
+
+    def __init__(self):
+        self.stats = {}
+
+    def record(self, kind: str, name: str, seconds: float, rows: int | None):
+        key = (kind, name)
+        stat = self.stats.get(key)
+
+        if stat is None:
+            stat = self.stats[key] = {'count': 0, 'seconds': 0.0, 'max': 0.0, 'rows': 0, 'buckets': {}}
+
+        stat['count'] += 1
+        stat['seconds'] += seconds
+        stat['max'] = max(stat['max'], seconds)
+        stat['rows'] += rows or 0
+
+        bucket = max(0, math.ceil(math.log2(max(seconds * 1_000_000, 1))))
+        stat['buckets'][bucket] = stat['buckets'].get(bucket, 0) + 1
+
+    # Returns the upper bound in milliseconds below which the given share of calls finished
+    def get_Percentile(self, stat: dict, percentile: float) -> float:
+        target = stat['count'] * percentile / 100
+        seen = 0
+
+        for bucket in sorted(stat['buckets']):
+            seen += stat['buckets'][bucket]
+            if seen >= target:
+                return (2 ** bucket) / 1000
+
+        return stat['max'] * 1000
+
+    # Returns one summary row per statement or phase, slowest total first
+    def summary(self) -> list[dict]:
+        rows = []
+
+        for (kind, name), stat in self.stats.items():
+            rows.append({
+                'kind': kind,
+                'name': name,
+                'count': stat['count'],
+                'total_ms': stat['seconds'] * 1000,
+                'mean_ms': stat['seconds'] * 1000 / stat['count'],
+                'p50_ms': self.get_Percentile(stat, 50),
+                'p99_ms': self.get_Percentile(stat, 99),
+                'max_ms': stat['max'] * 1000,
+                'rows': stat['rows'],
+            })
+
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def clear(self):
+        self.stats.clear()
+
+#-------------------------------------------------------------------------
+
+# Appends one tab separated line per event to a log file
+class Log_File_Sink:
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'a', encoding='utf-8', buffering=1)
+
+    def record(self, kind: str, name: str, seconds: float, rows: int | None):
+        rows_Text = "" if rows is None else str(rows)
+        self.file.write(f"{datetime.now().isoformat()}\t{kind}\t{seconds * 1000:.3f}ms\t{rows_Text}\t{name}\n")
+
+    def close(self):
+        self.file.close()
+
+#-------------------------------------------------------------------------
+
+# Sends one event to every sink
+def record(kind: str, name: str, seconds: float, rows: int | None = None):
+    for sink in sinks:
+        sink.record(kind, name, seconds, rows)
+
+# Shortens a statement to one line so the same query always gets the same name
+def get_Statement_Name(sql: str) -> str:
+    return " ".join(sql.split())[:STATEMENT_LENGTH]
+
+#-------------------------------------------------------------------------
+
+# Times a Python-side phase such as row decoding, sorting or rendering
+#
+#     with instrument.phase("sort"):
+#         ...
+@contextmanager
+def phase(name: str, rows: int | None = None):
+    start = time.perf_counter()
+    yield
+    record('phase', name, time.perf_counter() - start, rows)
+
+#-------------------------------------------------------------------------
+
+# Cursor that times every statement it runs and counts the rows it touches
+class Traced_Cursor(sqlite3.Cursor):
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        # rowcount is -1 for SELECT, the rows are counted as they are fetched instead
+        rows = self.rowcount if self.rowcount >= 0 else None
+        record('sql', get_Statement_Name(sql), time.perf_counter() - start, rows)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        record('sql', get_Statement_Name(sql), time.perf_counter() - start, self.rowcount)
+        return self
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        record('fetch', "fetchone", time.perf_counter() - start, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        record('fetch', "fetchmany", time.perf_counter() - start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        record('fetch', "fetchall", time.perf_counter() - start, len(rows))
+        return rows
+
+#-------------------------------------------------------------------------
+
+# Connection whose cursors are traced while instrumentation is enabled
+# db.open_Connection creates every connection with this class
+class Traced_Connection(sqlite3.Connection):
+
+    def cursor(self, factory=sqlite3.Cursor):
+        if enabled and factory is sqlite3.Cursor:
+            factory = Traced_Cursor
+        return super().cursor(factory)
+
+#-------------------------------------------------------------------------
+
+# Counts every statement SQLite runs, including the ones run by triggers
+def trace_Statement(statement: str):
+    record('trace', get_Statement_Name(statement), 0.0)
+
+# Called every PROGRESS_STEPS virtual machine steps of a running statement
+def count_Progress() -> int:
+    record('progress', f"{PROGRESS_STEPS} vm steps", 0.0)
+    return 0 # Returning non-zero would cancel the statement
+
+# Hooks the sqlite3 trace and progress callbacks onto a connection
+def attach(connection: sqlite3.Connection):
+    connection.set_trace_callback(trace_Statement)
+    connection.set_progress_handler(count_Progress, PROGRESS_STEPS)
+    traced_Connections.append(connection)
+
+# Removes the callbacks from every connection they were attached to
+def detach_All():
+    for connection in traced_Connections:
+        try:
+            connection.set_trace_callback(None)
+            connection.set_progress_handler(None, 0)
+        except sqlite3.ProgrammingError:
+            pass # The connection was closed already
+    traced_Connections.clear()
+
+#-------------------------------------------------------------------------
+
+# Starts recording to the given sinks, or to a new Histogram_Sink if none are given
+# With trace_Callbacks=True the sqlite3 trace and progress callbacks are also attached
+# to connections as they are opened (see db.open_Connection)
+def enable(*new_Sinks, trace_Callbacks: bool = False):
+    global enabled, trace_Enabled
+
+    sinks.extend(new_Sinks or [Histogram_Sink()])
+    trace_Enabled = trace_Callbacks
+    enabled = True
+
+# Stops recording and removes every sink
+def disable():
+    global enabled, trace_Enabled
+
+    enabled = False
+    trace_Enabled = False
+    detach_All()
+
+    for sink in sinks:
+        if hasattr(sink, 'close'):
+            sink.close()
+    sinks.clear()
+
+#-------------------------------------------------------------------------
+
+# Returns the first Histogram_Sink being recorded to, if there is one
+def get_Histogram() -> Histogram_Sink | None:
+    return next((sink for sink in sinks if isinstance(sink, Histogram_Sink)), None)
+
+#-------------------------------------------------------------------------
+
+# Shows the recorded statistics and lets the user turn recording on or off
+def display_Stats(width: int = 226):
+
+    print("\n")
+    print("PERFORMANCE STATS".center(width))
+    print("-" * width)
+
+    print(f"\nRecording is {'ON' if enabled else 'OFF'}.")
+
+    histogram = get_Histogram()
+
+    if histogram is not None and histogram.stats:
+        row_Format = "{:<8} {:<120} {:>8} {:>12} {:>10} {:>10} {:>10} {:>10}"
+
+        print()
+        print("=" * width)
+        print(row_Format.format("KIND", "STATEMENT / PHASE", "COUNT", "TOTAL MS", "MEAN MS", "P50 MS", "P99 MS", "ROWS"))
+        print("-" * width)
+
+        for row in histogram.summary():
+            print(row_Format.format(
+                row['kind'], row['name'], f"{row['count']:,}", f"{row['total_ms']:,.2f}",
+                f"{row['mean_ms']:.3f}", f"{row['p50_ms']:.3f}", f"{row['p99_ms']:.3f}", f"{row['rows']:,}"
+            ))
+
+        print("=" * width)
+
+    elif enabled:
+        print("\nNothing recorded yet.")
+
+    print("\n1. Turn recording on")
+    print("2. Turn recording off")
+    print("3. Clear recorded stats")
+    print("0. Return to menu\n")
+
+    choice = input("Enter number: ").strip()
+
+    if choice == '1' and not enabled:
+        enable()
+        print("\nRecording turned on.")
+    elif choice == '2':
+        disable()
+        print("\nRecording turned off.")
+    elif choice == '3' and histogram is not None:
+        histogram.clear()
+        print("\nStats cleared.")
@@ -0,0 +1,467 @@
+#! /usr/bin/env/ python3
+
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+import participants
+import summary
+import trigrams
+from business import FIRST_ID, normalize_Name
+
+# Versioned schema changes for the battle database.
+#
+# PRAGMA user_version holds the number of the last migration applied. connect() runs
+# every newer one in order, so the schema only ever moves forward. Each migration is a
+# list of steps:
+#
+#   schema steps    CREATE / ALTER statements, run in one short transaction each
+#   backfills       generators that fill in existing rows one batch at a time and yield
+#                   after each batch, which is committed before the next one starts
+#
+# Other programs can keep reading and writing between batches, so a large table is
+# never locked for the whole backfill. Every step is safe to run again: objects are
+# created IF NOT EXISTS and backfills only touch rows that still need it. A migration
+# that stopped halfway (or ran against a database made before versions were tracked)
+# just picks up where it left off. The version is bumped once all its steps are done.
+
+# Rows filled in per backfill transaction
+MIGRATION_BATCH_SIZE = 5000
+
+# Battles copied into the scratch database used by dry runs
+ESTIMATE_SAMPLE_ROWS = 2000
+
+# Text columns covered by the full-text search index
+SEARCH_COLUMNS = (
+    'battleName', 'countriesInvolved', 'winner', 'loser',
+    'significantFiguresPresent', 'notableDeaths'
+)
+
+#-------------------------------------------------------------------------
+
+# One step of a migration, see the notes at the top
+@dataclass(frozen=True)
+class Step:
+    run: Callable
+    is_Backfill: bool = False
+
+# A numbered schema change
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    steps: tuple[Step, ...]
+
+#-------------------------------------------------------------------------
+
+# Starts a new database off with the original table
+def create_Battles_Table(c):
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS battles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, battleName TEXT, date TEXT,
+            countriesInvolved TEXT, winner TEXT, loser TEXT, victorForces INTEGER,
+            vanquishedForces INTEGER, totalVictorDeaths INTEGER,
+            totalVanquishedDeaths INTEGER, significantFiguresPresent TEXT, notableDeaths TEXT
+        )
+    ''')
+
+#-------------------------------------------------------------------------
+
+# Stored normalized name so lookups don't have to call .title() on every row
+def add_Name_Key_Column(c):
+    c.execute("PRAGMA table_info(battles)")
+    columns = [row[1] for row in c.fetchall()]
+
+    if 'battleNameKey' not in columns:
+        c.execute("ALTER TABLE battles ADD COLUMN battleNameKey TEXT")
+
+# Fills in keys for rows that were saved without one (older rows or other programs)
+def fill_Name_Keys(c, batch_Size: int) -> Iterator[int]:
+    after_Id = FIRST_ID
+
+    while True:
+        c.execute("SELECT id, battleName FROM battles WHERE id > ? AND battleNameKey IS NULL ORDER BY id LIMIT ?",
+                  (after_Id, batch_Size))
+        rows = c.fetchall()
+
+        if not rows:
+            return
+
+        c.executemany("UPDATE battles SET battleNameKey = ? WHERE id = ?",
+                      [(normalize_Name(name), db_id) for db_id, name in rows])
+        after_Id = rows[-1][0]
+        yield after_Id
+
+def create_Name_Key_Index(c):
+    c.execute("CREATE INDEX IF NOT EXISTS idx_battles_nameKey ON battles (battleNameKey, id)")
+
+#-------------------------------------------------------------------------
+
+# Lets the sorted views read battles in date order straight off the index
+def create_Date_Index(c):
+    c.execute("CREATE INDEX IF NOT EXISTS idx_battles_date ON battles (date, id)")
+
+#-------------------------------------------------------------------------
+
+# Month and day of a battle date, 'MM-DD', for anniversary lookups
+# Queries must spell it exactly like this for SQLite to use the index
+MONTH_DAY_SQL = "substr(date, 6, 5)"
+
+# Lets anniversaries be found by month and day without reading every battle
+def create_Month_Day_Index(c):
+    c.execute(f"CREATE INDEX IF NOT EXISTS idx_battles_month_day ON battles ({MONTH_DAY_SQL}, date)")
+
+#-------------------------------------------------------------------------
+
+# Creates the FTS5 full-text index over the text columns and the triggers that keep it in sync
+# The index stores no copy of the text itself (content='battles'), only the search terms
+def create_Search_Index(c):
+
+    c.execute("SELECT 1 FROM sqlite_master WHERE name = 'battles_fts'")
+    is_New = c.fetchone() is None
+
+    text_Columns = ", ".join(SEARCH_COLUMNS)
+    new_Values = ", ".join("new." + column for column in SEARCH_COLUMNS)
+    old_Values = ", ".join("old." + column for column in SEARCH_COLUMNS)
+
+    c.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS battles_fts USING fts5(
+            {text_Columns}, content='battles', content_rowid='id'
+        )
+    ''')
+
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS battles_fts_insert AFTER INSERT ON battles BEGIN
+            INSERT INTO battles_fts (rowid, {text_Columns}) VALUES (new.id, {new_Values});
+        END
+    ''')
+
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS battles_fts_delete AFTER DELETE ON battles BEGIN
+            INSERT INTO battles_fts (battles_fts, rowid, {text_Columns}) VALUES ('delete', old.id, {old_Values});
+        END
+    ''')
+
+    # Only fires when one of the searchable columns changes
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS battles_fts_update AFTER UPDATE OF {text_Columns} ON battles BEGIN
+            INSERT INTO battles_fts (battles_fts, rowid, {text_Columns}) VALUES ('delete', old.id, {old_Values});
+            INSERT INTO battles_fts (rowid, {text_Columns}) VALUES (new.id, {new_Values});
+        END
+    ''')
+
+    # Indexes the rows that were saved before the search index existed
+    # This stays in the same transaction as the triggers: a row changed in between
+    # would have its old terms removed from an index that never had them
+    if is_New:
+        c.execute("INSERT INTO battles_fts (battles_fts) VALUES ('rebuild')")
+
+#-------------------------------------------------------------------------
+
+# Creates the battle_changes table and the triggers that fill it
+# Every update or delete of a battle, from this program or any other, stamps the battle's
+# id with the next sequence number. Only the latest change per battle is kept, so the
+# table never holds more than one row per battle. Inserts aren't logged because a new
+# row can't be in anyone's cache yet
+def create_Change_Log(c):
+
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS battle_changes (
+            battleId INTEGER PRIMARY KEY,
+            seq INTEGER NOT NULL
+        )
+    ''')
+
+    c.execute("CREATE INDEX IF NOT EXISTS idx_battle_changes_seq ON battle_changes (seq)")
+
+    next_Seq = "(SELECT IFNULL(MAX(seq), 0) + 1 FROM battle_changes)"
+
+    for event in ('UPDATE', 'DELETE'):
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS battles_log_{event.lower()} AFTER {event} ON battles BEGIN
+                INSERT OR REPLACE INTO battle_changes (battleId, seq) VALUES (old.id, {next_Seq});
+            END
+        ''')
+
+#-------------------------------------------------------------------------
+
+# Serve query.Battle_Query: a side plus a date range, or a force threshold
+def create_Query_Indexes(c):
+    c.execute("CREATE INDEX IF NOT EXISTS idx_battles_winner_date ON battles (winner, date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_battles_loser_date ON battles (loser, date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_battles_victorForces ON battles (victorForces)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_battles_vanquishedForces ON battles (vanquishedForces)")
+
+#-------------------------------------------------------------------------
+
+# Every migration, oldest first. Versions must count up from 1 with no gaps
+# New schema changes go at the end, released migrations are never edited
+MIGRATIONS = (
+    Migration(1, "Create the battles table", (
+        Step(create_Battles_Table),
+    )),
+    Migration(2, "Add normalized battle names for lookups", (
+        Step(add_Name_Key_Column),
+        Step(fill_Name_Keys, is_Backfill=True),
+        Step(create_Name_Key_Index),
+    )),
+    Migration(3, "Index battle dates", (
+        Step(create_Date_Index),
+    )),
+    Migration(4, "Add the full-text search index", (
+        Step(create_Search_Index),
+    )),
+    Migration(5, "Add the battle change log", (
+        Step(create_Change_Log),
+    )),
+    Migration(6, "Index winners, losers and forces", (
+        Step(create_Query_Indexes),
+    )),
+    # The reverse indexes come after the backfill so SQLite builds them in one sorted pass
+    Migration(7, "Add country and participant tables", (
+        Step(participants.create_Participant_Tables),
+        Step(participants.iter_Missing_Syncs, is_Backfill=True),
+        Step(participants.create_Participant_Indexes),
+    )),
+    Migration(8, "Add the trigram index over battle names", (
+        Step(trigrams.create_Trigram_Tables),
+        Step(trigrams.iter_Missing_Names, is_Backfill=True),
+        Step(trigrams.create_Trigram_Index),
+    )),
+    Migration(9, "Add the trigger-maintained summary totals", (
+        Step(summary.create_Summary_Tables),
+        Step(summary.iter_Backfill, is_Backfill=True),
+    )),
+    Migration(10, "Index battle anniversaries by month and day", (
+        Step(create_Month_Day_Index),
+    )),
+    Migration(11, "Let the summary totals be backfilled in batches", (
+        Step(summary.replace_Summary_Triggers),
+    )),
+)
+
+# db.ensure_Schema() only loads the migrations when a database is older than this
+LATEST_VERSION = MIGRATIONS[-1].version
+
+#-------------------------------------------------------------------------
+
+# Returns the schema version stored in the database
+def get_Version(connection: sqlite3.Connection) -> int:
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+# Returns the migrations a database at the given version still needs
+def get_Pending(version: int) -> list[Migration]:
+    return [migration for migration in MIGRATIONS if migration.version > version]
+
+#-------------------------------------------------------------------------
+
+# Runs one migration's steps, committing after each schema step and each backfill batch
+def apply_Migration(connection: sqlite3.Connection, migration: Migration,
+                    batch_Size: int = MIGRATION_BATCH_SIZE, report=None):
+
+    with closing(connection.cursor()) as c:
+        # Plain tuples, whatever the connection's row factory is
+        c.row_factory = None
+
+        for step in migration.steps:
+            if not step.is_Backfill:
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    step.run(c)
+                except Exception:
+                    connection.rollback()
+                    raise
+                connection.commit()
+                continue
+
+            # Progress is measured by how far through the id range the backfill has got
+            c.execute("SELECT MIN(id), MAX(id) FROM battles")
+            first_Id, last_Id = c.fetchone()
+            batches = step.run(c, batch_Size)
+
+            while True:
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    batch_Id = next(batches, None)
+                except Exception:
+                    connection.rollback()
+                    raise
+                connection.commit()
+
+                if batch_Id is None:
+                    break
+
+                if report is not None and last_Id is not None and last_Id > first_Id:
+                    done = min(1.0, (batch_Id - first_Id) / (last_Id - first_Id))
+                    report(f"  {migration.description}: {done:.0%}")
+
+        # Bumped last, so an interrupted migration runs again (and resumes) next time
+        # MAX keeps a second program that migrated further from being moved back
+        connection.execute("BEGIN IMMEDIATE")
+        if get_Version(connection) < migration.version:
+            connection.execute(f"PRAGMA user_version = {migration.version}")
+        connection.commit()
+
+#-------------------------------------------------------------------------
+
+# Brings a database up to LATEST_VERSION, returns the number of migrations applied
+# report gets one line per migration and progress lines during backfills
+def migrate(connection: sqlite3.Connection, batch_Size: int = MIGRATION_BATCH_SIZE, report=None) -> int:
+
+    # The first step would otherwise commit whatever the caller has left open
+    if connection.in_transaction:
+        raise sqlite3.ProgrammingError("Commit or roll back the open transaction before migrating.")
+
+    pending = get_Pending(get_Version(connection))
+
+    for migration in pending:
+        if report is not None:
+            report(f"Migrating database to version {migration.version}: {migration.description}")
+
+        start_Time = time.perf_counter()
+        apply_Migration(connection, migration, batch_Size, report)
+
+        if report is not None:
+            report(f"  done in {time.perf_counter() - start_Time:.2f} seconds")
+
+    return len(pending)
+
+#-------------------------------------------------------------------------
+
+# Copies the schema and a sample of the rows of a database into an empty one
+# Battles are limited to the first sample_Rows, and tables keyed by battle to the rows of those battles
+def copy_Sample(source: sqlite3.Connection, target: sqlite3.Connection, sample_Rows: int) -> int:
+
+    with closing(source.cursor()) as c:
+        c.row_factory = None
+
+        # Shadow tables (the FTS index's storage) are made by their virtual table
+        c.execute("PRAGMA main.table_list")
+        table_Types = {row[1]: row[2] for row in c.fetchall()}
+
+        c.execute('''
+            SELECT type, name, tbl_name, sql FROM sqlite_master
+            WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite%'
+            ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END
+        ''')
+        schema = [row for row in c.fetchall() if table_Types.get(row[2]) != 'shadow']
+
+        # Triggers are made last so copying the rows doesn't fire them
+        triggers = [row for row in schema if row[0] == 'trigger']
+        schema = [row for row in schema if row[0] != 'trigger']
+
+        for _, _, _, sql in schema:
+            target.execute(sql)
+
+        if table_Types.get('battles') != 'table':
+            rows = []
+        else:
+            c.execute("SELECT * FROM battles ORDER BY id LIMIT ?", (sample_Rows,))
+            rows = c.fetchall()
+
+        if not rows:
+            for _, _, _, sql in triggers:
+                target.execute(sql)
+            return 0
+
+        target.executemany(f"INSERT INTO battles VALUES ({', '.join('?' * len(rows[0]))})", rows)
+        last_Id = rows[-1][0]
+
+        for _, name, _, _ in schema:
+            if name == 'battles' or table_Types.get(name) != 'table':
+                continue
+
+            c.execute(f"PRAGMA table_info({name})")
+            columns = [row[1] for row in c.fetchall()]
+            where = " WHERE battleId <= ?" if 'battleId' in columns else ""
+
+            c.execute(f"SELECT * FROM {name}{where}", (last_Id,) if where else ())
+            table_Rows = c.fetchall()
+            if table_Rows:
+                target.executemany(f"INSERT INTO {name} VALUES ({', '.join('?' * len(columns))})", table_Rows)
+
+        for _, _, _, sql in triggers:
+            target.execute(sql)
+
+    target.commit()
+    return len(rows)
+
+#-------------------------------------------------------------------------
+
+# Dry run: times the pending migrations on an in-memory copy of a sample of the
+# database and scales each time up to the full battles table. The database itself is
+# only read. Returns (migration, estimated seconds) pairs
+def estimate_Migrations(connection: sqlite3.Connection,
+                        sample_Rows: int = ESTIMATE_SAMPLE_ROWS) -> list[tuple[Migration, float]]:
+
+    version = get_Version(connection)
+    pending = get_Pending(version)
+
+    if not pending:
+        return []
+
+    try:
+        total_Rows = connection.execute("SELECT COUNT(*) FROM battles").fetchone()[0]
+    except sqlite3.OperationalError:
+        total_Rows = 0 # No battles table yet
+
+    with closing(sqlite3.connect(":memory:")) as sample:
+        copied = copy_Sample(connection, sample, sample_Rows)
+        sample.execute(f"PRAGMA user_version = {version}")
+        scale = total_Rows / copied if copied else 1.0
+
+        estimates = []
+        for migration in pending:
+            start_Time = time.perf_counter()
+            apply_Migration(sample, migration)
+            estimates.append((migration, (time.perf_counter() - start_Time) * scale))
+
+    return estimates
+
+#-------------------------------------------------------------------------
+
+# Applies (or with dry_Run, estimates) the pending migrations of the configured database
+def run_Migrations(dry_Run: bool = False, batch_Size: int = MIGRATION_BATCH_SIZE, report=print):
+    import db
+
+    # A dry run must not change anything, so it reads through a read-only connection
+    with closing(db.open_Connection(read_Only=dry_Run)) as connection:
+        version = get_Version(connection)
+        report(f"Database is at version {version}, latest is {LATEST_VERSION}.")
+
+        if dry_Run:
+            estimates = estimate_Migrations(connection)
+            for migration, seconds in estimates:
+                report(f"  {migration.version}: {migration.description} (about {seconds:.2f} seconds)")
+            report(f"{len(estimates)} migrations pending, about {sum(s for _, s in estimates):.2f} seconds in all.")
+        else:
+            applied = migrate(connection, batch_Size, report)
+            report(f"{applied} migrations applied.")
+
+#-------------------------------------------------------------------------
+
+# Non-interactive entry point for upgrading a database ahead of time
+# Example: python migrations.py --dry-run
+def main(argv: list[str] | None = None):
+    import argparse
+    import db
+
+    parser = argparse.ArgumentParser(description="Upgrade the battle database to the latest schema.")
+    parser.add_argument('--db', help="database file (default: Final.sqlite)")
+    parser.add_argument('--dry-run', action='store_true', help="only estimate how long each pending migration takes")
+    parser.add_argument('--batch-size', type=int, default=MIGRATION_BATCH_SIZE, help="rows per backfill transaction")
+
+    args = parser.parse_args(argv)
+
+    if args.db:
+        db.configure(args.db)
+
+    try:
+        run_Migrations(args.dry_run, args.batch_size)
+    except (OSError, sqlite3.Error) as e:
+        parser.exit(1, f"Migration failed: {e}\n")
+
+if __name__ == "__main__":
+    main()
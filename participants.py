@@ -0,0 +1,247 @@
+#! /usr/bin/env/ python3
+
+from typing import Iterable, Iterator
+
+from business import FIRST_ID
+
+# Normalized copies of the free-text participant columns of the battles table.
+#
+#   countries / people      one row per distinct name, matched on nameKey
+#   battle_countries        (battleId, countryId, role) with role 'involved', 'winner' or 'loser'
+#   battle_people           (battleId, personId, role) with role 'present' or 'died'
+#
+# The battles columns stay the source of truth. db.py rewrites a battle's rows here
+# whenever it inserts or changes that battle, and a trigger drops them when it is deleted.
+# Per-country and per-person questions are then index lookups on the join tables.
+# The tables are created and filled by migration 7 (see migrations.py).
+
+COUNTRY_ROLES = ('involved', 'winner', 'loser')
+PERSON_ROLES = ('present', 'died')
+
+# Battle columns the participant rows are worked out from
+SOURCE_FIELDS = ('countriesInvolved', 'winner', 'loser', 'significantFiguresPresent', 'notableDeaths')
+
+# Battles handled per round trip when syncing many at once
+SYNC_BATCH_SIZE = 500
+
+# Columns read from battles to work out its participants, after the id
+SOURCE_COLUMNS = "id, countriesInvolved, winner, loser, significantFiguresPresent, notableDeaths"
+
+# Ids of the battles a country or person took part in with the given role
+COUNTRY_BATTLES_SQL = '''
+    SELECT bc.battleId FROM countries co
+    JOIN battle_countries bc ON bc.countryId = co.id AND bc.role = ?
+    WHERE co.nameKey = ?
+'''
+
+PERSON_BATTLES_SQL = '''
+    SELECT bp.battleId FROM people pe
+    JOIN battle_people bp ON bp.personId = pe.id AND bp.role = ?
+    WHERE pe.nameKey = ?
+'''
+
+#-------------------------------------------------------------------------
+
+# Creates the participant tables and the delete trigger
+def create_Participant_Tables(c):
+
+    for table in ('countries', 'people'):
+        c.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                nameKey TEXT NOT NULL UNIQUE
+            )
+        ''')
+
+    # WITHOUT ROWID stores each join row once, inside its primary key index
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS battle_countries (
+            battleId INTEGER NOT NULL,
+            countryId INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            PRIMARY KEY (battleId, countryId, role)
+        ) WITHOUT ROWID
+    ''')
+
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS battle_people (
+            battleId INTEGER NOT NULL,
+            personId INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            PRIMARY KEY (battleId, personId, role)
+        ) WITHOUT ROWID
+    ''')
+
+    # A trigger rather than Python code, so deletes made by other programs are caught too
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS battles_participants_delete AFTER DELETE ON battles BEGIN
+            DELETE FROM battle_countries WHERE battleId = old.id;
+            DELETE FROM battle_people WHERE battleId = old.id;
+        END
+    ''')
+
+# The other direction: from a country or person to their battles
+def create_Participant_Indexes(c):
+    c.execute("CREATE INDEX IF NOT EXISTS idx_battle_countries_country ON battle_countries (countryId, role, battleId)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_battle_people_person ON battle_people (personId, role, battleId)")
+
+#-------------------------------------------------------------------------
+
+# Splits a comma separated list, leaving commas inside brackets alone
+# "Louis I (Count of Flanders, Nevers and Rethel), Rudolph" -> ["Louis I (Count of Flanders, Nevers and Rethel)", "Rudolph"]
+def split_List(text: str) -> list[str]:
+    if '(' not in (text or ""):
+        return [" ".join(part.split()) for part in (text or "").split(',') if part.strip()]
+
+    parts = []
+    depth = 0
+    start = 0
+
+    for i, character in enumerate(text or ""):
+        if character == '(':
+            depth += 1
+        elif character == ')':
+            depth = max(0, depth - 1)
+        elif character == ',' and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+
+    parts.append((text or "")[start:])
+
+    return [" ".join(part.split()) for part in parts if part.strip()]
+
+# Returns the country part of an entry such as "France (Supported by Bohemia)"
+def get_Country_Name(entry: str) -> str:
+    return " ".join(entry.split('(', 1)[0].split())
+
+#-------------------------------------------------------------------------
+
+# Works out the (name, nameKey, role) rows of countries and people for one battle
+def get_Participants(countries: str, winner: str, loser: str,
+                     figures: str, deaths: str) -> tuple[list[tuple], list[tuple]]:
+
+    country_Rows = []
+    for text, role in ((countries, 'involved'), (winner, 'winner'), (loser, 'loser')):
+        for entry in split_List(text):
+            name = get_Country_Name(entry)
+            if name:
+                country_Rows.append((name, name.casefold(), role))
+
+    # split_List has already collapsed the spaces, so casefold() gives the nameKey
+    person_Rows = [(name, name.casefold(), 'present') for name in split_List(figures)]
+    person_Rows += [(name, name.casefold(), 'died') for name in split_List(deaths)]
+
+    return country_Rows, person_Rows
+
+#-------------------------------------------------------------------------
+
+# Fills known_Ids (nameKey -> id) for the given (name, nameKey) pairs in 'countries' or 'people',
+# adding any names that are new. Keys already in known_Ids aren't looked up again.
+# The first spelling seen of a name is the one kept
+def get_Name_Ids(c, table: str, names: Iterable[tuple[str, str]], known_Ids: dict[str, int]) -> dict[str, int]:
+
+    by_Key = {}
+    for name, key in names:
+        if key not in known_Ids and key not in by_Key:
+            by_Key[key] = name
+
+    if not by_Key:
+        return known_Ids
+
+    c.executemany(f"INSERT OR IGNORE INTO {table} (name, nameKey) VALUES (?, ?)",
+                  [(name, key) for key, name in by_Key.items()])
+
+    keys = list(by_Key)
+
+    for start in range(0, len(keys), SYNC_BATCH_SIZE):
+        chunk = keys[start:start + SYNC_BATCH_SIZE]
+        c.execute(f"SELECT nameKey, id FROM {table} WHERE nameKey IN ({', '.join('?' * len(chunk))})", chunk)
+        known_Ids.update(c.fetchall())
+
+    return known_Ids
+
+#-------------------------------------------------------------------------
+
+# Rewrites the participant rows of many battles
+# Each source row is (db_id, countriesInvolved, winner, loser, significantFiguresPresent, notableDeaths)
+# is_New skips removing old rows, for battles that can't have any yet
+# name_Ids is a (country ids, person ids) pair of caches, only valid inside one transaction
+def sync_Battles(c, source_Rows: list[tuple], is_New: bool = False, name_Ids: tuple[dict, dict] | None = None):
+
+    if not source_Rows:
+        return
+
+    if not is_New:
+        battle_Ids = [(row[0],) for row in source_Rows]
+        c.executemany("DELETE FROM battle_countries WHERE battleId = ?", battle_Ids)
+        c.executemany("DELETE FROM battle_people WHERE battleId = ?", battle_Ids)
+
+    participants = [(row[0],) + get_Participants(*row[1:]) for row in source_Rows]
+
+    country_Ids, person_Ids = name_Ids or ({}, {})
+    get_Name_Ids(c, 'countries', (row[:2] for _, rows, _ in participants for row in rows), country_Ids)
+    get_Name_Ids(c, 'people', (row[:2] for _, _, rows in participants for row in rows), person_Ids)
+
+    # INSERT OR IGNORE because the same name can be listed twice for one battle
+    c.executemany(
+        "INSERT OR IGNORE INTO battle_countries (battleId, countryId, role) VALUES (?, ?, ?)",
+        [(db_id, country_Ids[key], role)
+         for db_id, country_Rows, _ in participants for _, key, role in country_Rows]
+    )
+    c.executemany(
+        "INSERT OR IGNORE INTO battle_people (battleId, personId, role) VALUES (?, ?, ?)",
+        [(db_id, person_Ids[key], role)
+         for db_id, _, person_Rows in participants for _, key, role in person_Rows]
+    )
+
+# Rewrites the participant rows of one saved battle
+def sync_Battle(c, battle_obj):
+    sync_Battles(c, [(battle_obj.db_id, battle_obj.countriesInvolved, battle_obj.winner, battle_obj.loser,
+                      battle_obj.significantFiguresPresent, battle_obj.notableDeaths)])
+
+#-------------------------------------------------------------------------
+
+# Rewrites the participant rows of every battle with an id above after_Id
+# Returns the number of battles synced
+def sync_Battles_After(c, after_Id: int = FIRST_ID, is_New: bool = False) -> int:
+    count = 0
+    # Most names come up again in later batches, so their ids are kept between them
+    name_Ids = ({}, {})
+
+    while True:
+        c.execute(f"SELECT {SOURCE_COLUMNS} FROM battles WHERE id > ? ORDER BY id LIMIT ?",
+                  (after_Id, SYNC_BATCH_SIZE))
+        rows = [tuple(row) for row in c.fetchall()]
+
+        if not rows:
+            return count
+
+        sync_Battles(c, rows, is_New, name_Ids)
+        count += len(rows)
+        after_Id = rows[-1][0]
+
+# Syncs the battles that have no participant rows at all, batch_Size at a time
+# Yields the id of the last battle of each batch so the caller can commit in between
+# Battles that list nobody are synced again on every call, which only costs a lookup
+def iter_Missing_Syncs(c, batch_Size: int = SYNC_BATCH_SIZE) -> Iterator[int]:
+    after_Id = FIRST_ID
+    # Name ids stay valid between batches, names are never removed
+    name_Ids = ({}, {})
+
+    while True:
+        c.execute(f'''
+            SELECT {SOURCE_COLUMNS} FROM battles b
+            WHERE id > ?
+                AND NOT EXISTS (SELECT 1 FROM battle_countries WHERE battleId = b.id)
+                AND NOT EXISTS (SELECT 1 FROM battle_people WHERE battleId = b.id)
+            ORDER BY id LIMIT ?
+        ''', (after_Id, batch_Size))
+        rows = [tuple(row) for row in c.fetchall()]
+
+        if not rows:
+            return
+
+        sync_Battles(c, rows, True, name_Ids)
+        after_Id = rows[-1][0]
+        yield after_Id
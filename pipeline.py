@@ -0,0 +1,86 @@
+#! /usr/bin/env/ python3
+
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator
+
+# Fan-out / fan-in over worker processes, for CPU work that feeds one SQLite writer.
+#
+#   items --> feeder thread --> pool of worker processes --> bounded queue --> caller
+#
+# A feeder thread reads the items and submits each one to the pool. The futures go
+# into a queue of at most max_Pending, and the caller takes them out in the order the
+# items came and gets each result. The caller is the only thread that writes, so the
+# SQLite connection is never shared. When the caller falls behind, the queue fills
+# up and the feeder stops reading, so memory use stays bounded.
+#
+#     for result in map_Ordered(check_Chunk, chunks, workers=4):
+#         save(result)
+
+# Items handed out but not yet taken by the caller, per worker
+PENDING_PER_WORKER = 2
+
+# Seconds the feeder waits on a full queue before checking whether it should stop
+FEED_TIMEOUT = 0.1
+
+#-------------------------------------------------------------------------
+
+# Puts item on the queue, waiting while it is full
+# Returns False without putting it if stopping is set in the meantime
+def put_Until_Stopped(pending: queue.Queue, item, stopping: threading.Event) -> bool:
+    while not stopping.is_set():
+        try:
+            pending.put(item, timeout=FEED_TIMEOUT)
+            return True
+        except queue.Full:
+            continue
+
+    return False
+
+# Feeder thread: submits every item to the pool and queues its future, then None
+# An error while reading the items is queued as a failed future, so the caller gets it
+# in its place after the results of every item before it
+def feed_Pool(pool: ProcessPoolExecutor, function: Callable, items: Iterable,
+              pending: queue.Queue, stopping: threading.Event):
+    try:
+        for item in items:
+            if not put_Until_Stopped(pending, pool.submit(function, item), stopping):
+                return
+    except BaseException as e:
+        failed = Future()
+        failed.set_exception(e)
+        put_Until_Stopped(pending, failed, stopping)
+        return
+
+    put_Until_Stopped(pending, None, stopping)
+
+#-------------------------------------------------------------------------
+
+# Yields function(item) for every item, in the order of the items
+# With more than one worker the calls run in a pool of worker processes, so function
+# and the items must be picklable. Closing the generator early stops the feeder and
+# cancels the work that hasn't started
+def map_Ordered(function: Callable, items: Iterable, workers: int = 1,
+                max_Pending: int | None = None) -> Iterator:
+
+    if workers <= 1:
+        for item in items:
+            yield function(item)
+        return
+
+    pending = queue.Queue(maxsize=max_Pending or workers * PENDING_PER_WORKER)
+    stopping = threading.Event()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        feeder = threading.Thread(target=feed_Pool, args=(pool, function, items, pending, stopping),
+                                  name="pipeline-feeder", daemon=True)
+        feeder.start()
+
+        try:
+            while (future := pending.get()) is not None:
+                yield future.result()
+        finally:
+            stopping.set()
+            feeder.join()
+            pool.shutdown(cancel_futures=True)
@@ -0,0 +1,265 @@
+#! /usr/bin/env/ python3
+
+from contextlib import closing
+from datetime import date
+from typing import Iterator
+
+import db
+import participants
+from business import Battle, INT_FIELDS, normalize_Name
+
+# Numbers that can be filtered on, and the SQL each one stands for
+# totalDeaths isn't a column, so it is worked out from the two death columns
+NUMBER_FILTERS = {name: name for name in INT_FIELDS}
+NUMBER_FILTERS['totalDeaths'] = "(totalVictorDeaths + totalVanquishedDeaths)"
+
+# Columns results can be ordered by
+ORDER_FIELDS = ('date', 'battleName') + tuple(NUMBER_FILTERS)
+
+# Force columns with their own index (see migrations.py)
+INDEXED_FORCES = ('victorForces', 'vanquishedForces')
+
+# A force threshold matching at most this many rows counts as selective
+SELECTIVE_ROWS = 1000
+
+#-------------------------------------------------------------------------
+
+# Builds a filtered battle query that SQLite answers with its indexes.
+# Every filter becomes a parameterized WHERE condition, so no values are ever
+# pasted into the SQL text. Filters can be chained:
+#
+#     battles = (Battle_Query()
+#                .date_Between(date(1800, 1, 1), date(1815, 12, 31))
+#                .at_Least('victorForces', 50000)
+#                .won_By("France")
+#                .run())
+#
+# winner/loser equality with a date range uses idx_battles_winner_date or
+# idx_battles_loser_date, date ranges alone use idx_battles_date, and force
+# thresholds use the force indexes. Country and person filters are lookups on the
+# participant join tables (see participants.py).
+#
+# This SQLite build keeps no statistics on value ranges (no STAT4), so on its own the
+# planner would rather walk idx_battles_date in order than use a force index. Before
+# running, each minimum on an indexed force is probed, and the ones that match only
+# a few rows are marked unlikely() so the planner picks their index instead.
+class Battle_Query:
+
+    def __init__(self):
+        self.conditions = []
+        self.values = []
+        # (position in conditions, column, value) of every minimum on an indexed force
+        self.force_Minimums = []
+        self.order = "date"
+        self.descending = False
+        self.limit_Count = None
+
+    # Keeps battles fought on or after start and on or before end, either can be None
+    def date_Between(self, start: date | None = None, end: date | None = None):
+        if start is not None:
+            self.conditions.append("date >= ?")
+            self.values.append(start.isoformat())
+        if end is not None:
+            self.conditions.append("date <= ?")
+            self.values.append(end.isoformat())
+        return self
+
+    # Keeps battles where a number (see NUMBER_FILTERS) is at least value
+    def at_Least(self, field_Name: str, value: int):
+        if field_Name in INDEXED_FORCES:
+            self.force_Minimums.append((len(self.conditions), field_Name, value))
+        self.conditions.append(f"{get_Number_Sql(field_Name)} >= ?")
+        self.values.append(value)
+        return self
+
+    # Keeps battles where a number (see NUMBER_FILTERS) is at most value
+    def at_Most(self, field_Name: str, value: int):
+        self.conditions.append(f"{get_Number_Sql(field_Name)} <= ?")
+        self.values.append(value)
+        return self
+
+    # Keeps battles won by the given side, names are in Title Case like everywhere else
+    def won_By(self, winner: str):
+        self.conditions.append("winner = ?")
+        self.values.append(winner.title())
+        return self
+
+    # Keeps battles lost by the given side
+    def lost_By(self, loser: str):
+        self.conditions.append("loser = ?")
+        self.values.append(loser.title())
+        return self
+
+    # Keeps battles whose countries involved include the given country
+    # The join table finds them, so the comma separated list is never scanned
+    def involving(self, country: str, role: str = 'involved'):
+        if role not in participants.COUNTRY_ROLES:
+            raise ValueError(f"Unknown country role '{role}'.")
+        self.conditions.append("id IN (" + participants.COUNTRY_BATTLES_SQL + ")")
+        self.values += [role, normalize_Name(country)]
+        return self
+
+    # Keeps battles the given person was at ('present') or died in ('died')
+    def with_Person(self, name: str, role: str = 'present'):
+        if role not in participants.PERSON_ROLES:
+            raise ValueError(f"Unknown person role '{role}'.")
+        self.conditions.append("id IN (" + participants.PERSON_BATTLES_SQL + ")")
+        self.values += [role, normalize_Name(name)]
+        return self
+
+    # Sets the order of the results, ties are broken by id
+    def order_By(self, field_Name: str, descending: bool = False):
+        if field_Name not in ORDER_FIELDS:
+            raise ValueError(f"Can't order battles by '{field_Name}'.")
+        self.order = NUMBER_FILTERS.get(field_Name, field_Name)
+        self.descending = descending
+        return self
+
+    # Returns at most count battles
+    def limit(self, count: int):
+        self.limit_Count = count
+        return self
+
+    # Returns the WHERE clause (or "") shared by every query this builder makes
+    # Conditions at the positions in selective are wrapped in unlikely()
+    def get_Where(self, selective: set[int] = frozenset()) -> str:
+        if not self.conditions:
+            return ""
+
+        conditions = [f"unlikely({condition})" if i in selective else condition
+                      for i, condition in enumerate(self.conditions)]
+
+        return " WHERE " + " AND ".join(conditions)
+
+    # Returns the positions of the force minimums that match at most SELECTIVE_ROWS rows
+    # Each probe reads no more than SELECTIVE_ROWS + 1 entries of the force's index
+    def find_Selective(self, c) -> set[int]:
+        selective = set()
+
+        for position, field_Name, value in self.force_Minimums:
+            c.execute(f"SELECT COUNT(*) FROM (SELECT 1 FROM battles WHERE {field_Name} >= ? LIMIT ?)",
+                      (value, SELECTIVE_ROWS + 1))
+            if c.fetchone()[0] <= SELECTIVE_ROWS:
+                selective.add(position)
+
+        return selective
+
+    # Returns the SQL and the values to run it with
+    def compile(self, selective: set[int] = frozenset()) -> tuple[str, list]:
+        direction = "DESC" if self.descending else "ASC"
+
+        sql = "SELECT " + db.BATTLE_COLUMNS + " FROM battles" + self.get_Where(selective)
+        sql += f" ORDER BY {self.order} {direction}, id {direction}"
+        values = list(self.values)
+
+        if self.limit_Count is not None:
+            sql += " LIMIT ?"
+            values.append(self.limit_Count)
+
+        return sql, values
+
+    # Streams the matching battles
+    def iter_Battles(self, batch_Size: int = db.BATCH_SIZE) -> Iterator[Battle]:
+
+        with db.read_Connection() as reader, closing(reader.cursor()) as c:
+            c.row_factory = None
+            sql, values = self.compile(self.find_Selective(c))
+            c.execute(sql, values)
+
+            while True:
+                rows = c.fetchmany(batch_Size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield db.row_To_Battle(row)
+
+    # Returns every matching battle as a list
+    def run(self) -> list[Battle]:
+        return list(self.iter_Battles())
+
+    # Returns the number of matching battles without loading them
+    def count(self) -> int:
+        with db.read_Connection() as reader, closing(reader.cursor()) as c:
+            c.execute("SELECT COUNT(*) FROM battles" + self.get_Where(), self.values)
+            return c.fetchone()[0]
+
+    # Returns SQLite's plan for the query, to check which indexes it uses
+    def get_Query_Plan(self) -> list[str]:
+
+        with db.read_Connection() as reader, closing(reader.cursor()) as c:
+            sql, values = self.compile(self.find_Selective(c))
+            c.execute("EXPLAIN QUERY PLAN " + sql, values)
+            return [row[3] for row in c.fetchall()]
+
+#-------------------------------------------------------------------------
+
+# Returns the SQL for a number that can be filtered on
+def get_Number_Sql(field_Name: str) -> str:
+    if field_Name not in NUMBER_FILTERS:
+        raise ValueError(f"Can't filter battles by '{field_Name}'.")
+    return NUMBER_FILTERS[field_Name]
+
+#-------------------------------------------------------------------------
+
+# Asks for an optional date, returns None if left blank
+def get_Optional_Date(prompt: str) -> date | None:
+    while True:
+        text = input(prompt).strip()
+        if not text:
+            return None
+        try:
+            return db.parse_Date(text)
+        except ValueError:
+            print("Invalid date format. Please use YYYY-MM-DD, or leave blank to skip.")
+
+# Asks for an optional whole number, returns None if left blank
+def get_Optional_Int(prompt: str) -> int | None:
+    while True:
+        text = input(prompt).strip().replace(",", "")
+        if not text:
+            return None
+        try:
+            return db.parse_Valid_Int(text)
+        except ValueError:
+            print("Please enter a whole number of zero or greater, or leave blank to skip.")
+
+#-------------------------------------------------------------------------
+
+# Prompts for filters, every one optional, and prints the matching battles
+def query_Battles():
+
+    print("\n")
+    print(db.get_Centered_String("QUERY BATTLES"))
+    print("-" * db.TARGET_WIDTH)
+    print("\nLeave any filter blank to skip it.\n")
+
+    battle_Query = Battle_Query().date_Between(
+        get_Optional_Date("Fought on or after (YYYY-MM-DD): "),
+        get_Optional_Date("Fought on or before (YYYY-MM-DD): ")
+    )
+
+    for field_Name, label in (('victorForces', "Victor forces at least: "),
+                              ('vanquishedForces', "Vanquished forces at least: "),
+                              ('totalDeaths', "Total deaths at least: ")):
+        value = get_Optional_Int(label)
+        if value is not None:
+            battle_Query.at_Least(field_Name, value)
+
+    winner = input("Winner: ").strip()
+    if winner:
+        battle_Query.won_By(winner)
+
+    loser = input("Loser: ").strip()
+    if loser:
+        battle_Query.lost_By(loser)
+
+    country = input("Country involved: ").strip()
+    if country:
+        battle_Query.involving(country)
+
+    person = input("Significant figure present: ").strip()
+    if person:
+        battle_Query.with_Person(person)
+
+    print(f"\n{battle_Query.count():,} battles match.")
+    db.display_All_Battles(battle_Query.iter_Battles())
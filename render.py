@@ -0,0 +1,151 @@
+#! /usr/bin/env/ python3
+
+import sys
+import time
+from typing import Callable, Iterable
+
+import instrument
+
+# Width the table layout was designed for
+DEFAULT_WIDTH = 226
+
+# Battles written per page (one write call each)
+PAGE_SIZE = 200
+
+# Column widths and alignment of the main table at DEFAULT_WIDTH
+COLUMNS = (
+    (11, "<"),  # ID
+    (36, "<"),  # BATTLE NAME
+    (36, "<"),  # DATE OF BATTLE
+    (42, "<"),  # COUNTRIES INVOLVED
+    (22, "<"),  # VIC. FORCES
+    (25, ">"),  # VANQ. FORCES
+    (37, ">"),  # TOTAL DEATHS
+)
+
+HEADINGS = (
+    "ID", "BATTLE NAME", "DATE OF BATTLE", "COUNTRIES INVOLVED",
+    "VIC. FORCES", "VANQ. FORCES", "TOTAL DEATHS"
+)
+
+#-------------------------------------------------------------------------
+
+# Formats a count with thousands separators, or an empty cell for NULL
+def format_Count(value: int | None) -> str:
+    return "" if value is None else f"{value:,}"
+
+#-------------------------------------------------------------------------
+
+# Renders the full battle records table.
+# Format strings and separator lines are built once, and each page of battles is
+# assembled into one string and written with a single call, instead of several
+# print() calls per battle.
+#
+# out can be a text stream (sys.stdout, an open text file) or a binary one
+# (sys.stdout.buffer, a file opened with 'wb'). pause, if given, is called
+# between pages, for example to wait for ENTER
+class Battle_Renderer:
+
+    def __init__(self, width: int = DEFAULT_WIDTH, out=None, page_Size: int = PAGE_SIZE,
+                 pause: Callable[[], None] | None = None):
+
+        self.width = width
+        self.out = out if out is not None else sys.stdout
+        self.page_Size = page_Size
+        self.pause = pause
+
+        # Binary streams have no encoding, so text is encoded before writing
+        self.is_Binary = not hasattr(self.out, 'encoding')
+
+        # Scales the columns to the chosen width, never narrower than their headings
+        self.row_Format = "".join(
+            "{:" + align + str(max(len(heading), column_Width * width // DEFAULT_WIDTH)) + "} "
+            for (column_Width, align), heading in zip(COLUMNS, HEADINGS)
+        )
+
+        self.double_Line = "=" * width + "\n"
+        self.single_Line = "-" * width + "\n"
+
+        self.title = "\n" + "BATTLE RECORDS\n".center(width) + "\n"
+        self.header = self.double_Line + self.row_Format.format(*HEADINGS) + "\n"
+
+    # Writes one finished piece of output
+    def write(self, text: str):
+        if instrument.enabled:
+            start = time.perf_counter()
+            self.write_Text(text)
+            instrument.record('phase', "render write", time.perf_counter() - start, len(text))
+        else:
+            self.write_Text(text)
+
+    # Writes text to the output stream as it is
+    def write_Text(self, text: str):
+        if self.is_Binary:
+            self.out.write(text.encode('utf-8'))
+        else:
+            self.out.write(text)
+        self.out.flush()
+
+    # Adds the lines for one battle to the page being built
+    def render_Battle(self, parts: list, number: int, battle):
+        single_Line = self.single_Line
+
+        # Battles saved by other programs can leave the date and numbers NULL, those cells stay empty
+        deaths = [value for value in (battle.totalVictorDeaths, battle.totalVanquishedDeaths) if value is not None]
+
+        parts.append(single_Line)
+        parts.append(self.row_Format.format(
+            number,
+            battle.battleName or "",
+            battle.date.isoformat() if battle.date is not None else "",
+            battle.countriesInvolved or "",
+            format_Count(battle.victorForces),
+            format_Count(battle.vanquishedForces),
+            format_Count(sum(deaths) if deaths else None)
+        ))
+        parts.append("\n")
+        parts.append(single_Line)
+
+        # Information below the main table row
+        if battle.winner and battle.loser:
+            parts.append(f"\nWINNER/LOSER: {battle.winner} vs {battle.loser}\n")
+
+        if battle.totalVictorDeaths:
+            parts.append(f"\nTotal Deaths of {battle.winner}: {battle.totalVictorDeaths}\n")
+
+        if battle.totalVanquishedDeaths:
+            parts.append(f"\nTotal Deaths of {battle.loser}: {battle.totalVanquishedDeaths}\n")
+
+        if battle.significantFiguresPresent:
+            parts.append(f"\nFIGURES PRESENT: \n{battle.significantFiguresPresent}\n")
+            parts.append(f"\nNOTABLE DEATHS: \n{battle.notableDeaths}\n\n")
+
+    # Renders every battle, one page per write, and returns how many were written
+    def render(self, battles: Iterable) -> int:
+        count = 0
+        parts = [self.title]
+
+        for count, battle in enumerate(battles, 1):
+
+            # The header goes on the first page, once we know there is something to show
+            if count == 1:
+                parts.append(self.header)
+
+            # Only pauses once there really is another page to show
+            elif (count - 1) % self.page_Size == 0 and self.pause is not None:
+                self.pause()
+
+            self.render_Battle(parts, count, battle)
+
+            if count % self.page_Size == 0:
+                self.write("".join(parts))
+                parts = []
+
+        if count == 0:
+            parts.append("\nNo battles recorded.\n")
+        else:
+            parts.append(self.double_Line)
+
+        self.write("".join(parts))
+
+        return count
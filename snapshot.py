@@ -0,0 +1,260 @@
+#! /usr/bin/env/ python3
+
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from contextlib import closing
+
+import db
+from business import INT_FIELDS, TEXT_FIELDS, Battle_Columns
+from elapsed import ORDINAL_SQL
+
+# Read-only snapshot of the battles table in one binary file, opened with mmap.
+#
+# Opening a snapshot only reads its header, and a battle is only decoded when one of
+# its attributes is read, straight out of the mapped file. So startup time and memory
+# don't grow with the number of battles. Pages the operating system has loaded are
+# shared by every process with the same snapshot open.
+#
+# Layout, in the byte order of the machine that wrote it:
+#   HEADER
+#   id, date (as date.toordinal()) and each of INT_FIELDS: rows int64 values each, NULL as 0
+#   (a date SQLite can't read is NULL too, so 0 is never a real date, see Battle_View.date)
+#   date order: rows int64 row numbers, ordered by (date, id) with undated battles last by id
+#   each of TEXT_FIELDS: rows (start, end) int64 pairs into the string heap
+#   string heap: UTF-8 text, every distinct string stored once
+#
+# The header holds the database's fingerprint when the snapshot was written. Any
+# insert, update or delete since changes the fingerprint (see get_Fingerprint), and
+# open_Snapshot() won't open a snapshot that no longer matches its database.
+
+SNAPSHOT_MAGIC = b"BATTSNP1"
+
+# magic, byte order check (always 1), rows, heap size, then the fingerprint:
+# schema version, last id handed out, last change logged
+HEADER = struct.Struct('=8sqqqqqq')
+
+# Snapshot read by the menu when BATTLE_SNAPSHOT isn't set, next to the database file
+SNAPSHOT_EXTENSION = ".snapshot"
+
+#-------------------------------------------------------------------------
+
+# Returns (schema version, last id handed out, last change logged) of a database
+# AUTOINCREMENT never hands out an id twice and battle_changes stamps every update and
+# delete (see migrations.py), so every write moves one of these on. Each is one index lookup
+def get_Fingerprint(c) -> tuple[int, int, int]:
+    c.execute("PRAGMA user_version")
+    version = c.fetchone()[0]
+
+    c.execute('''
+        SELECT
+            IFNULL((SELECT seq FROM sqlite_sequence WHERE name = 'battles'), (SELECT MAX(id) FROM battles)),
+            (SELECT MAX(seq) FROM battle_changes)
+    ''')
+    last_Id, last_Change = c.fetchone()
+
+    return version, last_Id or 0, last_Change or 0
+
+# Returns the snapshot path used for the configured database
+def get_Default_Path() -> str:
+    return os.path.splitext(db.DB_FILE)[0] + SNAPSHOT_EXTENSION
+
+#-------------------------------------------------------------------------
+
+# Writes a snapshot of every battle to path and returns the number of battles written
+# The rows and the fingerprint are read in one transaction, so they always agree. The file
+# is written under a temporary name and renamed into place, so no reader sees half of it
+def write_Snapshot(path: str | None = None) -> int:
+    path = path or get_Default_Path()
+
+    ids = array('q')
+    dates = array('q')
+    numbers = {name: array('q') for name in INT_FIELDS}
+    spans = {name: array('q') for name in TEXT_FIELDS}
+
+    heap = bytearray()
+    heap_Spans = {}
+
+    with db.read_Connection() as reader, closing(reader.cursor()) as c:
+        c.row_factory = None
+
+        is_Own_Transaction = not reader.in_transaction
+        if is_Own_Transaction:
+            reader.execute("BEGIN")
+
+        try:
+            fingerprint = get_Fingerprint(c)
+
+            c.execute(f"SELECT id, {ORDINAL_SQL}, {', '.join(INT_FIELDS + TEXT_FIELDS)} FROM battles ORDER BY id")
+
+            while rows := c.fetchmany(db.BATCH_SIZE):
+                for row in rows:
+                    ids.append(row[0])
+                    dates.append(row[1] or 0)
+
+                    for name, value in zip(INT_FIELDS, row[2:]):
+                        numbers[name].append(value or 0)
+
+                    for name, text in zip(TEXT_FIELDS, row[2 + len(INT_FIELDS):]):
+                        span = heap_Spans.get(text)
+                        if span is None:
+                            encoded = (text or "").encode('utf-8')
+                            span = heap_Spans[text] = (len(heap), len(heap) + len(encoded))
+                            heap += encoded
+                        spans[name].extend(span)
+        finally:
+            if is_Own_Transaction:
+                reader.rollback()
+
+    rows = len(ids)
+    # Undated battles go after the most recent, the same order as db.sort_Battles
+    date_Order = array('q', sorted(range(rows), key=lambda index: (dates[index] == 0, dates[index], ids[index])))
+
+    temp_Path = path + ".tmp"
+
+    with open(temp_Path, 'wb') as out:
+        out.write(HEADER.pack(SNAPSHOT_MAGIC, 1, rows, len(heap), *fingerprint))
+
+        for column in (ids, dates, *numbers.values(), date_Order, *spans.values()):
+            out.write(column)
+
+        out.write(heap)
+
+    os.replace(temp_Path, path)
+    return rows
+
+#-------------------------------------------------------------------------
+
+# One text column of a snapshot: decodes a battle's string out of the heap when it is read
+class Snapshot_Text:
+    __slots__ = ('spans', 'heap')
+
+    def __init__(self, spans: memoryview, heap: memoryview):
+        self.spans = spans
+        self.heap = heap
+
+    def __len__(self) -> int:
+        return len(self.spans) // 2
+
+    def __getitem__(self, index: int) -> str:
+        return str(self.heap[self.spans[2 * index]:self.spans[2 * index + 1]], 'utf-8')
+
+#-------------------------------------------------------------------------
+
+# A snapshot file opened with mmap. Indexing and iterating give Battle_View objects,
+# exactly like Battle_Columns, but every column is a view of the mapped file.
+# Close it (or use it in a with block) once no views are needed any more
+class Battle_Snapshot(Battle_Columns):
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            if len(self.map) < HEADER.size:
+                raise ValueError(f"'{path}' is not a battle snapshot.")
+
+            magic, byte_Order, rows, heap_Size, *fingerprint = HEADER.unpack_from(self.map)
+
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"'{path}' is not a battle snapshot.")
+            if byte_Order != 1:
+                raise ValueError(f"'{path}' was written on a machine with a different byte order.")
+            if len(self.map) != HEADER.size + 8 * rows * (3 + len(INT_FIELDS) + 2 * len(TEXT_FIELDS)) + heap_Size:
+                raise ValueError(f"'{path}' is incomplete.")
+
+            self.fingerprint = tuple(fingerprint)
+
+            # Every memoryview made is kept, so close() can release them all before unmapping
+            self.views = [memoryview(self.map)]
+            self.offset = HEADER.size
+
+            self.db_ids = self.take_Column(rows)
+            self.dates = self.take_Column(rows)
+
+            for name in INT_FIELDS:
+                setattr(self, name, self.take_Column(rows))
+
+            self.date_Order = self.take_Column(rows)
+            text_Spans = [self.take_Column(2 * rows) for _ in TEXT_FIELDS]
+
+            heap = self.views[0][self.offset:]
+            self.views.append(heap)
+
+            for name, column_Spans in zip(TEXT_FIELDS, text_Spans):
+                setattr(self, name, Snapshot_Text(column_Spans, heap))
+
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_Type, exc_Value, traceback):
+        self.close()
+
+    # Returns the next size int64 values of the file as a memoryview, without copying them
+    def take_Column(self, size: int) -> memoryview:
+        column = self.views[0][self.offset:self.offset + 8 * size]
+        self.offset += 8 * size
+
+        self.views.append(column)
+        self.views.append(column.cast('q'))
+        return self.views[-1]
+
+    # A snapshot can't be added to
+    def append(self, battle):
+        raise TypeError("Battle snapshots are read-only.")
+
+    # Returns the battle with the given primary key, or None if the snapshot doesn't hold it
+    # Rows are stored in id order, so this is a binary search of the id column
+    def find_Id(self, db_id: int):
+        index = bisect_left(self.db_ids, db_id)
+
+        if index < len(self.db_ids) and self.db_ids[index] == db_id:
+            return self[index]
+
+        return None
+
+    # Yields the battles oldest first (or newest first), read in the stored date order
+    # Undated battles come last, or first when descending, like db.iter_Battles_By_Date
+    def iter_By_Date(self, descending: bool = False):
+        order = reversed(self.date_Order) if descending else self.date_Order
+        for index in order:
+            yield self[index]
+
+    # Releases the views of the file and unmaps it
+    def close(self):
+        for view in reversed(getattr(self, 'views', [])):
+            view.release()
+        self.views = []
+
+        if not self.map.closed:
+            self.map.close()
+
+#-------------------------------------------------------------------------
+
+# Returns True if the snapshot still matches the configured database
+def is_Current(snapshot: Battle_Snapshot) -> bool:
+    with db.read_Connection() as reader, closing(reader.cursor()) as c:
+        c.row_factory = None
+        return get_Fingerprint(c) == snapshot.fingerprint
+
+# Opens the snapshot at path (by default the one next to the database)
+# Returns None if there is no snapshot or the database has changed since it was written
+def open_Snapshot(path: str | None = None) -> Battle_Snapshot | None:
+    path = path or get_Default_Path()
+
+    if not os.path.exists(path):
+        return None
+
+    snapshot = Battle_Snapshot(path)
+
+    if not is_Current(snapshot):
+        snapshot.close()
+        return None
+
+    return snapshot
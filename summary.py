@@ -0,0 +1,269 @@
+#! /usr/bin/env/ python3
+
+from typing import Iterator
+
+from business import FIRST_ID, INT_FIELDS
+
+# Running totals of the battles table, kept up to date by triggers.
+#
+#   battle_totals         one row: the battle count, the sum of every force and death
+#                         column, and the sums behind the average casualty rates
+#   battle_group_totals   battles and deaths per winner, per loser and per decade
+#
+# Every insert, update and delete of a battle, from this program or any other, adds its
+# values to the totals or takes them away inside the same transaction, so the overview
+# and casualty reports read a handful of rows however many battles there are.
+# rebuild_Summary() works everything out again from the battles themselves.
+# The tables are created by migration 9 (see migrations.py) and filled in batches by
+# iter_Backfill(). While that is under way, summary_backfill holds the last id counted
+# and the last id there was when the triggers were made. The triggers leave the battles
+# between the two to the backfill, so none is counted twice, and count newer ones
+# themselves, so the backfill has a fixed end however busy the writers are.
+
+# Ways battles are grouped in battle_group_totals, and the SQL expression each one groups by
+# {row} is 'new.' or 'old.' inside the triggers and empty everywhere else
+GROUP_EXPRESSIONS = {
+    'winner': "{row}winner",
+    'loser': "{row}loser",
+    'decade': "(CAST(substr({row}date, 1, 4) AS INTEGER) / 10) * 10",
+}
+
+# Each side's share of its forces that died in one battle, NULL when it had no forces
+RATE_EXPRESSIONS = {
+    'victor': "CAST({row}totalVictorDeaths AS REAL) / NULLIF({row}victorForces, 0)",
+    'vanquished': "CAST({row}totalVanquishedDeaths AS REAL) / NULLIF({row}vanquishedForces, 0)",
+}
+
+# Columns the totals are worked out from, an update of any other column leaves them alone
+SUMMED_COLUMNS = ('date', 'winner', 'loser') + INT_FIELDS
+
+# Columns of battle_totals after id, in the order get_Battle_Sums() returns them
+TOTAL_COLUMNS = ('battles',) + INT_FIELDS + tuple(column for side in RATE_EXPRESSIONS
+                                                  for column in (f"{side}RateSum", f"{side}Rates"))
+
+# Batches of battles counted per transaction by iter_Backfill()
+BACKFILL_BATCH_SIZE = 5000
+
+#-------------------------------------------------------------------------
+
+# Returns one of the expressions above for the trigger row 'new' or 'old', or for plain queries
+def get_Expression(expression: str, row: str | None = None) -> str:
+    return expression.format(row=row + "." if row else "")
+
+#-------------------------------------------------------------------------
+
+# Returns the trigger statements that add (sign '+') or take away (sign '-') the values
+# of one battle, row being 'new' or 'old'
+def get_Change_Sql(row: str, sign: str) -> str:
+
+    columns = [f"battles = battles {sign} 1"]
+    columns += [f"{name} = {name} {sign} IFNULL({row}.{name}, 0)" for name in INT_FIELDS]
+
+    for side, expression in RATE_EXPRESSIONS.items():
+        rate = get_Expression(expression, row)
+        columns.append(f"{side}RateSum = {side}RateSum {sign} IFNULL({rate}, 0)")
+        columns.append(f"{side}Rates = {side}Rates {sign} ({rate} IS NOT NULL)")
+
+    statements = ["UPDATE battle_totals SET " + ", ".join(columns) + " WHERE id = 1;"]
+
+    victor_Deaths = f"IFNULL({row}.totalVictorDeaths, 0)"
+    vanquished_Deaths = f"IFNULL({row}.totalVanquishedDeaths, 0)"
+
+    for grouping, expression in GROUP_EXPRESSIONS.items():
+        # The primary key can't hold NULL, so battles without a value share the group ''
+        group = f"IFNULL({get_Expression(expression, row)}, '')"
+
+        if sign == '+':
+            statements.append(f'''
+                INSERT INTO battle_group_totals (grouping, grp, battles, victorDeaths, vanquishedDeaths)
+                VALUES ('{grouping}', {group}, 1, {victor_Deaths}, {vanquished_Deaths})
+                ON CONFLICT (grouping, grp) DO UPDATE SET
+                    battles = battles + 1,
+                    victorDeaths = victorDeaths + excluded.victorDeaths,
+                    vanquishedDeaths = vanquishedDeaths + excluded.vanquishedDeaths;
+            ''')
+        else:
+            statements.append(f'''
+                UPDATE battle_group_totals SET
+                    battles = battles - 1,
+                    victorDeaths = victorDeaths - {victor_Deaths},
+                    vanquishedDeaths = vanquishedDeaths - {vanquished_Deaths}
+                WHERE grouping = '{grouping}' AND grp = {group};
+            ''')
+            # A group with no battles left goes, the same as it would from a GROUP BY
+            statements.append(f'''
+                DELETE FROM battle_group_totals
+                WHERE grouping = '{grouping}' AND grp = {group} AND battles <= 0;
+            ''')
+
+    return "\n".join(statements)
+
+# Returns the WHEN condition of a trigger: true unless the battle is still waiting for the backfill
+def get_Counted_Condition(row: str) -> str:
+    return f"NOT EXISTS (SELECT 1 FROM summary_backfill WHERE {row}.id > lastId AND {row}.id <= endId)"
+
+#-------------------------------------------------------------------------
+
+# Creates the summary tables and the triggers that keep them current
+# The first time, the totals start at zero with every battle left to iter_Backfill()
+def create_Summary_Tables(c):
+
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'battle_totals'")
+    is_New = c.fetchone() is None
+
+    int_Columns = ", ".join(f"{name} INTEGER NOT NULL" for name in INT_FIELDS)
+    rate_Columns = ", ".join(f"{side}RateSum REAL NOT NULL, {side}Rates INTEGER NOT NULL"
+                             for side in RATE_EXPRESSIONS)
+
+    c.execute(f'''
+        CREATE TABLE IF NOT EXISTS battle_totals (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            battles INTEGER NOT NULL,
+            {int_Columns},
+            {rate_Columns}
+        )
+    ''')
+
+    # grp is a winner or loser's name, or a decade
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS battle_group_totals (
+            grouping TEXT NOT NULL,
+            grp NOT NULL,
+            battles INTEGER NOT NULL,
+            victorDeaths INTEGER NOT NULL,
+            vanquishedDeaths INTEGER NOT NULL,
+            PRIMARY KEY (grouping, grp)
+        ) WITHOUT ROWID
+    ''')
+
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS summary_backfill (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            lastId INTEGER NOT NULL,
+            endId INTEGER NOT NULL
+        )
+    ''')
+
+    # The groups with the most battles or the most deaths are read straight off these
+    c.execute("CREATE INDEX IF NOT EXISTS idx_battle_group_totals_battles ON battle_group_totals (grouping, battles)")
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_battle_group_totals_deaths
+        ON battle_group_totals (grouping, victorDeaths + vanquishedDeaths)
+    ''')
+
+    create_Summary_Triggers(c)
+
+    if is_New:
+        reset_Totals(c)
+        c.execute("INSERT INTO summary_backfill SELECT 1, ?, IFNULL(MAX(id), ?) FROM battles", (FIRST_ID, FIRST_ID))
+
+# Creates the triggers that add every change of a battle to the totals
+def create_Summary_Triggers(c):
+
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS battles_summary_insert AFTER INSERT ON battles
+        WHEN {get_Counted_Condition('new')} BEGIN
+            {get_Change_Sql('new', '+')}
+        END
+    ''')
+
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS battles_summary_delete AFTER DELETE ON battles
+        WHEN {get_Counted_Condition('old')} BEGIN
+            {get_Change_Sql('old', '-')}
+        END
+    ''')
+
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS battles_summary_update AFTER UPDATE OF {", ".join(SUMMED_COLUMNS)} ON battles
+        WHEN {get_Counted_Condition('new')} BEGIN
+            {get_Change_Sql('old', '-')}
+            {get_Change_Sql('new', '+')}
+        END
+    ''')
+
+# Migration 11: databases that were given the totals before they were backfilled in
+# batches get summary_backfill and triggers that check it
+def replace_Summary_Triggers(c):
+
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS summary_backfill (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            lastId INTEGER NOT NULL,
+            endId INTEGER NOT NULL
+        )
+    ''')
+
+    for trigger in ('battles_summary_insert', 'battles_summary_delete', 'battles_summary_update'):
+        c.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+    create_Summary_Triggers(c)
+
+#-------------------------------------------------------------------------
+
+# Empties the totals, leaving battle_totals' one row at zero
+def reset_Totals(c):
+    c.execute("DELETE FROM battle_totals")
+    c.execute("DELETE FROM battle_group_totals")
+    c.execute(f"INSERT INTO battle_totals (id, {', '.join(TOTAL_COLUMNS)}) VALUES (1{', 0' * len(TOTAL_COLUMNS)})")
+
+# Returns the TOTAL_COLUMNS values of the battles matching where
+def get_Battle_Sums(c, where: str = "1", params: tuple = ()) -> tuple:
+    sums = ", ".join(f"IFNULL(SUM({name}), 0)" for name in INT_FIELDS)
+    rates = ", ".join(f"TOTAL({get_Expression(expression)}), COUNT({get_Expression(expression)})"
+                      for expression in RATE_EXPRESSIONS.values())
+
+    c.execute(f"SELECT COUNT(*), {sums}, {rates} FROM battles WHERE {where}", params)
+    return tuple(c.fetchone())
+
+# Adds the battles matching where to the totals
+def add_Battles(c, where: str = "1", params: tuple = ()):
+
+    columns = ", ".join(f"{name} = {name} + ?" for name in TOTAL_COLUMNS)
+    c.execute(f"UPDATE battle_totals SET {columns} WHERE id = 1", get_Battle_Sums(c, where, params))
+
+    for grouping, expression in GROUP_EXPRESSIONS.items():
+        c.execute(f'''
+            INSERT INTO battle_group_totals (grouping, grp, battles, victorDeaths, vanquishedDeaths)
+            SELECT ?, IFNULL({get_Expression(expression)}, '') AS grp, COUNT(*),
+                IFNULL(SUM(totalVictorDeaths), 0), IFNULL(SUM(totalVanquishedDeaths), 0)
+            FROM battles
+            WHERE {where}
+            GROUP BY grp
+            ON CONFLICT (grouping, grp) DO UPDATE SET
+                battles = battles + excluded.battles,
+                victorDeaths = victorDeaths + excluded.victorDeaths,
+                vanquishedDeaths = vanquishedDeaths + excluded.vanquishedDeaths
+        ''', (grouping, *params))
+
+# Works every total out again from the battles table
+# Call it inside a write transaction so no battle changes halfway through
+def rebuild_Summary(c):
+    reset_Totals(c)
+    c.execute("DELETE FROM summary_backfill")
+    add_Battles(c)
+
+# Backfill step of migration 9: adds the battles summary_backfill says are still
+# uncounted to the totals, batch_Size at a time, and yields the last id of each batch.
+# The last id is saved as it goes, so an interrupted backfill carries on where it stopped
+def iter_Backfill(c, batch_Size: int = BACKFILL_BATCH_SIZE) -> Iterator[int]:
+
+    while True:
+        c.execute("SELECT lastId, endId FROM summary_backfill")
+        row = c.fetchone()
+        if row is None:
+            return
+
+        after_Id, end_Id = row
+        c.execute("SELECT MAX(id) FROM (SELECT id FROM battles WHERE id > ? AND id <= ? ORDER BY id LIMIT ?)",
+                  (after_Id, end_Id, batch_Size))
+        last_Id = c.fetchone()[0]
+
+        # Every battle is counted, from now on the triggers count them all
+        if last_Id is None:
+            c.execute("DELETE FROM summary_backfill")
+            return
+
+        add_Battles(c, "id > ? AND id <= ?", (after_Id, last_Id))
+        c.execute("UPDATE summary_backfill SET lastId = ? WHERE id = 1", (last_Id,))
+        yield last_Id
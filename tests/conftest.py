@@ -0,0 +1,52 @@
+#! /usr/bin/env/ python3
+
+import os
+import sys
+from datetime import date
+
+import pytest
+
+# The modules live one folder up and aren't installed as a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+from business import Battle
+
+#-------------------------------------------------------------------------
+
+# Points db at a new database file for one test, and back at the real one afterwards
+@pytest.fixture
+def database(tmp_path):
+    original_File = db.DB_FILE
+
+    db.configure(str(tmp_path / "battles.sqlite"))
+    db.connect()
+
+    yield db.conn
+
+    db.configure(original_File)
+
+#-------------------------------------------------------------------------
+
+# Builds a battle with made-up values, any of which can be overridden
+def make_Battle(name: str, **values) -> Battle:
+    fields = {
+        'battleName': name,
+        'date': date(1415, 10, 25),
+        'countriesInvolved': "England, France",
+        'winner': "England",
+        'loser': "France",
+        'victorForces': 8000,
+        'vanquishedForces': 20000,
+        'totalVictorDeaths': 400,
+        'totalVanquishedDeaths': 6000,
+        'significantFiguresPresent': "King Henry V",
+        'notableDeaths': "Edward Duke of York",
+    }
+    fields.update(values)
+    return Battle(**fields)
+
+# Answers input() prompts with the given replies, in order
+def reply_With(monkeypatch, *replies):
+    answers = iter(replies)
+    monkeypatch.setattr('builtins.input', lambda prompt="": next(answers))
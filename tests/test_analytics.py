@@ -0,0 +1,85 @@
+#! /usr/bin/env/ python3
+
+import pytest
+
+import analytics
+import db
+from conftest import make_Battle
+
+#-------------------------------------------------------------------------
+
+# Runs the tests once with NumPy (when it is installed) and once with plain arrays
+@pytest.fixture(params=['numpy', 'array'])
+def with_Numpy(request, monkeypatch):
+    if request.param == 'numpy' and analytics.np is None:
+        pytest.skip("NumPy isn't installed")
+    if request.param == 'array':
+        monkeypatch.setattr(analytics, 'np', None)
+
+# victorForces is NULL in every other battle, totalVanquishedDeaths in all of them
+def add_Battles_With_Nulls(connection):
+    connection.executemany('''
+        INSERT INTO battles (battleName, victorForces, vanquishedForces, totalVictorDeaths, totalVanquishedDeaths)
+        VALUES (?, ?, ?, ?, NULL)
+    ''', [(f"Battle {i}", None if i % 2 else 10 * i, i, 0) for i in range(1, 11)])
+    connection.commit()
+
+# victorForces holds 20, 40, 60, 80 and 100, the percentiles interpolate between them
+EXPECTED_VICTOR_FORCES = {10: 28.0, 25: 40.0, 50: 60.0, 75: 80.0, 90: 92.0}
+
+#-------------------------------------------------------------------------
+
+def test_Percentiles_Leave_Out_Nulls(database, with_Numpy):
+    add_Battles_With_Nulls(database)
+
+    percentiles = analytics.get_Force_Percentiles()
+
+    assert percentiles['victorForces'] == pytest.approx(EXPECTED_VICTOR_FORCES)
+    assert percentiles['vanquishedForces'][50] == pytest.approx(5.5)
+    assert percentiles['totalVanquishedDeaths'] == {}
+
+# A battle saved by another program between the count and the rows mustn't be read
+def test_Force_Columns_Read_One_Snapshot(database, with_Numpy):
+    db.insert_Battles(make_Battle(f"Battle {i}") for i in range(3))
+
+    def insert_Elsewhere(sql):
+        if sql.startswith("SELECT IFNULL"):
+            db.insert_Battle(make_Battle("Late Battle"))
+
+    with db.read_Connection() as reader:
+        reader.set_trace_callback(insert_Elsewhere)
+
+    try:
+        columns = analytics.load_Force_Columns()
+    finally:
+        with db.read_Connection() as reader:
+            reader.set_trace_callback(None)
+
+    assert db.count_Battles() == 4
+    assert list(columns['victorForces']) == [8000] * 3
+
+def test_Casualty_Totals(database):
+    db.insert_Battle(make_Battle("Agincourt"))
+    db.insert_Battle(make_Battle("Hastings", victorForces=2000, totalVictorDeaths=1000))
+
+    totals = analytics.get_Casualty_Totals()
+
+    assert totals['battles'] == 2
+    assert totals['totalDeaths'] == 13400
+    assert totals['casualtyRate'] == pytest.approx(13400 / 50000)
+    assert totals['avgVictorCasualtyRate'] == pytest.approx((0.05 + 0.5) / 2)
+    assert totals['exchangeRatio'] == pytest.approx(12000 / 1400)
+
+def test_Deaths_By_Winner(database):
+    db.insert_Battle(make_Battle("Agincourt"))
+    db.insert_Battle(make_Battle("Hastings", winner="Normandy", totalVanquishedDeaths=100))
+    db.insert_Battle(make_Battle("Crecy"))
+
+    assert analytics.get_Deaths_By('winner') == [
+        ("England", 2, 800, 12000, 12800),
+        ("Normandy", 1, 400, 100, 500),
+    ]
+    assert analytics.get_Deaths_By('winner', limit=1, order='battles')[0][0] == "England"
+
+    with pytest.raises(ValueError):
+        analytics.get_Deaths_By('weather')
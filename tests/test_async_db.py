@@ -0,0 +1,67 @@
+#! /usr/bin/env/ python3
+
+import asyncio
+import sqlite3
+
+import pytest
+
+import db
+from async_db import Async_Battle_Store
+from conftest import make_Battle
+
+#-------------------------------------------------------------------------
+
+def test_Store_Round_Trip(database):
+    async def run():
+        async with Async_Battle_Store() as store:
+            battle = make_Battle("Hastings")
+            db_Id = await store.insert_Battle(battle)
+
+            battle.winner = "Normandy"
+            assert await store.update_Battle(battle)
+
+            found = await store.find_Battle_By_Name("  hastings ")
+            assert (found.db_id, found.winner) == (db_Id, "Normandy")
+
+            assert await store.remove_Battle(battle)
+            assert await store.get_Battle_By_Id(db_Id) is None
+            assert not await store.remove_Battle(battle)
+            assert not await store.update_Battle(make_Battle("Unsaved"))
+
+    asyncio.run(run())
+
+# Writes waiting together share one commit, and a failing one only fails its own caller
+def test_Concurrent_Writes_Are_Grouped(database):
+    battles = [make_Battle(f"Battle {i}") for i in range(20)]
+    # A battle without a date can't be saved
+    battles[7].date = None
+
+    async def run():
+        async with Async_Battle_Store() as store:
+            results = await asyncio.gather(*(store.insert_Battle(battle) for battle in battles),
+                                           return_exceptions=True)
+            names = [battle.battleName async for battle in store.iter_Battles(batch_Size=3)]
+            return store, results, names
+
+    store, results, names = asyncio.run(run())
+
+    assert isinstance(results[7], AttributeError)
+    assert names == [battle.battleName for i, battle in enumerate(battles) if i != 7]
+    assert store.commits < store.writes == 20
+
+    # The menu's connection sees everything the store saved
+    assert db.find_Battle_By_Name("battle 19").db_id == results[19]
+
+def test_Store_Reports_Connection_Errors(tmp_path):
+    original_File = db.DB_FILE
+    db.configure(str(tmp_path / "missing" / "battles.sqlite"))
+
+    async def run():
+        async with Async_Battle_Store() as store:
+            await store.get_Battle_By_Id(1)
+
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="unable to open"):
+            asyncio.run(run())
+    finally:
+        db.configure(original_File)
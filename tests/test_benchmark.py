@@ -0,0 +1,45 @@
+#! /usr/bin/env/ python3
+
+import pytest
+
+import benchmark
+import db
+
+#-------------------------------------------------------------------------
+
+# Smaller name pools keep generation quick
+@pytest.fixture(autouse=True)
+def small_Pools(monkeypatch):
+    monkeypatch.setattr(benchmark, 'PLACE_POOL_SIZE', 100)
+    monkeypatch.setattr(benchmark, 'PEOPLE_POOL_SIZE', 100)
+
+def test_Generated_Battles_Repeat_With_Seed():
+    first = list(benchmark.generate_Battles(50, seed=3))
+
+    assert first == list(benchmark.generate_Battles(50, seed=3))
+    assert first != list(benchmark.generate_Battles(50, seed=4))
+    assert len({battle.battleName for battle in first}) == 50
+
+    for battle in first:
+        assert battle.winner != battle.loser
+        assert battle.totalVictorDeaths <= battle.victorForces
+
+# Every operation is timed under its own name, against a database of the requested size
+def test_Run_Size(tmp_path):
+    original_File = db.DB_FILE
+
+    try:
+        results = benchmark.run_Size(200, str(tmp_path), benchmark.OPERATIONS, 20, 0, report=lambda message: None)
+    finally:
+        db.configure(original_File)
+
+    assert [result['operation'] for result in results] == ['generate', *benchmark.OPERATIONS]
+    assert all(result['dataset_rows'] == 200 for result in results)
+    assert results[1]['rows'] == 200
+
+    for result in results:
+        assert result['max_rss_growth_kb'] is None or 0 <= result['max_rss_growth_kb'] <= result['max_rss_kb']
+
+def test_Parse_Size():
+    assert benchmark.parse_Size("1M") == 1_000_000
+    assert benchmark.parse_Size("2500") == 2500
@@ -0,0 +1,57 @@
+#! /usr/bin/env/ python3
+
+import db
+from conftest import make_Battle
+
+#-------------------------------------------------------------------------
+
+# Runs one statement through a connection of its own, the way another program would
+def change_Elsewhere(sql: str, params: tuple = ()):
+    other = db.open_Connection()
+    other.execute(sql, params)
+    other.commit()
+    other.close()
+
+#-------------------------------------------------------------------------
+
+def test_Cache_Returns_Copies(database):
+    battle = make_Battle("Hastings")
+    db.insert_Battle(battle)
+
+    cached = db.get_Battle_By_Id(battle.db_id)
+    cached.winner = "Wales"
+    # The counts are kept for the life of the program, across databases
+    hits = db.battle_Cache.hits
+
+    assert db.get_Battle_By_Id(battle.db_id).winner == "England"
+    assert db.battle_Cache.hits == hits + 1
+
+def test_Cache_Sees_Updates_From_Other_Programs(database):
+    battle = make_Battle("Hastings")
+    db.insert_Battle(battle)
+    assert db.get_Battle_By_Id(battle.db_id).winner == "England"
+
+    change_Elsewhere("UPDATE battles SET winner = 'Wales' WHERE id = ?", (battle.db_id,))
+
+    assert db.get_Battle_By_Id(battle.db_id).winner == "Wales"
+
+def test_Cache_Sees_Deletes_From_Other_Programs(database):
+    battle = make_Battle("Hastings")
+    db.insert_Battle(battle)
+    assert db.get_Battle_By_Id(battle.db_id) is not None
+
+    change_Elsewhere("DELETE FROM battles WHERE id = ?", (battle.db_id,))
+
+    assert db.get_Battle_By_Id(battle.db_id) is None
+
+# A cached name is dropped once another program renames its battle
+def test_Name_Lookup_Sees_Renames_From_Other_Programs(database):
+    battle = make_Battle("Hastings")
+    db.insert_Battle(battle)
+    assert db.find_Battle_By_Name("hastings").battleName == "Hastings"
+
+    change_Elsewhere("UPDATE battles SET battleName = 'Crecy', battleNameKey = 'crecy' WHERE id = ?",
+                     (battle.db_id,))
+
+    assert db.find_Battle_By_Name("hastings") is None
+    assert db.find_Battle_By_Name("crecy").db_id == battle.db_id
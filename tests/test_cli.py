@@ -0,0 +1,112 @@
+#! /usr/bin/env/ python3
+
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+from datetime import date
+
+import pytest
+
+import cli
+import db
+from conftest import make_Battle
+
+#-------------------------------------------------------------------------
+
+# Runs one command against the test database, returning (exit status, stdout, stderr)
+def run(capsys, *argv) -> tuple[int, str, str]:
+    status = cli.main(['--db', db.DB_FILE, *argv])
+    captured = capsys.readouterr()
+    return status, captured.out, captured.err
+
+def add_Battles(connection):
+    db.insert_Battle(make_Battle("Battle Of Agincourt"))
+    db.insert_Battle(make_Battle("Battle Of Hastings", date=date(1066, 10, 14),
+                                 winner="Duchy Of Normandy", loser="England"))
+    connection.execute("INSERT INTO battles (battleName, battleNameKey) VALUES ('Unknown', 'unknown')")
+    connection.commit()
+
+#-------------------------------------------------------------------------
+
+def test_Get_By_Name_And_Id(database, capsys):
+    add_Battles(database)
+
+    status, out, _ = run(capsys, 'get', 'battle of  HASTINGS', '--format', 'jsonl')
+    assert status == 0
+    record = json.loads(out)
+    assert (record['id'], record['date'], record['winner']) == (2, "1066-10-14", "Duchy Of Normandy")
+
+    status, out, _ = run(capsys, 'get', '--id', '1', '--format', 'jsonl')
+    assert json.loads(out)['battleName'] == "Battle Of Agincourt"
+
+def test_Get_Unknown_Name_Suggests_Close_Ones(database, capsys):
+    add_Battles(database)
+
+    status, out, err = run(capsys, 'get', 'Battle of Hastigns')
+
+    assert status == 1
+    assert out == ""
+    assert "Did you mean: Battle Of Hastings" in err
+
+def test_List_In_Date_Order_With_Undated_Battle(database, capsys):
+    add_Battles(database)
+
+    status, out, _ = run(capsys, 'list', '--order', 'asc', '--format', 'jsonl')
+
+    assert status == 0
+    records = [json.loads(line) for line in out.splitlines()]
+    assert [(record['battleName'], record['date']) for record in records] == [
+        ("Battle Of Hastings", "1066-10-14"),
+        ("Battle Of Agincourt", "1415-10-25"),
+        ("Unknown", None),
+    ]
+
+def test_Export_Csv(database, capsys):
+    add_Battles(database)
+
+    status, out, _ = run(capsys, 'export', '--format', 'csv')
+
+    assert status == 0
+    rows = list(csv.DictReader(io.StringIO(out)))
+    assert [row['date'] for row in rows] == ["1415-10-25", "1066-10-14", ""]
+    assert rows[0]['victorForces'] == "8000"
+
+def test_Add_Validates_And_Saves(database, capsys):
+    status, out, _ = run(capsys, 'add', '--name', 'poitiers', '--date', '1356-09-19', '--winner', 'england',
+                         '--victor-forces', '6000')
+    assert status == 0
+    assert db.get_Battle_By_Id(int(out)).winner == "England"
+
+    status, _, err = run(capsys, 'add', '--name', 'Crecy', '--date', '1346-08-26', '--victor-forces', '1.5')
+    assert status == 1
+    assert "victorForces '1.5' must be a whole number" in err
+
+def test_Bad_Date_Option_Is_A_Usage_Error(database, capsys):
+    with pytest.raises(SystemExit) as exit_Info:
+        cli.main(['--db', db.DB_FILE, 'anniversaries', '--today', '2024-13-01'])
+
+    assert exit_Info.value.code == 2
+    assert "'2024-13-01' is not a date in YYYY-MM-DD format" in capsys.readouterr().err
+
+def test_Stats(database, capsys):
+    add_Battles(database)
+
+    status, out, _ = run(capsys, 'stats', '--format', 'json')
+
+    stats = json.loads(out)
+    assert status == 0
+    assert (stats['battles'], stats['firstDate'], stats['lastDate']) == (3, "1066-10-14", "1415-10-25")
+    assert stats['victorForces'] == 16000
+
+# Modules only some commands need stay unloaded, so one-shot commands start quickly
+# (migrations and the modules it uses are loaded by db.py for LATEST_VERSION)
+def test_Startup_Imports():
+    folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    loaded = subprocess.run([sys.executable, "-c", "import sys, cli; print(' '.join(sys.modules))"],
+                            cwd=folder, capture_output=True, text=True, check=True).stdout.split()
+
+    for name in ('render', 'analytics', 'export', 'importer', 'json', 'csv', 'urllib'):
+        assert name not in loaded
@@ -0,0 +1,50 @@
+#! /usr/bin/env/ python3
+
+import pytest
+
+import db
+from business import Battle_Columns
+from conftest import make_Battle
+
+#-------------------------------------------------------------------------
+
+def test_Battles_Have_No_Dict():
+    battle = make_Battle("Hastings")
+
+    assert not hasattr(battle, '__dict__')
+    with pytest.raises(AttributeError):
+        battle.nickname = "Senlac"
+
+def test_Views_Read_Like_Battles(database):
+    battles = [make_Battle("Hastings"), make_Battle("Crecy", countriesInvolved="England, France")]
+    db.insert_Battles(battles)
+
+    columns = db.load_Battle_Columns(batch_Size=1)
+
+    assert len(columns) == 2
+    assert [view.to_Battle() for view in columns] == battles
+    assert columns[-1].db_id == 2
+    assert columns[0].total_Deaths == 6400
+
+    # Repeated strings are stored once
+    assert columns[0].countriesInvolved is columns[1].countriesInvolved
+
+    with pytest.raises(IndexError):
+        columns[2]
+
+def test_Unsaved_Battle_Has_No_Id():
+    columns = Battle_Columns([make_Battle("Hastings")])
+
+    assert columns[0].db_id is None
+    assert columns[0].to_Battle().db_id is None
+
+# A missing date is stored as 0 and read back as None, a missing number as 0
+def test_Null_Fields(database):
+    database.execute("INSERT INTO battles (battleName, battleNameKey) VALUES ('Unknown', 'unknown')")
+    database.commit()
+
+    (view,) = db.load_Battle_Columns()
+
+    assert view.date is None
+    assert view.victorForces == 0
+    assert view.winner == ""
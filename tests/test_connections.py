@@ -0,0 +1,63 @@
+#! /usr/bin/env/ python3
+
+import sqlite3
+
+import pytest
+
+import db
+from conftest import make_Battle
+
+#-------------------------------------------------------------------------
+
+def test_Connections_Use_Wal(database):
+    assert database.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    assert database.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+    with db.read_Connection() as reader:
+        assert reader.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+def test_Readers_Are_Read_Only(database):
+    with db.read_Connection() as reader:
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            reader.execute("DELETE FROM battles")
+
+def test_Readers_Are_Reused(database):
+    with db.read_Connection() as reader:
+        first = reader
+
+    with db.read_Connection() as reader:
+        assert reader is first
+
+    db.close()
+    assert db.read_Pool == []
+
+# A reader in the middle of a transaction doesn't hold up the writer, and once it
+# goes back to the pool the next borrower sees what was committed
+def test_Reader_Does_Not_Block_Writer(database):
+    db.insert_Battle(make_Battle("Hastings"))
+
+    with db.read_Connection() as reader:
+        reader.execute("BEGIN")
+        assert reader.execute("SELECT COUNT(*) FROM battles").fetchone()[0] == 1
+
+        db.insert_Battle(make_Battle("Crecy"))
+
+        # Still reading from the snapshot its transaction started with
+        assert reader.execute("SELECT COUNT(*) FROM battles").fetchone()[0] == 1
+
+    assert db.count_Battles() == 2
+
+# Characters that mean something in a URI are escaped, so read-only connections open the right file
+def test_Awkward_File_Names(tmp_path):
+    original_File = db.DB_FILE
+    path = tmp_path / "war & peace #1 ?100%.sqlite"
+
+    try:
+        db.configure(str(path))
+        db.insert_Battle(make_Battle("Hastings"))
+        assert db.count_Battles() == 1
+    finally:
+        db.configure(original_File)
+
+    assert path.exists()
+    assert db.get_File_Uri(str(path)).endswith("/war & peace %231 %3F100%25.sqlite")
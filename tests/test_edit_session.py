@@ -0,0 +1,87 @@
+#! /usr/bin/env/ python3
+
+import db
+from conftest import make_Battle, reply_With
+
+#-------------------------------------------------------------------------
+
+# Records every UPDATE sent to the database while a test runs
+# Statements run by triggers are traced with the text of the statement that fired them
+def trace_Updates(connection) -> list[str]:
+    statements = []
+    connection.set_trace_callback(lambda sql: statements.append(sql) if sql.startswith("UPDATE") else None)
+    return statements
+
+#-------------------------------------------------------------------------
+
+def test_Commit_Writes_Only_Changed_Columns(database):
+    battle = make_Battle("Hastings")
+    db.insert_Battle(battle)
+    updates = trace_Updates(database)
+
+    with db.Edit_Session() as session:
+        session.track(battle)
+        battle.winner = "Duchy Of Normandy"
+        battle.victorForces = 7000
+
+    database.set_trace_callback(None)
+
+    (update,) = set(updates)
+    assert update == "UPDATE battles SET winner = 'Duchy Of Normandy', victorForces = 7000 WHERE id = 1"
+
+    saved = db.get_Battle_By_Id(battle.db_id)
+    assert (saved.winner, saved.victorForces) == ("Duchy Of Normandy", 7000)
+
+def test_Unchanged_Battle_Is_Not_Written(database):
+    battle = make_Battle("Hastings")
+    db.insert_Battle(battle)
+
+    session = db.Edit_Session()
+    session.track(battle)
+
+    assert session.commit() == 0
+
+def test_Rollback_Reverts_Battle(database):
+    battle = make_Battle("Hastings")
+    db.insert_Battle(battle)
+
+    session = db.Edit_Session()
+    session.track(battle)
+    battle.winner = "Wales"
+    session.rollback()
+
+    assert battle.winner == "England"
+    assert session.commit() == 0
+
+#-------------------------------------------------------------------------
+
+def test_Edit_Menu_Saves_Changes(database, monkeypatch, capsys):
+    db.insert_Battle(make_Battle("Hastings"))
+    reply_With(monkeypatch, "hastings", "4", "wales", "0")
+
+    db.edit_Battle()
+
+    assert "Edit finished." in capsys.readouterr().out
+    assert db.get_Battle_By_Id(1).winner == "Wales"
+
+def test_Edit_Menu_Discards_Changes(database, monkeypatch, capsys):
+    db.insert_Battle(make_Battle("Hastings"))
+    reply_With(monkeypatch, "hastings", "4", "wales", "12")
+
+    db.edit_Battle()
+
+    assert "Changes discarded." in capsys.readouterr().out
+    assert db.get_Battle_By_Id(1).winner == "England"
+
+# Battles saved by other programs can have NULL fields, those are shown empty
+def test_Edit_Undated_Battle(database, monkeypatch, capsys):
+    database.execute("INSERT INTO battles (battleName, battleNameKey) VALUES ('Unknown', 'unknown')")
+    database.commit()
+    reply_With(monkeypatch, "unknown", "3", "england", "0")
+
+    db.edit_Battle()
+
+    out = capsys.readouterr().out
+    assert "Date: \n" in out
+    assert "Victor Forces: \n" in out
+    assert db.get_Battle_By_Id(1).countriesInvolved == "england"
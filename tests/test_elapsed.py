@@ -0,0 +1,99 @@
+#! /usr/bin/env/ python3
+
+import json
+from datetime import date
+
+import pytest
+
+import cli
+import db
+import elapsed
+from business import get_Elapsed
+from conftest import make_Battle
+
+# Today's date in every test, so the results don't change from day to day
+TODAY = date(2024, 3, 1)
+
+BATTLE_DATES = [date(1066, 10, 14), date(1415, 10, 25), date(1916, 2, 29), date(2020, 2, 29),
+                date(2023, 3, 1), date(2023, 3, 2), date(2024, 2, 29), date(2024, 3, 1)]
+
+#-------------------------------------------------------------------------
+
+# Saves a battle for each of BATTLE_DATES, and two without a usable date
+def add_Battles(connection):
+    db.insert_Battles(make_Battle(f"Battle {i}", date=battle_Date) for i, battle_Date in enumerate(BATTLE_DATES))
+    connection.execute("INSERT INTO battles (battleName, battleNameKey, date) "
+                       "VALUES ('Unknown', 'unknown', NULL), ('Garbled', 'garbled', 'sometime')")
+    connection.commit()
+
+@pytest.fixture(params=['numpy', 'array'])
+def with_Numpy(request, monkeypatch):
+    if request.param == 'numpy' and elapsed.np is None:
+        pytest.skip("NumPy isn't installed")
+    if request.param == 'array':
+        monkeypatch.setattr(elapsed, 'np', None)
+
+#-------------------------------------------------------------------------
+
+# Every battle gets the same years and days get_Elapsed works out for it alone
+def test_All_Elapsed_Matches_One_At_A_Time(database, with_Numpy):
+    add_Battles(database)
+
+    ids, years, days = elapsed.get_All_Elapsed(TODAY)
+
+    assert list(ids) == list(range(1, len(BATTLE_DATES) + 1))
+    assert list(zip(years, days)) == [get_Elapsed(battle_Date, TODAY) for battle_Date in BATTLE_DATES]
+
+def test_Undated_Battles_Counted_Separately(database, with_Numpy):
+    add_Battles(database)
+
+    assert len(elapsed.load_Ordinals()[0]) == len(BATTLE_DATES)
+    assert elapsed.count_Undated() == 2
+
+def test_Age_Buckets(database, with_Numpy):
+    add_Battles(database)
+
+    _, years, _ = elapsed.get_All_Elapsed(TODAY)
+
+    assert elapsed.get_Age_Buckets(years) == [(0, 5), (100, 1), (600, 1), (900, 1)]
+
+def test_Cli_Ages_Reports_Undated_Battles(database, capsys):
+    add_Battles(database)
+
+    assert cli.main(['--db', db.DB_FILE, 'ages', '--today', '2024-03-01', '--format', 'json']) == 0
+
+    entries = json.loads(capsys.readouterr().out)
+    assert entries[-1] == {'years': None, 'battles': 2}
+    assert sum(entry['battles'] for entry in entries) == len(BATTLE_DATES) + 2
+
+#-------------------------------------------------------------------------
+
+def test_Upcoming_Anniversaries(database):
+    add_Battles(database)
+
+    upcoming = elapsed.get_Upcoming_Anniversaries(days=365, today=date(2024, 2, 27))
+    found = [(anniversary, years, battle.battleName) for anniversary, years, battle in upcoming]
+
+    # 29 February battles have one this year, the one from 2024 itself has nothing to remember yet
+    assert found[:4] == [
+        (date(2024, 2, 29), 108, "Battle 2"),
+        (date(2024, 2, 29), 4, "Battle 3"),
+        (date(2024, 3, 1), 1, "Battle 4"),
+        (date(2024, 3, 2), 1, "Battle 5"),
+    ]
+    assert (date(2024, 10, 14), 958, "Battle 0") in found
+
+def test_Month_Day_Ranges_Split_At_New_Year():
+    assert elapsed.get_Month_Day_Ranges(date(2023, 12, 30), date(2024, 1, 2)) == [
+        (2023, '12-30', '12-31'),
+        (2024, '01-01', '01-02'),
+    ]
+
+# The menu option says so instead of failing on a battle without a date
+def test_Time_Since_Undated_Battle(database, monkeypatch, capsys):
+    add_Battles(database)
+    monkeypatch.setattr('builtins.input', lambda prompt="": "unknown")
+
+    db.calculate_Time_Diff()
+
+    assert "The Battle of Unknown has no date." in capsys.readouterr().out
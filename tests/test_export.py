@@ -0,0 +1,81 @@
+#! /usr/bin/env/ python3
+
+import gzip
+import io
+import json
+import os
+from datetime import date
+
+import pytest
+
+import db
+import export
+from conftest import make_Battle
+
+#-------------------------------------------------------------------------
+
+# Rows as EXPORT_SQL returns them: id, then BATTLE_FIELDS
+COLUMNAR_ROWS = [
+    (1, "Hastings", "1066-10-14", "England", "Duchy Of Normandy", "England", 9500, 6500, 2000, 4000, "", "Harold"),
+    (2, None, None, None, None, None, None, None, None, None, None, None),
+    (3, "Garbled", "sometime", "", "", "", 0, 5, None, 0, None, ""),
+]
+
+def test_Columnar_Round_Trip_With_Nulls():
+    out = io.BytesIO()
+    assert export.write_Columnar(iter(COLUMNAR_ROWS), out) == len(COLUMNAR_ROWS)
+
+    out.seek(0)
+    (block,) = export.read_Columnar(out)
+
+    rows = list(zip(*(block[name] for name in export.EXPORT_FIELDS)))
+    assert rows[0] == (1, "Hastings", date(1066, 10, 14)) + COLUMNAR_ROWS[0][3:]
+    assert rows[1] == COLUMNAR_ROWS[1]
+    # A date that isn't YYYY-MM-DD can't be stored as an ordinal, so it comes back as NULL
+    assert rows[2] == (3, "Garbled", None) + COLUMNAR_ROWS[2][3:]
+
+# Files written before the null bitmaps were added still read
+def test_Columnar_Reads_Version_1(monkeypatch):
+    rows = [COLUMNAR_ROWS[0]]
+
+    monkeypatch.setattr(export, 'COLUMNAR_MAGIC', export.COLUMNAR_MAGIC_V1)
+    monkeypatch.setattr(export, 'get_Null_Bitmap', lambda values: b"")
+    out = io.BytesIO()
+    export.write_Columnar(iter(rows), out)
+    monkeypatch.undo()
+
+    out.seek(0)
+    (block,) = export.read_Columnar(out)
+    assert block['date'] == [date(1066, 10, 14)]
+    assert block['victorForces'] == [9500]
+
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_Export_Shards(database, tmp_path, monkeypatch, workers):
+    # Workers are given the absolute path, the program keeps the one it was configured with
+    monkeypatch.chdir(tmp_path)
+    db.configure("battles.sqlite")
+    db.insert_Battles(make_Battle(f"Battle {i}") for i in range(10))
+    folder = tmp_path / "exports"
+
+    export_Report = export.export_Battles(str(folder), 'jsonl', 'gzip', workers=workers, shard_Count=3,
+                                          report=lambda message: None)
+
+    assert db.DB_FILE == "battles.sqlite"
+
+    manifest = json.loads((folder / "manifest.json").read_text(encoding='utf-8'))
+    assert manifest['rows'] == export_Report.rows_Exported == 10
+    assert len(manifest['shards']) == 3
+
+    names = []
+    for path in export_Report.paths:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            names.extend(json.loads(line)['battleName'] for line in f)
+    assert names == [f"Battle {i}" for i in range(10)]
+
+def test_Export_Refuses_Unknown_Format(database, tmp_path):
+    with pytest.raises(ValueError, match="Unknown export format"):
+        export.export_Battles(str(tmp_path / "exports"), 'xml')
+
+    assert not os.path.exists(tmp_path / "exports")
@@ -0,0 +1,93 @@
+#! /usr/bin/env/ python3
+
+import csv
+import json
+
+import pytest
+
+import db
+import importer
+from conftest import reply_With
+
+#-------------------------------------------------------------------------
+
+# A valid record for each number, every field filled in
+def make_Record(number: int) -> dict:
+    return {
+        'battleName': f"battle {number}", 'date': f"{1000 + number}-06-01", 'countriesInvolved': "England, France",
+        'winner': "england", 'loser': "france", 'victorForces': 100 * number, 'vanquishedForces': 50,
+        'totalVictorDeaths': number, 'totalVanquishedDeaths': 5,
+        'significantFiguresPresent': "", 'notableDeaths': "",
+    }
+
+def write_Jsonl(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records), encoding='utf-8')
+
+def get_Names() -> list[str]:
+    return [battle.battleName for battle in db.iter_Battles()]
+
+#-------------------------------------------------------------------------
+
+def test_Import_Csv(database, tmp_path):
+    path = tmp_path / "battles.csv"
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(make_Record(1)))
+        writer.writeheader()
+        writer.writerows(make_Record(number) for number in range(1, 6))
+
+    report = importer.import_Battles(str(path), batch_Size=2, report=lambda message: None)
+
+    assert (report.rows_Imported, report.rows_Skipped) == (5, 0)
+    assert get_Names() == [f"Battle {number}" for number in range(1, 6)]
+
+    # The imported battles can be found by name like any other
+    assert db.find_Battle_By_Name("battle 3").victorForces == 300
+
+def test_Import_Skips_Invalid_Records(database, tmp_path):
+    path = tmp_path / "battles.jsonl"
+    records = [make_Record(number) for number in range(1, 6)]
+    records[1]['date'] = "01/06/1002"
+    write_Jsonl(path, records)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("not json\n\n")
+
+    messages = []
+    report = importer.import_Battles(str(path), skip_Invalid=True, report=messages.append)
+
+    assert (report.rows_Imported, report.rows_Skipped) == (4, 2)
+    assert "Skipping record 2: date '01/06/1002' is not in YYYY-MM-DD format." in messages
+    assert "Battle 2" not in get_Names()
+
+# A failed import keeps the batches it committed, and --resume carries on after them
+def test_Resume_After_Failure(database, tmp_path):
+    path = tmp_path / "battles.jsonl"
+    records = [make_Record(number) for number in range(1, 11)]
+    records[6]['victorForces'] = -1
+    write_Jsonl(path, records)
+
+    with pytest.raises(ValueError, match="Record 7"):
+        importer.import_Battles(str(path), batch_Size=3, report=lambda message: None)
+
+    assert get_Names() == [f"Battle {number}" for number in range(1, 7)]
+
+    report = importer.import_Battles(str(path), batch_Size=3, resume=True, skip_Invalid=True,
+                                     report=lambda message: None)
+
+    assert (report.rows_Resumed, report.rows_Imported, report.rows_Skipped) == (6, 3, 1)
+    assert get_Names() == [f"Battle {number}" for number in range(1, 11) if number != 7]
+
+def test_Unknown_File_Format(database, tmp_path):
+    with pytest.raises(ValueError, match="Can't tell the format"):
+        importer.import_Battles(str(tmp_path / "battles.txt"))
+
+#-------------------------------------------------------------------------
+
+# Whole numbers typed into the menu: a negative one and text each get their own message
+def test_Menu_Asks_Again_For_Whole_Numbers(monkeypatch, capsys):
+    reply_With(monkeypatch, "-5", "ten", "3.5", "42")
+
+    assert db.get_Valid_Int("Forces: ") == 42
+
+    out = capsys.readouterr().out
+    assert out.count("Value must be zero or greater.") == 1
+    assert out.count("Invalid input. Please enter a whole number.") == 2
@@ -0,0 +1,85 @@
+#! /usr/bin/env/ python3
+
+import pytest
+
+import db
+import instrument
+from conftest import make_Battle
+
+#-------------------------------------------------------------------------
+
+# Leaves recording off for the next test however this one ends
+@pytest.fixture
+def recording():
+    histogram = instrument.Histogram_Sink()
+    instrument.enable(histogram)
+
+    yield histogram
+
+    instrument.disable()
+
+def get_Names(histogram, kind: str) -> list[str]:
+    return [name for row_Kind, name in histogram.stats if row_Kind == kind]
+
+#-------------------------------------------------------------------------
+
+def test_Nothing_Recorded_While_Disabled(database):
+    histogram = instrument.Histogram_Sink()
+    instrument.sinks.append(histogram)
+
+    try:
+        db.insert_Battle(make_Battle("Hastings"))
+        assert db.count_Battles() == 1
+    finally:
+        instrument.sinks.clear()
+
+    assert histogram.stats == {}
+
+def test_Statements_And_Phases_Are_Timed(database, recording):
+    db.insert_Battles(make_Battle(f"Battle {i}") for i in range(5))
+
+    assert len(list(db.iter_Battles(batch_Size=2))) == 5
+
+    statements = get_Names(recording, 'sql')
+    assert any(name.startswith("INSERT INTO battles") for name in statements)
+    assert any(name.startswith("SELECT id, battleName") for name in statements)
+
+    decode = recording.stats[('phase', "decode rows")]
+    assert (decode['count'], decode['rows']) == (3, 5)
+    assert recording.stats[('fetch', "fetchmany")]['rows'] == 5
+
+    summary = recording.summary()
+    assert [row['total_ms'] for row in summary] == sorted((row['total_ms'] for row in summary), reverse=True)
+
+def test_Histogram_Percentiles():
+    histogram = instrument.Histogram_Sink()
+
+    # 99 calls of about 3 microseconds and one of 1 millisecond
+    for _ in range(99):
+        histogram.record('phase', "work", 0.000003, None)
+    histogram.record('phase', "work", 0.001, None)
+
+    (row,) = histogram.summary()
+    assert row['count'] == 100
+    assert row['p50_ms'] == 0.004
+    assert row['p99_ms'] == 0.004
+    assert row['max_ms'] == pytest.approx(1.0)
+
+# The trace callback also sees the statements run by triggers
+def test_Trace_Callbacks(database, tmp_path):
+    path = tmp_path / "trace.log"
+    histogram = instrument.Histogram_Sink()
+    db.close()
+
+    instrument.enable(histogram, instrument.Log_File_Sink(str(path)), trace_Callbacks=True)
+    try:
+        db.insert_Battle(make_Battle("Hastings"))
+        assert instrument.traced_Connections
+    finally:
+        instrument.disable()
+
+    assert instrument.traced_Connections == []
+    assert any("battles_fts" in name for name in get_Names(histogram, 'trace'))
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert any(line.split("\t")[1] == 'trace' for line in lines)
@@ -0,0 +1,67 @@
+#! /usr/bin/env/ python3
+
+import types
+
+import db
+from conftest import make_Battle, reply_With
+
+#-------------------------------------------------------------------------
+
+def test_Battles_Stream_In_Batches(database):
+    battles = [make_Battle(f"Battle {i}") for i in range(7)]
+    db.insert_Battles(battles)
+
+    streamed = db.iter_Battles(batch_Size=3)
+
+    # Nothing is read until the first battle is asked for
+    assert isinstance(streamed, types.GeneratorType)
+    assert [battle.battleName for battle in streamed] == [battle.battleName for battle in battles]
+    assert [battle.db_id for battle in db.get_All_Battles()] == list(range(1, 8))
+    assert db.count_Battles() == 7
+
+def test_Battles_Read_Back_As_Saved(database):
+    battle = make_Battle("Battle Of Hastings")
+    db.insert_Battle(battle)
+
+    (loaded,) = db.get_All_Battles()
+    assert loaded == battle
+    assert loaded.db_id == battle.db_id
+
+def test_Battles_By_Ids(database):
+    db.insert_Battles(make_Battle(f"Battle {i}") for i in range(5))
+
+    found = db.get_Battles_By_Ids([2, 4, 99])
+    assert sorted(battle.db_id for battle in found) == [2, 4]
+    assert db.get_Battles_By_Ids([]) == []
+
+#-------------------------------------------------------------------------
+
+def test_Delete_Saved_Battle(database, monkeypatch, capsys):
+    battle = make_Battle("Hastings")
+    db.insert_Battle(battle)
+    battles = db.get_All_Battles()
+    reply_With(monkeypatch, "hastings", "1")
+
+    db.delete_Battle(battles)
+
+    assert "Successfully deleted the Battle of Hastings." in capsys.readouterr().out
+    assert battles == []
+    assert db.count_Battles() == 0
+
+def test_Delete_Unsaved_Battle_From_List(database, monkeypatch, capsys):
+    battles = [make_Battle("Hastings")]
+    reply_With(monkeypatch, "hastings", "1")
+
+    db.delete_Battle(battles)
+
+    assert "Successfully deleted the Battle of Hastings." in capsys.readouterr().out
+    assert battles == []
+
+def test_Delete_Cancelled(database, monkeypatch, capsys):
+    db.insert_Battle(make_Battle("Hastings"))
+    reply_With(monkeypatch, "hastings", "2")
+
+    db.delete_Battle()
+
+    assert "Deletion Cancelled." in capsys.readouterr().out
+    assert db.count_Battles() == 1
@@ -0,0 +1,96 @@
+#! /usr/bin/env/ python3
+
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+import db
+import migrations
+
+#-------------------------------------------------------------------------
+
+# Returns everything a migration could have made or filled in: the schema, and the
+# contents of every table except the search index's internal ones
+def get_State(connection) -> tuple:
+    schema = connection.execute("SELECT type, name, sql FROM sqlite_master ORDER BY type, name").fetchall()
+
+    contents = {}
+    for (name,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                                      "AND name NOT LIKE 'battles_fts%' ORDER BY name").fetchall():
+        contents[name] = sorted(connection.execute(f"SELECT * FROM {name}").fetchall(), key=repr)
+
+    return schema, contents
+
+# Makes a database the way the program did before schema versions were tracked
+def make_Version_0(path) -> sqlite3.Connection:
+    connection = sqlite3.connect(path)
+
+    with closing(connection.cursor()) as c:
+        migrations.create_Battles_Table(c)
+
+    connection.executemany('''
+        INSERT INTO battles (battleName, date, countriesInvolved, winner, loser, victorForces,
+            vanquishedForces, totalVictorDeaths, totalVanquishedDeaths,
+            significantFiguresPresent, notableDeaths)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        ("Battle Of Hastings", "1066-10-14", "England, Duchy of Normandy", "Duchy Of Normandy", "England",
+         9500, 6500, 2000, 4000, "William the Conqueror", "King Harold II of England"),
+        ("Battle  of agincourt", "1415-10-25", "England, France", "England", "France",
+         8000, 20000, 400, 6000, "King Henry V", "Edward Duke of York"),
+        ("Unknown", None, None, None, None, None, None, None, None, None, None),
+    ])
+    connection.commit()
+
+    return connection
+
+#-------------------------------------------------------------------------
+
+def test_Versions_Count_Up():
+    assert [m.version for m in migrations.MIGRATIONS] == list(range(1, migrations.LATEST_VERSION + 1))
+
+# An up to date database is only checked, nothing is migrated
+def test_Current_Database_Is_Not_Migrated(database, monkeypatch):
+    def migrate(connection, report=None):
+        raise AssertionError("migrated a current database")
+
+    monkeypatch.setattr(migrations, 'migrate', migrate)
+
+    db.ensure_Schema()
+    assert migrations.get_Version(database) == migrations.LATEST_VERSION
+
+def test_Migrate_From_Version_0(tmp_path):
+    with closing(make_Version_0(tmp_path / "old.sqlite")) as connection:
+        assert migrations.migrate(connection, batch_Size=1) == len(migrations.MIGRATIONS)
+        assert migrations.get_Version(connection) == migrations.LATEST_VERSION
+
+        # Rows saved before the later columns and tables existed were filled in
+        assert connection.execute("SELECT COUNT(*) FROM battles WHERE battleNameKey IS NULL").fetchone()[0] == 0
+        assert connection.execute("SELECT battles FROM battle_totals").fetchone()[0] == 3
+        assert connection.execute("SELECT COUNT(*) FROM summary_backfill").fetchone()[0] == 0
+
+        assert migrations.migrate(connection) == 0
+
+# Every step can run again over its own work, which is what an interrupted migration does
+def test_Migrations_Run_Again_Change_Nothing(tmp_path):
+    with closing(make_Version_0(tmp_path / "old.sqlite")) as connection:
+        migrations.migrate(connection)
+        state = get_State(connection)
+
+        connection.execute("PRAGMA user_version = 0")
+        assert migrations.migrate(connection) == len(migrations.MIGRATIONS)
+
+        assert get_State(connection) == state
+
+def test_Migrate_Refuses_Open_Transaction(tmp_path):
+    with closing(make_Version_0(tmp_path / "old.sqlite")) as connection:
+        connection.execute("UPDATE battles SET winner = 'France' WHERE id = 1")
+
+        with pytest.raises(sqlite3.ProgrammingError):
+            migrations.migrate(connection)
+
+        # The caller's change is still theirs to commit or roll back
+        assert connection.in_transaction
+        connection.rollback()
+        assert migrations.get_Version(connection) == 0
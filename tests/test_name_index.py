@@ -0,0 +1,57 @@
+#! /usr/bin/env/ python3
+
+import db
+from conftest import make_Battle
+
+#-------------------------------------------------------------------------
+
+def test_Lookup_Ignores_Case_And_Spacing(database):
+    battle = make_Battle("Battle Of Hastings")
+    db.insert_Battle(battle)
+
+    assert db.find_Battle_Id("  battle   of HASTINGS ") == battle.db_id
+    assert db.find_Battle_By_Name("battle of hastings").battleName == "Battle Of Hastings"
+    assert db.find_Battle_Id("Battle Of Crecy") is None
+
+# When several battles share a name, the one saved first is always returned
+def test_Lowest_Id_Wins_After_Restart(database):
+    first = make_Battle("Zzz Test")
+    db.insert_Battle(first)
+
+    # A restart starts with an empty index
+    db.close()
+    second = make_Battle("zzz test")
+    db.insert_Battle(second)
+
+    assert db.find_Battle_Id("zzz test") == first.db_id
+
+def test_Lowest_Id_Wins_With_Name_Cached(database):
+    first = make_Battle("Zzz Test")
+    db.insert_Battle(first)
+    assert db.find_Battle_Id("zzz test") == first.db_id
+
+    db.insert_Battle(make_Battle("Zzz Test"))
+
+    assert db.find_Battle_Id("zzz test") == first.db_id
+
+def test_Renamed_Battle_Found_Under_New_Name(database):
+    battle = make_Battle("Hastings")
+    db.insert_Battle(battle)
+    assert db.find_Battle_Id("hastings") == battle.db_id
+
+    battle.battleName = "Crecy"
+    db.update_Battle(battle)
+
+    assert db.find_Battle_Id("hastings") is None
+    assert db.find_Battle_Id("crecy") == battle.db_id
+
+def test_Deleted_Battle_Leaves_Older_Duplicate(database):
+    first = make_Battle("Hastings")
+    second = make_Battle("Hastings")
+    db.insert_Battle(first)
+    db.insert_Battle(second)
+    assert db.find_Battle_Id("hastings") == first.db_id
+
+    db.remove_Battle(first)
+
+    assert db.find_Battle_Id("hastings") == second.db_id
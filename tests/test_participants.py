@@ -0,0 +1,71 @@
+#! /usr/bin/env/ python3
+
+from contextlib import closing
+
+import db
+import participants
+from conftest import make_Battle
+
+#-------------------------------------------------------------------------
+
+# Returns the (name, role) rows of a battle's countries, or of its people
+def get_Rows(connection, table: str, db_id: int) -> list[tuple]:
+    names, key = ('countries', 'countryId') if table == 'battle_countries' else ('people', 'personId')
+    return [tuple(row) for row in connection.execute(f'''
+        SELECT n.name, j.role FROM {table} j JOIN {names} n ON n.id = j.{key}
+        WHERE j.battleId = ? ORDER BY j.role, n.name
+    ''', (db_id,))]
+
+#-------------------------------------------------------------------------
+
+def test_Split_List():
+    assert participants.split_List(" England,  France ,,") == ["England", "France"]
+    assert participants.split_List("Louis I (Count of Flanders, Nevers), Rudolph") == [
+        "Louis I (Count of Flanders, Nevers)", "Rudolph"]
+    assert participants.split_List(None) == []
+
+def test_Get_Participants():
+    countries, people = participants.get_Participants(
+        "France (Supported by Bohemia), England", "England", "France", "King Edward III", "")
+
+    assert countries == [("France", "france", 'involved'), ("England", "england", 'involved'),
+                         ("England", "england", 'winner'), ("France", "france", 'loser')]
+    assert people == [("King Edward III", "king edward iii", 'present')]
+
+# The rows follow every insert, change and delete of their battle
+def test_Rows_Follow_Battle(database):
+    battle = make_Battle("Crecy", notableDeaths="King John Of Bohemia")
+    db.insert_Battle(battle)
+    db.insert_Battle(make_Battle("Agincourt"))
+
+    assert get_Rows(database, 'battle_countries', battle.db_id) == [
+        ("England", 'involved'), ("France", 'involved'), ("France", 'loser'), ("England", 'winner')]
+    assert get_Rows(database, 'battle_people', battle.db_id) == [
+        ("King John Of Bohemia", 'died'), ("King Henry V", 'present')]
+
+    with db.Edit_Session() as session:
+        session.track(battle)
+        battle.countriesInvolved = "England, France, Bohemia"
+
+    assert ("Bohemia", 'involved') in get_Rows(database, 'battle_countries', battle.db_id)
+
+    db.remove_Battle(battle)
+
+    assert get_Rows(database, 'battle_countries', battle.db_id) == []
+    assert get_Rows(database, 'battle_people', battle.db_id) == []
+    # Names are shared, so the other battle's stay
+    assert len(get_Rows(database, 'battle_people', 2)) == 2
+
+# Battles saved by other programs are picked up by the backfill
+def test_Missing_Syncs(database):
+    database.execute('''
+        INSERT INTO battles (battleName, battleNameKey, countriesInvolved, winner, loser)
+        VALUES ('Bannockburn', 'bannockburn', 'Scotland, England', 'Scotland', 'England')
+    ''')
+    database.commit()
+
+    with closing(database.cursor()) as c:
+        assert list(participants.iter_Missing_Syncs(c)) == [1]
+        assert list(participants.iter_Missing_Syncs(c)) == []
+
+    assert ("Scotland", 'winner') in get_Rows(database, 'battle_countries', 1)
@@ -0,0 +1,68 @@
+#! /usr/bin/env/ python3
+
+import json
+from contextlib import closing
+
+import pytest
+
+import db
+import importer
+from pipeline import map_Ordered
+
+#-------------------------------------------------------------------------
+
+# Functions run in worker processes have to be importable, so they live at module level
+def square(value: int) -> int:
+    return value * value
+
+def check_Positive(value: int) -> int:
+    if value < 0:
+        raise ValueError(f"{value} is negative")
+    return value
+
+def iter_Then_Fail(count: int):
+    yield from range(count)
+    raise OSError("file went away")
+
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_Results_Keep_Item_Order(workers):
+    assert list(map_Ordered(square, range(50), workers, max_Pending=4)) == [i * i for i in range(50)]
+
+# Errors reach the caller in the place of the item that caused them
+@pytest.mark.parametrize("workers", [1, 2])
+def test_Errors_Come_In_Order(workers):
+    results = map_Ordered(check_Positive, [1, 2, -3, 4], workers)
+
+    assert [next(results), next(results)] == [1, 2]
+    with pytest.raises(ValueError, match="-3 is negative"):
+        next(results)
+
+def test_Reading_Error_Comes_After_Results():
+    results = map_Ordered(square, iter_Then_Fail(3), workers=2)
+
+    assert [next(results) for _ in range(3)] == [0, 1, 4]
+    with pytest.raises(OSError, match="went away"):
+        next(results)
+
+def test_Closing_Early_Stops_The_Feeder():
+    with closing(map_Ordered(square, range(10_000), workers=2, max_Pending=2)) as results:
+        assert next(results) == 0
+
+#-------------------------------------------------------------------------
+
+# A parallel import saves the same battles in the same order as a serial one
+def test_Parallel_Import(database, tmp_path, monkeypatch):
+    monkeypatch.setattr(importer, 'CHUNK_SIZE', 3)
+    path = tmp_path / "battles.jsonl"
+    records = [{'battleName': f"battle {i}", 'date': "1415-10-25", 'winner': "england", 'loser': "france",
+                'victorForces': i, 'vanquishedForces': 1, 'totalVictorDeaths': 0, 'totalVanquishedDeaths': 0}
+               for i in range(20)]
+    records[11]['date'] = "soon"
+    path.write_text("".join(json.dumps(record) + "\n" for record in records), encoding='utf-8')
+
+    report = importer.import_Battles(str(path), skip_Invalid=True, workers=2, report=lambda message: None)
+
+    assert (report.rows_Imported, report.rows_Skipped) == (19, 1)
+    assert [battle.victorForces for battle in db.iter_Battles()] == [i for i in range(20) if i != 11]
@@ -0,0 +1,81 @@
+#! /usr/bin/env/ python3
+
+from datetime import date
+
+import pytest
+
+import db
+from conftest import make_Battle
+from query import Battle_Query
+
+#-------------------------------------------------------------------------
+
+def add_Battles():
+    db.insert_Battles([
+        make_Battle("Hastings", date=date(1066, 10, 14), countriesInvolved="England, Normandy",
+                    winner="Normandy", loser="England", victorForces=9000, totalVanquishedDeaths=4000,
+                    significantFiguresPresent="William The Conqueror, Harold Godwinson",
+                    notableDeaths="Harold Godwinson"),
+        make_Battle("Crecy", date=date(1346, 8, 26), victorForces=12000),
+        make_Battle("Agincourt"),
+        make_Battle("Waterloo", date=date(1815, 6, 18), countriesInvolved="France, Prussia, United Kingdom",
+                    winner="United Kingdom", loser="France", victorForces=118000),
+    ])
+
+def get_Names(battle_Query: Battle_Query) -> list[str]:
+    return [battle.battleName for battle in battle_Query.run()]
+
+#-------------------------------------------------------------------------
+
+def test_Filters_Combine(database):
+    add_Battles()
+
+    assert get_Names(Battle_Query().date_Between(date(1300, 1, 1), date(1500, 1, 1))) == ["Crecy", "Agincourt"]
+    assert get_Names(Battle_Query().won_By("england").date_Between(end=date(1400, 1, 1))) == ["Crecy"]
+    assert get_Names(Battle_Query().lost_By("france").at_Least('victorForces', 10000)) == ["Crecy", "Waterloo"]
+    assert get_Names(Battle_Query().at_Most('totalDeaths', 5000)) == ["Hastings"]
+    assert Battle_Query().at_Least('totalDeaths', 5000).count() == 3
+
+def test_Participant_Filters(database):
+    add_Battles()
+
+    assert get_Names(Battle_Query().involving("FRANCE")) == ["Crecy", "Agincourt", "Waterloo"]
+    assert get_Names(Battle_Query().involving("england", role='loser')) == ["Hastings"]
+    assert get_Names(Battle_Query().with_Person("harold godwinson", role='died')) == ["Hastings"]
+    assert get_Names(Battle_Query().with_Person("king henry v")) == ["Crecy", "Agincourt", "Waterloo"]
+
+def test_Order_And_Limit(database):
+    add_Battles()
+
+    assert get_Names(Battle_Query().order_By('victorForces', descending=True).limit(2)) == ["Waterloo", "Crecy"]
+    assert get_Names(Battle_Query().order_By('battleName')) == ["Agincourt", "Crecy", "Hastings", "Waterloo"]
+
+@pytest.mark.parametrize("build", [
+    lambda q: q.at_Least('weather', 1),
+    lambda q: q.order_By('countriesInvolved'),
+    lambda q: q.involving("France", role='ally'),
+    lambda q: q.with_Person("Nelson", role='wounded'),
+])
+def test_Unknown_Fields_Are_Refused(build):
+    with pytest.raises(ValueError):
+        build(Battle_Query())
+
+# Values are always bound, never pasted into the SQL
+def test_Values_Are_Parameters(database):
+    add_Battles()
+
+    sql, values = Battle_Query().won_By("x' OR '1'='1").compile()
+
+    assert "OR '1'='1" not in sql
+    assert values == ["X' Or '1'='1"]
+    assert get_Names(Battle_Query().won_By("x' OR '1'='1")) == []
+
+def test_Query_Plans_Use_Indexes(database):
+    add_Battles()
+
+    plan = " ".join(Battle_Query().won_By("England").date_Between(date(1300, 1, 1)).get_Query_Plan())
+    assert "idx_battles_winner_date" in plan
+
+    # Matches few rows, so the force index is used rather than walking the dates
+    plan = " ".join(Battle_Query().at_Least('victorForces', 100000).get_Query_Plan())
+    assert "idx_battles_victorForces" in plan
@@ -0,0 +1,71 @@
+#! /usr/bin/env/ python3
+
+import io
+
+import db
+import render
+from conftest import make_Battle
+
+#-------------------------------------------------------------------------
+
+# Text stream that remembers how many times it was written to
+class Counting_Stream(io.StringIO):
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text: str) -> int:
+        self.writes += 1
+        return super().write(text)
+
+#-------------------------------------------------------------------------
+
+def test_One_Write_Per_Page():
+    out = Counting_Stream()
+    pauses = []
+
+    battles = [make_Battle(f"Battle {i}") for i in range(5)]
+    count = render.Battle_Renderer(out=out, page_Size=2, pause=lambda: pauses.append(1)).render(battles)
+
+    assert count == 5
+    # Pages of 2, 2 and 1 battles, with a pause before the second and the third
+    assert out.writes == 3
+    assert len(pauses) == 2
+    assert out.getvalue().count("Battle ") == 5
+
+def test_Binary_And_Text_Output_Match():
+    battles = [make_Battle("Battle Of Hastings", countriesInvolved="England, Duchy of Normandy")]
+
+    text = io.StringIO()
+    binary = io.BytesIO()
+    render.Battle_Renderer(out=text).render(battles)
+    render.Battle_Renderer(out=binary).render(battles)
+
+    assert binary.getvalue().decode('utf-8') == text.getvalue()
+    assert "8,000" in text.getvalue()
+    assert "6,400" in text.getvalue()
+
+def test_Empty_Table():
+    out = io.StringIO()
+    assert render.Battle_Renderer(out=out).render([]) == 0
+    assert "No battles recorded." in out.getvalue()
+
+def test_Narrow_Width_Keeps_Headings():
+    out = io.StringIO()
+    render.Battle_Renderer(width=80, out=out).render([make_Battle("Hastings")])
+
+    header = out.getvalue().splitlines()[4]
+    for heading in render.HEADINGS:
+        assert heading in header
+
+# A battle saved by another program without a date or numbers gets empty cells
+def test_Undated_Battle_Has_Empty_Cells(database):
+    database.execute("INSERT INTO battles (battleName, battleNameKey) VALUES ('Unknown', 'unknown')")
+    database.commit()
+
+    out = io.StringIO()
+    assert render.Battle_Renderer(out=out).render(db.iter_Battles()) == 1
+
+    row = next(line for line in out.getvalue().splitlines() if line.startswith("1 "))
+    assert row.split() == ["1", "Unknown"]
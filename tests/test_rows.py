@@ -0,0 +1,57 @@
+#! /usr/bin/env/ python3
+
+from datetime import date
+
+import db
+import ui
+from conftest import make_Battle, reply_With
+
+#-------------------------------------------------------------------------
+
+ROW = (7, "Hastings", "1066-10-14", "England", "Normandy", "England", 9500, 6500, 2000, 4000, "", "Harold")
+
+def test_Row_To_Battle_From_Tuple():
+    battle = db.row_To_Battle(ROW)
+
+    assert battle == make_Battle("Hastings", date=date(1066, 10, 14), countriesInvolved="England",
+                                 winner="Normandy", loser="England",
+                                 victorForces=9500, vanquishedForces=6500, totalVictorDeaths=2000,
+                                 totalVanquishedDeaths=4000, significantFiguresPresent="", notableDeaths="Harold")
+    assert battle.db_id == 7
+
+# Rows read with BATTLE_COLUMNS already hold date objects, converted by convert_Iso_Date
+def test_Rows_Hold_Dates(database):
+    db.insert_Battle(make_Battle("Agincourt"))
+    database.execute("INSERT INTO battles (battleName, battleNameKey) VALUES ('Unknown', 'unknown')")
+    database.commit()
+
+    rows = database.execute("SELECT " + db.BATTLE_COLUMNS + " FROM battles ORDER BY id").fetchall()
+
+    assert rows[0]['date'] == date(1415, 10, 25)
+    assert [db.row_To_Battle(row).date for row in rows] == [date(1415, 10, 25), None]
+
+# Each distinct date is only parsed once
+def test_Dates_Are_Cached():
+    db.parse_Iso_Date.cache_clear()
+
+    first = db.parse_Iso_Date("1066-10-14")
+    assert db.parse_Iso_Date("1066-10-14") is first
+    assert db.parse_Iso_Date.cache_info().hits == 1
+
+    assert db.convert_Iso_Date(b"1066-10-14") == first
+
+#-------------------------------------------------------------------------
+
+# Option 7 shows one battle's details, a battle saved by another program can have NULL fields
+def test_Menu_Shows_Undated_Battle(database, monkeypatch, capsys):
+    database.execute("INSERT INTO battles (battleName, battleNameKey) VALUES ('Unknown', 'unknown')")
+    database.commit()
+    monkeypatch.delenv("BATTLE_SNAPSHOT", raising=False)
+    monkeypatch.delenv("BATTLE_TRACE_LOG", raising=False)
+    reply_With(monkeypatch, "", "7", "unknown", "10")
+
+    ui.main()
+
+    out = capsys.readouterr().out
+    assert "Battle Name: Unknown\n\nDate: \n" in out
+    assert "unexpected error" not in out
@@ -0,0 +1,55 @@
+#! /usr/bin/env/ python3
+
+import db
+from conftest import make_Battle, reply_With
+
+#-------------------------------------------------------------------------
+
+def add_Battles():
+    db.insert_Battle(make_Battle("Battle Of Agincourt"))
+    db.insert_Battle(make_Battle("Battle Of Waterloo", countriesInvolved="France, Prussia, United Kingdom",
+                                 significantFiguresPresent="Napoleon Bonaparte, Duke Of Wellington",
+                                 notableDeaths="Sir Thomas Picton"))
+    db.insert_Battle(make_Battle("Battle Of Austerlitz", countriesInvolved="France, Austria, Russia",
+                                 significantFiguresPresent="Napoleon Bonaparte"))
+
+def get_Found_Names(text: str) -> list[str]:
+    return [battle.battleName for battle, _ in db.search_Battles(text)]
+
+#-------------------------------------------------------------------------
+
+def test_Build_Search_Query():
+    assert db.build_Search_Query('napol* "duke of wellington"') == '"napol"* "duke of wellington"'
+    # Operators and stray quotes are searched for as plain words
+    assert db.build_Search_Query('NOT wellington" OR') == '"NOT" "wellington" "OR"'
+    assert db.build_Search_Query('  * "" ') == ""
+
+def test_Search_Every_Text_Column(database):
+    add_Battles()
+
+    assert sorted(get_Found_Names("napol*")) == ["Battle Of Austerlitz", "Battle Of Waterloo"]
+    assert get_Found_Names("picton") == ["Battle Of Waterloo"]
+    assert get_Found_Names('"united kingdom"') == ["Battle Of Waterloo"]
+    assert get_Found_Names("") == []
+
+# The triggers keep the index in step with every insert, update and delete
+def test_Search_Index_Follows_Changes(database):
+    add_Battles()
+
+    with db.Edit_Session() as session:
+        battle = session.track(db.get_Battle_By_Id(3))
+        battle.significantFiguresPresent = "Tsar Alexander I"
+
+    db.remove_Battle(db.get_Battle_By_Id(2))
+
+    assert get_Found_Names("napoleon") == []
+    assert get_Found_Names("alexander") == ["Battle Of Austerlitz"]
+
+def test_Search_Menu_Shows_Undated_Battle(database, monkeypatch, capsys):
+    database.execute("INSERT INTO battles (battleName, battleNameKey) VALUES ('Unknown', 'unknown')")
+    database.commit()
+    reply_With(monkeypatch, "unknown")
+
+    db.search_For_Battles()
+
+    assert "Unknown" in capsys.readouterr().out
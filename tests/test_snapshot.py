@@ -0,0 +1,114 @@
+#! /usr/bin/env/ python3
+
+from datetime import date
+
+import db
+import snapshot
+from conftest import make_Battle
+
+#-------------------------------------------------------------------------
+
+# Saves a few battles and writes a snapshot of them, returning the battles
+def add_Battles_And_Snapshot() -> list:
+    battles = [make_Battle(name, date=date(1066 + i, 10, 14))
+               for i, name in enumerate(("Hastings", "Agincourt", "Crecy"))]
+
+    for battle in battles:
+        db.insert_Battle(battle)
+
+    assert snapshot.write_Snapshot() == len(battles)
+    return battles
+
+#-------------------------------------------------------------------------
+
+def test_Snapshot_Holds_Battles(database):
+    battles = add_Battles_And_Snapshot()
+
+    with snapshot.open_Snapshot() as battle_Snapshot:
+        assert [view.to_Battle() for view in battle_Snapshot] == battles
+
+        found = battle_Snapshot.find_Id(battles[1].db_id)
+        assert found.battleName == "Agincourt"
+        assert found.db_id == battles[1].db_id
+
+        assert battle_Snapshot.find_Id(battles[-1].db_id + 1) is None
+
+def test_Snapshot_Out_Of_Date_After_Insert(database):
+    add_Battles_And_Snapshot()
+
+    with snapshot.open_Snapshot() as battle_Snapshot:
+        db.insert_Battle(make_Battle("Bannockburn"))
+        assert not snapshot.is_Current(battle_Snapshot)
+
+    assert snapshot.open_Snapshot() is None
+
+def test_Snapshot_Out_Of_Date_After_Update(database):
+    battles = add_Battles_And_Snapshot()
+
+    with snapshot.open_Snapshot() as battle_Snapshot:
+        battles[0].winner = "Wales"
+        db.update_Battle(battles[0])
+        assert not snapshot.is_Current(battle_Snapshot)
+
+def test_Snapshot_Out_Of_Date_After_Delete(database):
+    battles = add_Battles_And_Snapshot()
+
+    with snapshot.open_Snapshot() as battle_Snapshot:
+        db.remove_Battle(battles[1])
+        assert not snapshot.is_Current(battle_Snapshot)
+
+# Deleting the newest battle leaves MAX(id) lower, but AUTOINCREMENT never hands it out again
+def test_Snapshot_Out_Of_Date_After_Delete_And_Insert(database):
+    battles = add_Battles_And_Snapshot()
+
+    with snapshot.open_Snapshot() as battle_Snapshot:
+        database.execute("DELETE FROM battles WHERE id = ?", (battles[-1].db_id,))
+        database.commit()
+        db.insert_Battle(make_Battle("Crecy"))
+        assert not snapshot.is_Current(battle_Snapshot)
+
+# Changes made by another program are seen too
+def test_Snapshot_Out_Of_Date_After_Other_Connection(database):
+    add_Battles_And_Snapshot()
+
+    with snapshot.open_Snapshot() as battle_Snapshot:
+        other = db.open_Connection()
+        other.execute("UPDATE battles SET loser = 'Wales' WHERE battleName = 'Crecy'")
+        other.commit()
+        other.close()
+
+        assert not snapshot.is_Current(battle_Snapshot)
+
+def test_Snapshot_Null_Dates(database):
+    add_Battles_And_Snapshot()
+    database.execute("INSERT INTO battles (battleName, date) VALUES ('Unknown', NULL), ('Garbled', 'sometime')")
+    database.commit()
+
+    snapshot.write_Snapshot()
+
+    with snapshot.open_Snapshot() as battle_Snapshot:
+        dates = {view.battleName: view.date for view in battle_Snapshot}
+        assert dates['Unknown'] is None
+        assert dates['Garbled'] is None
+        assert dates['Hastings'] == date(1066, 10, 14)
+
+        # Battles without a date go after the most recent, like in db.sort_Battles
+        ascending = [view.battleName for view in battle_Snapshot.iter_By_Date()]
+        assert ascending == ["Hastings", "Agincourt", "Crecy", "Unknown", "Garbled"]
+
+        descending = [view.battleName for view in battle_Snapshot.iter_By_Date(descending=True)]
+        assert descending == ascending[::-1]
+
+# Read from a snapshot or from the database, the date order is the same
+def test_Snapshot_Date_Order_Matches_Database(database):
+    add_Battles_And_Snapshot()
+    database.execute("INSERT INTO battles (battleName, date) VALUES ('Unknown', NULL), ('Lost', NULL)")
+    database.commit()
+    db.insert_Battle(make_Battle("Bannockburn", date=date(1314, 6, 24)))
+
+    snapshot.write_Snapshot()
+
+    with snapshot.open_Snapshot() as battle_Snapshot:
+        for descending in (False, True):
+            assert ([view.battleName for view in battle_Snapshot.iter_By_Date(descending)] ==
+                    [battle.battleName for battle in db.iter_Battles_By_Date(descending)])
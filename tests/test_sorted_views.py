@@ -0,0 +1,71 @@
+#! /usr/bin/env/ python3
+
+from datetime import date
+
+import pytest
+
+import db
+from conftest import make_Battle
+
+#-------------------------------------------------------------------------
+
+# Saves battles out of date order, two on the same day and three without a date
+def add_Battles(connection) -> list[tuple]:
+    battle_Dates = [date(1415, 10, 25), None, date(1066, 10, 14), date(1346, 8, 26), None,
+                    date(1066, 10, 14), date(1916, 7, 1), None]
+
+    for i, battle_Date in enumerate(battle_Dates):
+        if battle_Date is None:
+            connection.execute("INSERT INTO battles (battleName, battleNameKey) VALUES (?, ?)",
+                               (f"Battle {i}", f"battle {i}"))
+            connection.commit()
+        else:
+            db.insert_Battle(make_Battle(f"Battle {i}", date=battle_Date))
+
+    # Dated battles oldest first with ties in id order, then the undated ones in id order
+    return sorted(((battle_Date, i + 1) for i, battle_Date in enumerate(battle_Dates)),
+                  key=lambda key: (key[0] is None, key[0] or date.min, key[1]))
+
+def get_Keys(battles) -> list[tuple]:
+    return [(battle.date, battle.db_id) for battle in battles]
+
+#-------------------------------------------------------------------------
+
+# Small pages make every page boundary fall somewhere different, including between the
+# dated and the undated battles and in the middle of each
+@pytest.mark.parametrize("page_Size", [1, 2, 3, 5, 500])
+def test_Pages_In_Date_Order(database, page_Size):
+    expected = add_Battles(database)
+
+    assert get_Keys(db.iter_Battles_By_Date(page_Size=page_Size)) == expected
+    assert get_Keys(db.iter_Battles_By_Date(descending=True, page_Size=page_Size)) == expected[::-1]
+
+def test_Page_After_Undated_Battle(database):
+    expected = add_Battles(database)
+
+    assert get_Keys(db.get_Battles_Page(10, after=expected[-3])) == expected[-2:]
+    assert get_Keys(db.get_Battles_Page(10, before=expected[-2], descending=True)) == expected[-3::-1]
+
+def test_Sorted_Views_Use_Date_Index(database):
+    plan = " ".join(row[3] for row in database.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM battles WHERE date IS NOT NULL AND (date, id) > (?, ?) "
+        "ORDER BY date, id LIMIT 10", ("1066-10-14", 1)))
+
+    assert "idx_battles_date" in plan
+    assert "TEMP B-TREE" not in plan
+
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize("battles", [None, 'list'])
+def test_Sort_Menu_Options_Show_Undated_Battles(database, capsys, battles):
+    expected = add_Battles(database)
+    if battles == 'list':
+        battles = list(db.iter_Battles())
+
+    db.sort_Battles(battles)
+    names = [line.split("  ")[0] for line in capsys.readouterr().out.splitlines() if line.startswith("Battle ")]
+    assert names == [f"Battle {db_id - 1}" for _, db_id in expected]
+
+    db.sort_Battles_Desc(battles)
+    names = [line.split("  ")[0] for line in capsys.readouterr().out.splitlines() if line.startswith("Battle ")]
+    assert names == [f"Battle {db_id - 1}" for _, db_id in expected[::-1]]
@@ -0,0 +1,116 @@
+#! /usr/bin/env/ python3
+
+from contextlib import closing
+from datetime import date
+
+import db
+import summary
+from business import FIRST_ID
+from conftest import make_Battle
+
+#-------------------------------------------------------------------------
+
+# Returns battle_totals and the non-empty rows of battle_group_totals
+# The rate sums are added up in a different order by the triggers and by a recount, so
+# they are rounded before being compared
+def get_Totals(c) -> tuple:
+    c.execute(f"SELECT {', '.join(summary.TOTAL_COLUMNS)} FROM battle_totals")
+    totals = tuple(round(value, 9) if isinstance(value, float) else value for value in c.fetchone())
+
+    c.execute("SELECT grouping, grp, battles, victorDeaths, vanquishedDeaths FROM battle_group_totals "
+              "WHERE battles > 0 ORDER BY grouping, grp")
+    return totals, [tuple(row) for row in c.fetchall()]
+
+# Returns the totals worked out again from the battles, leaving the stored ones alone
+def get_Recount(connection) -> tuple:
+    with closing(connection.cursor()) as c:
+        connection.execute("BEGIN")
+        try:
+            summary.rebuild_Summary(c)
+            return get_Totals(c)
+        finally:
+            connection.rollback()
+
+def get_Stored(connection) -> tuple:
+    with closing(connection.cursor()) as c:
+        return get_Totals(c)
+
+#-------------------------------------------------------------------------
+
+def add_Sample_Battles(count: int):
+    db.insert_Battles(
+        make_Battle(f"Battle {i}", date=date(1000 + 7 * i, 1 + i % 12, 1 + i % 28),
+                    winner=("England", "France", "Scotland")[i % 3],
+                    loser=("France", "Scotland", "England")[i % 3],
+                    victorForces=1000 + i, vanquishedForces=i % 4 * 500,
+                    totalVictorDeaths=i, totalVanquishedDeaths=2 * i)
+        for i in range(count)
+    )
+
+#-------------------------------------------------------------------------
+
+def test_Totals_Match_Recount_After_Inserts_Updates_And_Deletes(database):
+    add_Sample_Battles(30)
+
+    battle = make_Battle("Agincourt")
+    db.insert_Battle(battle)
+    assert get_Stored(database) == get_Recount(database)
+
+    battle.winner = "France"
+    battle.date = date(1815, 6, 18)
+    battle.totalVictorDeaths = 12345
+    db.update_Battle(battle)
+    assert get_Stored(database) == get_Recount(database)
+
+    db.remove_Battle(battle)
+    database.execute("DELETE FROM battles WHERE id % 4 = 0")
+    database.commit()
+    assert get_Stored(database) == get_Recount(database)
+
+# NULL numbers count as zero, and a side without forces is left out of its average rate
+def test_Totals_Match_Recount_With_Nulls(database):
+    add_Sample_Battles(5)
+
+    database.execute("UPDATE battles SET victorForces = NULL, totalVanquishedDeaths = NULL, winner = NULL "
+                     "WHERE id % 2 = 1")
+    database.execute("INSERT INTO battles (battleName) VALUES ('Unknown')")
+    database.commit()
+
+    assert get_Stored(database) == get_Recount(database)
+
+# Battles written by other programs while the backfill is part way through are counted once
+def test_Backfill_With_Writes_In_Between(database):
+    add_Sample_Battles(40)
+
+    # Starts the totals over, the way migration 9 leaves them on an existing database
+    with closing(database.cursor()) as c:
+        database.execute("BEGIN")
+        summary.reset_Totals(c)
+        c.execute("INSERT INTO summary_backfill SELECT 1, ?, MAX(id) FROM battles", (FIRST_ID,))
+        database.commit()
+
+        batches = summary.iter_Backfill(c, batch_Size=7)
+
+        next(batches)
+        database.commit()
+
+        # Changes to battles already counted, waiting to be counted, and new ones
+        database.execute("UPDATE battles SET totalVictorDeaths = totalVictorDeaths + 100 WHERE id IN (2, 7, 30, 40)")
+        database.execute("DELETE FROM battles WHERE id IN (3, 35)")
+        add_Sample_Battles(5)
+        database.commit()
+
+        next(batches)
+        database.commit()
+
+        # An interrupted backfill picks up from the last id it saved
+        batches = summary.iter_Backfill(c, batch_Size=7)
+        for _ in batches:
+            database.execute("UPDATE battles SET winner = 'Wales' WHERE id = 38")
+            database.commit()
+        database.commit()
+
+        c.execute("SELECT COUNT(*) FROM summary_backfill")
+        assert c.fetchone()[0] == 0
+
+    assert get_Stored(database) == get_Recount(database)
@@ -0,0 +1,61 @@
+#! /usr/bin/env/ python3
+
+import pytest
+
+import db
+import trigrams
+from conftest import make_Battle, reply_With
+
+#-------------------------------------------------------------------------
+
+def add_Battles():
+    db.insert_Battles(make_Battle(name) for name in (
+        "Battle Of Hastings", "Battle Of Agincourt", "Battle Of Austerlitz", "Siege Of Orleans"))
+
+#-------------------------------------------------------------------------
+
+def test_Trigrams_And_Similarity():
+    assert trigrams.get_Trigrams("Crecy") == {"  c", " cr", "cre", "rec", "ecy", "cy "}
+    assert trigrams.get_Trigrams("  CRECY ") == trigrams.get_Trigrams("crecy")
+    assert trigrams.get_Trigrams("") == set()
+
+    hastings = trigrams.get_Trigrams("hastings")
+    assert trigrams.get_Similarity(hastings, hastings) == 1.0
+    assert trigrams.get_Similarity(hastings, trigrams.get_Trigrams("crecy")) == 0.0
+    assert 0.3 < trigrams.get_Similarity(hastings, trigrams.get_Trigrams("hastigns")) < 1.0
+
+def test_Misspelled_Names_Are_Suggested(database):
+    add_Battles()
+
+    suggestions = db.suggest_Battle_Names("battle of hastigns")
+
+    assert suggestions[0][1:] == (1, "Battle Of Hastings")
+    assert [similarity for similarity, _, _ in suggestions] == sorted(
+        (similarity for similarity, _, _ in suggestions), reverse=True)
+    assert db.suggest_Battle_Names("zzzz") == []
+
+# Renamed and deleted battles stop being suggested under their old names
+def test_Index_Follows_Changes(database):
+    add_Battles()
+
+    with db.Edit_Session() as session:
+        battle = session.track(db.get_Battle_By_Id(4))
+        battle.battleName = "Siege Of Calais"
+
+    db.remove_Battle(db.get_Battle_By_Id(1))
+
+    assert [name for _, _, name in db.suggest_Battle_Names("siege of calias")][0] == "Siege Of Calais"
+    assert "Siege Of Orleans" not in [name for _, _, name in db.suggest_Battle_Names("siege of orleens")]
+    assert "Battle Of Hastings" not in [name for _, _, name in db.suggest_Battle_Names("hastings")]
+
+@pytest.mark.parametrize("choice, expected", [("1", "Battle Of Austerlitz"), ("", None), ("9", None)])
+def test_Look_Up_Offers_Suggestions(database, monkeypatch, capsys, choice, expected):
+    add_Battles()
+    reply_With(monkeypatch, "austerlits", choice)
+
+    found = db.look_Up_Battle()
+
+    assert (found.battleName if found else None) == expected
+    out = capsys.readouterr().out
+    assert "Did you mean:" in out
+    assert "1 - Battle Of Austerlitz" in out
@@ -0,0 +1,62 @@
+#! /usr/bin/env/ python3
+
+from datetime import date
+
+import pytest
+
+from validation import Negative_Value_Error, parse_Date, parse_Valid_Int, record_To_Battle, to_Title
+
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize("value", [True, False, 3.7, None, [], "3.0", "ten"])
+def test_Parse_Valid_Int_Refuses(value):
+    with pytest.raises(ValueError):
+        parse_Valid_Int(value)
+
+def test_Parse_Valid_Int():
+    assert parse_Valid_Int("42") == 42
+    assert parse_Valid_Int(7.0) == 7
+
+    with pytest.raises(Negative_Value_Error):
+        parse_Valid_Int(-1)
+
+RECORD = {
+    'battleName': "Hastings", 'date': "1066-10-14", 'winner': "duchy of normandy", 'loser': "england",
+    'victorForces': 9500, 'vanquishedForces': "6500", 'totalVictorDeaths': 2000.0, 'totalVanquishedDeaths': 4000,
+}
+
+def test_Record_To_Battle():
+    battle = record_To_Battle(RECORD)
+    assert battle.winner == "Duchy Of Normandy"
+    assert (battle.vanquishedForces, battle.totalVictorDeaths) == (6500, 2000)
+
+@pytest.mark.parametrize("value, message", [
+    (None, "victorForces is missing."),
+    ("  ", "victorForces is missing."),
+    (True, "victorForces 'True' must be a whole number of zero or greater."),
+    (9500.5, "victorForces '9500.5' must be a whole number of zero or greater."),
+    (-1, "victorForces '-1' must be a whole number of zero or greater."),
+])
+def test_Record_To_Battle_Refuses(value, message):
+    with pytest.raises(ValueError, match=message):
+        record_To_Battle(dict(RECORD, victorForces=value))
+
+def test_Record_To_Battle_Missing_Field():
+    record = dict(RECORD)
+    del record['totalVanquishedDeaths']
+
+    with pytest.raises(ValueError, match="totalVanquishedDeaths is missing."):
+        record_To_Battle(record)
+
+#-------------------------------------------------------------------------
+
+def test_Parse_Date():
+    assert parse_Date("1066-10-14") == date(1066, 10, 14)
+
+    for text in ("14/10/1066", "1066-02-30", ""):
+        with pytest.raises(ValueError):
+            parse_Date(text)
+
+def test_To_Title():
+    assert to_Title("duchy of normandy") == "Duchy Of Normandy"
+    assert to_Title(None) == ""
@@ -0,0 +1,277 @@
+#! /usr/bin/env/ python3
+
+import re
+from collections import Counter
+from typing import Iterator
+
+from business import FIRST_ID, normalize_Name
+
+# Trigram index over battle names, for typo-tolerant lookups.
+#
+#   name_trigrams       one row per distinct trigram, with the number of battles whose name has it
+#   battle_trigrams     (battleId, trigramId) for every trigram of every battle name
+#
+# Names are broken up the way PostgreSQL's pg_trgm does it: each word is lower-cased,
+# padded with two spaces in front and one behind, and cut into every run of three
+# characters, so "Somme" gives "  s", " so", "som", "omm", "mme", "me ".
+#
+# A lookup only reads the postings of the query's rarest trigrams, up to POSTING_BUDGET
+# of them, counts how many each battle shares, and scores the best CANDIDATES exactly.
+# A typo only spoils the few trigrams around it, so the right name still shares most
+# of the rest, and the work stays the same however many battles there are. If nothing
+# close turns up, one more round reads the next rarest trigrams.
+#
+# db.py rewrites a battle's rows whenever its name is saved, and a trigger drops them
+# when it is deleted. The tables are created and filled by migration 8 (see migrations.py).
+
+# Most postings read in one round of a lookup, and the most rounds
+POSTING_BUDGET = 10000
+MAX_ROUNDS = 2
+
+# A best match at least this close ends the lookup after its first round
+GOOD_SIMILARITY = 0.7
+
+# Battles sharing the most trigrams with the query that are scored exactly
+CANDIDATES = 100
+
+# Lowest similarity offered as a suggestion, the same default as pg_trgm
+MIN_SIMILARITY = 0.3
+
+# Names handled per round trip when syncing many at once
+SYNC_BATCH_SIZE = 500
+
+#-------------------------------------------------------------------------
+
+# Creates the trigram tables and the delete trigger
+def create_Trigram_Tables(c):
+
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS name_trigrams (
+            id INTEGER PRIMARY KEY,
+            trigram TEXT NOT NULL UNIQUE,
+            battles INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS battle_trigrams (
+            battleId INTEGER NOT NULL,
+            trigramId INTEGER NOT NULL,
+            PRIMARY KEY (battleId, trigramId)
+        ) WITHOUT ROWID
+    ''')
+
+    # Same as battles_participants_delete (see participants.py)
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS battles_trigrams_delete AFTER DELETE ON battles BEGIN
+            UPDATE name_trigrams SET battles = battles - 1
+            WHERE id IN (SELECT trigramId FROM battle_trigrams WHERE battleId = old.id);
+            DELETE FROM battle_trigrams WHERE battleId = old.id;
+        END
+    ''')
+
+# The direction lookups use: from a trigram to the battles that have it
+def create_Trigram_Index(c):
+    c.execute("CREATE INDEX IF NOT EXISTS idx_battle_trigrams_trigram ON battle_trigrams (trigramId, battleId)")
+
+#-------------------------------------------------------------------------
+
+# Returns the set of trigrams of a name
+def get_Trigrams(name: str) -> set[str]:
+    trigrams = set()
+
+    for word in re.findall(r"\w+", normalize_Name(name)):
+        padded = "  " + word + " "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+
+    return trigrams
+
+# Share of trigrams two names have in common, from 0.0 (none) to 1.0 (all)
+def get_Similarity(trigrams: set[str], other: set[str]) -> float:
+    if not trigrams or not other:
+        return 0.0
+
+    shared = len(trigrams & other)
+    return shared / (len(trigrams) + len(other) - shared)
+
+#-------------------------------------------------------------------------
+
+# Fills known_Ids (trigram -> id) for the given trigrams, adding any that are new
+def get_Trigram_Ids(c, trigrams: set[str], known_Ids: dict[str, int]) -> dict[str, int]:
+
+    new = [trigram for trigram in trigrams if trigram not in known_Ids]
+    if not new:
+        return known_Ids
+
+    c.executemany("INSERT OR IGNORE INTO name_trigrams (trigram) VALUES (?)", [(trigram,) for trigram in new])
+
+    for start in range(0, len(new), SYNC_BATCH_SIZE):
+        chunk = new[start:start + SYNC_BATCH_SIZE]
+        c.execute(f"SELECT trigram, id FROM name_trigrams WHERE trigram IN ({', '.join('?' * len(chunk))})", chunk)
+        known_Ids.update(c.fetchall())
+
+    return known_Ids
+
+#-------------------------------------------------------------------------
+
+# Rewrites the trigram rows of many battles, each row is (db_id, battleName)
+# is_New skips removing old rows, for battles that can't have any yet
+# trigram_Ids caches trigram ids and is only valid inside one transaction
+def sync_Names(c, rows: list[tuple], is_New: bool = False, trigram_Ids: dict[str, int] | None = None):
+
+    if not rows:
+        return
+
+    if not is_New:
+        battle_Ids = [(row[0],) for row in rows]
+        c.executemany('''
+            UPDATE name_trigrams SET battles = battles - 1
+            WHERE id IN (SELECT trigramId FROM battle_trigrams WHERE battleId = ?)
+        ''', battle_Ids)
+        c.executemany("DELETE FROM battle_trigrams WHERE battleId = ?", battle_Ids)
+
+    battle_Trigrams = [(db_id, get_Trigrams(name)) for db_id, name in rows]
+
+    trigram_Ids = {} if trigram_Ids is None else trigram_Ids
+    get_Trigram_Ids(c, set().union(*(trigrams for _, trigrams in battle_Trigrams)), trigram_Ids)
+
+    postings = [(db_id, trigram_Ids[trigram]) for db_id, trigrams in battle_Trigrams for trigram in trigrams]
+    c.executemany("INSERT INTO battle_trigrams (battleId, trigramId) VALUES (?, ?)", postings)
+
+    counts = Counter(trigram_Id for _, trigram_Id in postings)
+    c.executemany("UPDATE name_trigrams SET battles = battles + ? WHERE id = ?",
+                  [(count, trigram_Id) for trigram_Id, count in counts.items()])
+
+# Rewrites the trigram rows of one saved battle
+def sync_Name(c, battle_obj):
+    sync_Names(c, [(battle_obj.db_id, battle_obj.battleName)])
+
+#-------------------------------------------------------------------------
+
+# Adds the trigram rows of every battle with an id above after_Id
+# Only for battles saved just now, which can't have any rows yet
+def sync_Names_After(c, after_Id: int = FIRST_ID):
+    trigram_Ids = {}
+
+    while True:
+        c.execute("SELECT id, battleName FROM battles WHERE id > ? ORDER BY id LIMIT ?", (after_Id, SYNC_BATCH_SIZE))
+        rows = [tuple(row) for row in c.fetchall()]
+
+        if not rows:
+            return
+
+        sync_Names(c, rows, True, trigram_Ids)
+        after_Id = rows[-1][0]
+
+# Adds the trigram rows of the battles that have none, batch_Size at a time
+# Yields the id of the last battle of each batch so the caller can commit in between
+def iter_Missing_Names(c, batch_Size: int = SYNC_BATCH_SIZE) -> Iterator[int]:
+    after_Id = FIRST_ID
+    # Trigram ids stay valid between batches, trigrams are never removed
+    trigram_Ids = {}
+
+    while True:
+        c.execute('''
+            SELECT id, battleName FROM battles b
+            WHERE id > ? AND NOT EXISTS (SELECT 1 FROM battle_trigrams WHERE battleId = b.id)
+            ORDER BY id LIMIT ?
+        ''', (after_Id, batch_Size))
+        rows = [tuple(row) for row in c.fetchall()]
+
+        if not rows:
+            return
+
+        sync_Names(c, rows, True, trigram_Ids)
+        after_Id = rows[-1][0]
+        yield after_Id
+
+#-------------------------------------------------------------------------
+
+# Splits the query's trigrams into rounds of at most POSTING_BUDGET postings each, rarest first
+# counts holds (battles, trigramId) pairs. A trigram over budget on its own gets a round to itself
+def get_Rounds(counts: list[tuple[int, int]]) -> list[list[int]]:
+    rounds = []
+    total = POSTING_BUDGET
+
+    for battles, trigram_Id in sorted(counts):
+        if total + battles > POSTING_BUDGET:
+            if len(rounds) == MAX_ROUNDS:
+                break
+            rounds.append([])
+            total = 0
+        rounds[-1].append(trigram_Id)
+        total += battles
+
+    return rounds
+
+#-------------------------------------------------------------------------
+
+# Counts how many of the given trigrams each battle has, adding to shared
+def count_Postings(c, trigram_Ids: list[int], shared: Counter):
+
+    # The postings come back as one comma separated string and are counted here.
+    # A GROUP BY would sort every posting in a temp b-tree, which takes longer
+    # than the scan itself. The LIMIT only matters when even the rarest trigram is
+    # over budget, as in a query like "Battle", and then any of its battles will do
+    c.execute(f'''
+        SELECT group_concat(battleId) FROM (
+            SELECT battleId FROM battle_trigrams
+            WHERE trigramId IN ({', '.join('?' * len(trigram_Ids))})
+            LIMIT ?
+        )
+    ''', trigram_Ids + [POSTING_BUDGET])
+    postings = c.fetchone()[0]
+
+    if postings:
+        shared.update(postings.split(','))
+
+# Scores the CANDIDATES battles with the most shared trigrams against the query
+# Returns (similarity, db_id, battleName) of those at or above min_Similarity, best first
+def score_Candidates(c, query_Trigrams: set[str], shared: Counter,
+                     min_Similarity: float) -> list[tuple[float, int, str]]:
+
+    candidate_Ids = [int(db_id) for db_id, _ in shared.most_common(CANDIDATES)]
+    if not candidate_Ids:
+        return []
+
+    c.execute(f"SELECT id, battleName FROM battles WHERE id IN ({', '.join('?' * len(candidate_Ids))})",
+              candidate_Ids)
+
+    matches = []
+    for db_id, battle_Name in c.fetchall():
+        similarity = get_Similarity(query_Trigrams, get_Trigrams(battle_Name))
+        if similarity >= min_Similarity:
+            matches.append((similarity, db_id, battle_Name))
+
+    # Ties go to the older battle
+    matches.sort(key=lambda match: (-match[0], match[1]))
+    return matches
+
+#-------------------------------------------------------------------------
+
+# Returns up to limit (similarity, db_id, battleName) of the names closest to name, best first
+# A second round of postings is only read when the first finds nothing close
+def find_Similar_Names(c, name: str, limit: int = 5,
+                       min_Similarity: float = MIN_SIMILARITY) -> list[tuple[float, int, str]]:
+
+    query_Trigrams = get_Trigrams(name)
+    if not query_Trigrams:
+        return []
+
+    trigrams = list(query_Trigrams)
+    c.execute(f"SELECT battles, id FROM name_trigrams WHERE trigram IN ({', '.join('?' * len(trigrams))})", trigrams)
+
+    # Trigrams no battle has are left out
+    counts = [(battles, trigram_Id) for battles, trigram_Id in c.fetchall() if battles > 0]
+
+    shared = Counter()
+    matches = []
+
+    for trigram_Ids in get_Rounds(counts):
+        count_Postings(c, trigram_Ids, shared)
+        matches = score_Candidates(c, query_Trigrams, shared, min_Similarity)
+
+        if matches and matches[0][0] >= GOOD_SIMILARITY:
+            break
+
+    return matches[:limit]
@@ -1,33 +1,67 @@
 #! /usr/bin/env/ python3
 
+import os
+
 from business import Battle
+import analytics
 import db
+import elapsed
+import instrument
+import query
+import snapshot
 
 #-------------------------------------------------------------------------
 
 
 def main():
 
+    # Setting BATTLE_TRACE_LOG to a file path records every statement and phase from the start
+    trace_Log = os.environ.get("BATTLE_TRACE_LOG")
+    if trace_Log:
+        instrument.enable(instrument.Histogram_Sink(), instrument.Log_File_Sink(trace_Log), trace_Callbacks=True)
+
+    # Setting BATTLE_SNAPSHOT to a snapshot file (see cli.py snapshot) reads the battles for
+    # options 1 and 5 to 8 from it instead of the database, until the first change is made
+    battles = None
+    snapshot_Path = os.environ.get("BATTLE_SNAPSHOT")
+    if snapshot_Path:
+        try:
+            battles = snapshot.open_Snapshot(snapshot_Path)
+        except (OSError, ValueError) as e:
+            print(f"Snapshot not used: {e!s}")
+        else:
+            if battles is None:
+                print(f"Snapshot '{snapshot_Path}' is missing or out of date, reading from the database.")
+
     db.welcome()        # Display the welcome screen
     db.display_Menu()   # Displays the menu
     print()
 
-    battles = db.get_All_Battles()  # Loads all battle records from database
-
     while True:
         try:
             # Centers the menu option prompt
             menu_Option = db.get_Centered_Menu()
             print("-" * 226)
 
+            # A change makes the snapshot out of date, so the database is read from now on.
+            # Other programs can change it too, so it is checked again before every read
+            if battles is not None:
+                if menu_Option in (2, 3, 4):
+                    battles.close()
+                    battles = None
+                elif menu_Option in (1, 5, 6, 7, 8) and not snapshot.is_Current(battles):
+                    print("Snapshot is out of date, reading from the database.")
+                    battles.close()
+                    battles = None
+
             if menu_Option == 1:
                 db.display_All_Battles(battles) # Displays details of all battles
             elif menu_Option == 2:
-                db.add_Battle(battles)          # Prompts user for details and adds new battle
+                db.add_Battle()                 # Prompts user for details and adds new battle
             elif menu_Option == 3:
-                db.edit_Battle(battles)         # Allows user to select and edit attributes of battle
+                db.edit_Battle()                # Allows user to select and edit attributes of battle
             elif menu_Option == 4:
-                db.delete_Battle(battles)       # Allows user to select and delete battle
+                db.delete_Battle()              # Allows user to select and delete battle
             elif menu_Option == 5:
                 db.sort_Battles(battles)        # Sorts and displays battles from oldest to newest
             elif menu_Option == 6:
@@ -38,17 +72,17 @@ def main():
                     print("-" * 226)
                     print(db.get_Centered_String("BATTLE DETAILS"))
                     print()
-                    print("Battle Name: " + found_Battle.battleName)
-                    print("\nDate: " + found_Battle.date.isoformat())
-                    print("\nCountries Involved: " + found_Battle.countriesInvolved)
-                    print("\nWinner: " + found_Battle.winner)
-                    print("\nLoser: " + found_Battle.loser)
-                    print("\nVictor Forces: " + str(found_Battle.victorForces))
-                    print("\nVanquished Forces: " + str(found_Battle.vanquishedForces))
-                    print("\nTotal Victor Deaths: " + str(found_Battle.totalVictorDeaths))
-                    print("\nTotal Vanquished Deaths: " + str(found_Battle.totalVanquishedDeaths))
-                    print("\nSignificant Figures Present:\n" + found_Battle.significantFiguresPresent)
-                    print("\nNotable Deaths:\n" + found_Battle.notableDeaths)
+                    print("Battle Name: " + db.get_Display_Value(found_Battle.battleName))
+                    print("\nDate: " + db.get_Display_Value(found_Battle.date))
+                    print("\nCountries Involved: " + db.get_Display_Value(found_Battle.countriesInvolved))
+                    print("\nWinner: " + db.get_Display_Value(found_Battle.winner))
+                    print("\nLoser: " + db.get_Display_Value(found_Battle.loser))
+                    print("\nVictor Forces: " + db.get_Display_Value(found_Battle.victorForces))
+                    print("\nVanquished Forces: " + db.get_Display_Value(found_Battle.vanquishedForces))
+                    print("\nTotal Victor Deaths: " + db.get_Display_Value(found_Battle.totalVictorDeaths))
+                    print("\nTotal Vanquished Deaths: " + db.get_Display_Value(found_Battle.totalVanquishedDeaths))
+                    print("\nSignificant Figures Present:\n" + db.get_Display_Value(found_Battle.significantFiguresPresent))
+                    print("\nNotable Deaths:\n" + db.get_Display_Value(found_Battle.notableDeaths))
                     print()
                     print("=" * 226)
             elif menu_Option == 8:
@@ -57,7 +91,22 @@ def main():
                 db.display_Menu()               # Displays the menu for convenience
             elif menu_Option == 10:              # Exits loop
                 print(db.get_Centered_String("Initiating program exit... Program now terminated."))
+                if battles is not None:
+                    battles.close()
+                db.close()                      # Closes the database connections
                 break
+            elif menu_Option == 11:
+                analytics.display_Analytics()   # Shows casualty ratios, force percentiles and grouped deaths
+            elif menu_Option == 12:
+                db.search_For_Battles()         # Full-text search over names, countries, figures and deaths
+            elif menu_Option == 13:
+                instrument.display_Stats()      # Shows recorded query and phase timings
+            elif menu_Option == 14:
+                query.query_Battles()           # Filters battles by dates, forces, sides and country
+            elif menu_Option == 15:
+                analytics.display_Overview()    # Shows totals, date range and top winners, losers and decades
+            elif menu_Option == 16:
+                elapsed.display_Anniversaries() # Lists battles whose anniversary falls in the next few days
             else:
                 print("Entry not valid. Please choose a menu option.")
 
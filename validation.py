@@ -0,0 +1,93 @@
+#! /usr/bin/env/ python3
+
+from datetime import date, datetime
+
+from business import INT_FIELDS, Battle
+
+# Rules every new or edited battle has to pass, wherever it comes from.
+# Nothing in here prompts, prints or touches the database, so the same rules serve the
+# interactive menu (db.get_Date, db.get_Valid_Int, db.add_Battle), the cli and bulk
+# imports, including the worker processes of a parallel import (see pipeline.py).
+
+# Fields stored in Title Case, so lookups match however a name was typed
+TITLE_FIELDS = ('battleName', 'winner', 'loser')
+
+#-------------------------------------------------------------------------
+
+# Converts a YYYY-MM-DD string into a date object
+# Raises ValueError if the string is in the wrong format
+def parse_Date(date_str: str) -> date:
+    # Parse the string into a datetime object
+    return datetime.strptime(date_str, '%Y-%m-%d').date()
+
+# Raised by parse_Valid_Int for a whole number below zero, so callers can tell it
+# apart from a value that isn't a whole number at all
+class Negative_Value_Error(ValueError):
+    pass
+
+# Converts a value into a non-negative integer
+# Strings have to hold a whole number and floats can't have a fractional part, so 3.7
+# is refused rather than cut down to 3. True and False are refused too, although
+# Python counts them as integers.
+# Raises ValueError (Negative_Value_Error if it is below zero)
+def parse_Valid_Int(value) -> int:
+    if isinstance(value, bool):
+        raise ValueError("Value must be a whole number.")
+
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError("Value must be a whole number.")
+
+    try:
+        value = int(value)
+    except TypeError:
+        raise ValueError("Value must be a whole number.")
+
+    if value < 0:
+        raise Negative_Value_Error("Value must be zero or greater.")
+
+    return value
+
+# Converts a name to Title Case, None becomes an empty string
+def to_Title(value) -> str:
+    return str(value or '').title()
+
+#-------------------------------------------------------------------------
+
+# Validates a raw record (a dictionary of field name -> value) and converts it into a Battle
+# Raises ValueError describing the first problem found
+def record_To_Battle(record: dict) -> Battle:
+
+    if not isinstance(record, dict):
+        raise ValueError("record is not a valid JSON object.")
+
+    if not record.get('battleName'):
+        raise ValueError("battleName is missing.")
+
+    try:
+        battle_Date = parse_Date(str(record.get('date') or ''))
+    except ValueError:
+        raise ValueError(f"date '{record.get('date')}' is not in YYYY-MM-DD format.")
+
+    numbers = {}
+    for field_Name in INT_FIELDS:
+        value = record.get(field_Name)
+
+        # An empty CSV cell is as missing as a key left out of a JSON object
+        if value is None or (isinstance(value, str) and not value.strip()):
+            raise ValueError(f"{field_Name} is missing.")
+
+        try:
+            numbers[field_Name] = parse_Valid_Int(value)
+        except ValueError:
+            raise ValueError(f"{field_Name} '{value}' must be a whole number of zero or greater.")
+
+    return Battle(
+        battleName=to_Title(record['battleName']),
+        date=battle_Date,
+        countriesInvolved=str(record.get('countriesInvolved') or ''),
+        winner=to_Title(record.get('winner')),
+        loser=to_Title(record.get('loser')),
+        significantFiguresPresent=str(record.get('significantFiguresPresent') or ''),
+        notableDeaths=str(record.get('notableDeaths') or ''),
+        **numbers
+    )